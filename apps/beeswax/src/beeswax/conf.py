@@ -224,6 +224,40 @@ DOWNLOAD_BYTES_LIMIT = Config(
   help=_t('A limit to the number of bytes that can be downloaded from a query before it is truncated. '
           'A value of -1 means there will be no limit.'))
 
+DOWNLOAD_PREFETCH_BATCHES = Config(
+  key='download_prefetch_batches',
+  default=0,
+  type=int,
+  help=_t('Number of result batches fetched ahead on a background thread while the previous batch is being written '
+          'when downloading or exporting query results. A value of 0 disables prefetching.'))
+
+METADATA_CACHE_TTL = Config(
+  key='metadata_cache_ttl',
+  default=0,
+  type=int,
+  help=_t('Number of seconds the databases, tables, table descriptions and partitions returned by the query server are cached. '
+          'They are invalidated when a statement changing them is executed through this Hue server, the changes made '
+          'elsewhere are only seen once they expire. A value of 0 disables the cache.'))
+
+METADATA_CACHE_NEGATIVE_TTL = Config(
+  key='metadata_cache_negative_ttl',
+  default=10,
+  type=int,
+  help=_t('Number of seconds a lookup of a missing database or table is cached.'))
+
+METADATA_CACHE_MAX_ENTRIES = Config(
+  key='metadata_cache_max_entries',
+  default=10000,
+  type=int,
+  help=_t('Maximum number of entries of the metadata cache, the least recently used ones being evicted first.'))
+
+METADATA_CACHE_SHARED = Config(
+  key='metadata_cache_shared',
+  default=False,
+  type=coerce_bool,
+  help=_t('Share the cached metadata between all the users instead of caching it per user. '
+          'Only enable when all the users are authorized to see the same databases and tables.'))
+
 APPLY_NATURAL_SORT_MAX = Config(
   key="apply_natural_sort_max",
   help=_t("The max number of records in the result set permitted to apply a natural sort to the database or tables list."),
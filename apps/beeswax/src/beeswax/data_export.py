@@ -21,14 +21,20 @@ import json
 import logging
 import math
 import sys
+import threading
 import types
 
+from django.db import connections
+
 from desktop.lib import export_csvxls
 from beeswax import common, conf
+from beeswax.server.dbms import QueryServerTimeoutException
 
 if sys.version_info[0] > 2:
+  from queue import Queue, Empty, Full
   from django.utils.translation import gettext as _
 else:
+  from Queue import Queue, Empty, Full
   from django.utils.translation import ugettext as _
 
 
@@ -36,6 +42,7 @@ LOG = logging.getLogger()
 
 
 FETCH_SIZE = 1000
+FETCH_TIMEOUT_S = 60
 DOWNLOAD_COOKIE_AGE = 1800 # 30 minutes
 
 
@@ -52,7 +59,9 @@ def download(handle, format, db, id=None, file_name='query_result', user_agent=N
   max_rows = conf.DOWNLOAD_ROW_LIMIT.get()
   max_bytes = conf.DOWNLOAD_BYTES_LIMIT.get()
 
-  content_generator = DataAdapter(db, handle=handle, max_rows=max_rows, max_bytes=max_bytes)
+  content_generator = DataAdapter(
+      db, handle=handle, max_rows=max_rows, max_bytes=max_bytes, prefetch_batches=conf.DOWNLOAD_PREFETCH_BATCHES.get()
+  )
   generator = export_csvxls.create_generator(content_generator, format)
 
   resp = export_csvxls.make_response(generator, format, file_name, user_agent=user_agent)
@@ -89,7 +98,8 @@ def upload(path, handle, user, db, fs, max_rows=-1, max_bytes=-1):
 
 class DataAdapter(object):
 
-  def __init__(self, db, handle=None, max_rows=-1, start_over=True, max_bytes=-1, store_data_type_in_header=False):
+  def __init__(self, db, handle=None, max_rows=-1, start_over=True, max_bytes=-1, store_data_type_in_header=False,
+      prefetch_batches=0):
     self.handle = handle
     self.db = db
     self.max_rows = max_rows
@@ -107,10 +117,33 @@ class DataAdapter(object):
     self.is_truncated = False
     self.has_more = True
     self.store_data_type_in_header = store_data_type_in_header
+    self.prefetch_batches = prefetch_batches
+    self.prefetcher = None
+    self.closed = False
 
   def __iter__(self):
     return self
 
+  def close(self):
+    """Stops any prefetching and closes the query handle. Safe to call several times."""
+    if not self.closed:
+      self.closed = True
+      if self.prefetcher is not None:
+        self.prefetcher.close()  # The client is not thread safe, the handle is closed once the prefetcher is done
+      else:
+        self.db.close(self.handle)
+
+  def _fetch(self):
+    # The first batch is fetched inline as it decides of the headers and fetch size of the next ones
+    if self.first_fetched or self.prefetch_batches <= 0:
+      return self.db.fetch(self.handle, start_over=self.start_over, rows=self.fetch_size)
+
+    if self.prefetcher is None:
+      self.prefetcher = ResultPrefetcher(self.db, self.handle, self.fetch_size, self.prefetch_batches)
+      self.prefetcher.start()
+
+    return self.prefetcher.get()
+
   # Return an estimate of the size of the object using only ascii characters once serialized to string.
   # Avoid serialization to string where possible
   def _getsizeofascii(self, row):
@@ -140,7 +173,11 @@ class DataAdapter(object):
     return size
 
   def __next__(self):
-    results = self.db.fetch(self.handle, start_over=self.start_over, rows=self.fetch_size)
+    if not self.first_fetched and (not self.has_more or self.is_truncated):
+      self.close()
+      raise StopIteration
+
+    results = self._fetch()
     if self.first_fetched:
       self.first_fetched = False
       self.start_over = False
@@ -160,29 +197,97 @@ class DataAdapter(object):
         LOG.warning('The query results contain %d columns and may take long time to download, reducing fetch size to 100.' % self.num_cols)
         self.fetch_size = 100
 
-    if self.has_more and not self.is_truncated:
-      self.has_more = results.has_more
-      data = []
-
-      for row in results.rows():
-        num_bytes = self._getsizeofascii(row)
-        if self.limit_rows and self.row_counter + 1 > self.max_rows:
-          LOG.warning('The query results exceeded the maximum row limit of %d and has been truncated to first %d rows.' % (
-              self.max_rows, self.row_counter)
-          )
-          self.is_truncated = True
-          break
-        if self.limit_bytes and self.bytes_counter + num_bytes > self.max_bytes:
-          LOG.warning('The query results exceeded the maximum bytes limit of %d and has been truncated to first %d rows.' % (
-              self.max_bytes, self.row_counter)
-          )
-          self.is_truncated = True
+    self.has_more = results.has_more
+    data = []
+
+    for row in results.rows():
+      num_bytes = self._getsizeofascii(row) if self.limit_bytes else 0
+      if self.limit_rows and self.row_counter + 1 > self.max_rows:
+        LOG.warning('The query results exceeded the maximum row limit of %d and has been truncated to first %d rows.' % (
+            self.max_rows, self.row_counter)
+        )
+        self.is_truncated = True
+        break
+      if self.limit_bytes and self.bytes_counter + num_bytes > self.max_bytes:
+        LOG.warning('The query results exceeded the maximum bytes limit of %d and has been truncated to first %d rows.' % (
+            self.max_bytes, self.row_counter)
+        )
+        self.is_truncated = True
+        break
+      self.row_counter += 1
+      self.bytes_counter += num_bytes
+      data.append(row)
+
+    return self.headers, data
+
+
+class ResultPrefetcher(threading.Thread):
+  """
+  Fetches the next result batches on a background thread while the current batch is being written.
+
+  At most `depth` batches are kept in the queue. close() makes the thread exit after its ongoing fetch, the query
+  handle is closed by whichever of the two finishes last so that the client is never used by both at once.
+  """
+
+  def __init__(self, db, handle, fetch_size, depth):
+    threading.Thread.__init__(self, name='ResultPrefetcher')
+    self.daemon = True
+    self.db = db
+    self.handle = handle
+    self.fetch_size = fetch_size
+    self.queue = Queue(maxsize=depth)
+    self.stopped = threading.Event()
+    self.lock = threading.Lock()
+    self.exited = False
+    self.close_on_exit = False
+
+  def run(self):
+    try:
+      while not self.stopped.is_set():
+        results = self.db.fetch(self.handle, start_over=False, rows=self.fetch_size)
+        self._put((results, None))
+        if not results.has_more:
           break
-        self.row_counter += 1
-        self.bytes_counter += num_bytes
-        data.append(row)
+    except Exception as e:
+      LOG.exception('Failed to prefetch the query results.')
+      self._put((None, e))
+    finally:
+      with self.lock:
+        self.exited = True
+        close_handle = self.close_on_exit
+      if close_handle:
+        self._close_handle()
+      connections.close_all()
+
+  def _put(self, item):
+    while not self.stopped.is_set():
+      try:
+        self.queue.put(item, timeout=1)
+        return
+      except Full:
+        pass
+
+  def get(self):
+    try:
+      results, error = self.queue.get(timeout=FETCH_TIMEOUT_S)
+    except Empty:
+      raise QueryServerTimeoutException(_('Timed out after %d seconds while fetching the query results.') % FETCH_TIMEOUT_S)
+    if error is not None:
+      raise error
+    return results
 
-      return self.headers, data
-    else:
+  def close(self):
+    """Stops the prefetching without waiting and closes the query handle, later if a fetch is still ongoing."""
+    self.stopped.set()
+    with self.lock:
+      self.close_on_exit = not self.exited
+      close_handle = self.exited
+
+    if close_handle:
+      self._close_handle()
+
+  def _close_handle(self):
+    try:
       self.db.close(self.handle)
-      raise StopIteration
+    except Exception:
+      LOG.exception('Failed to close the query handle after prefetching the results.')
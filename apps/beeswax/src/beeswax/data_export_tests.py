@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import logging
+import sys
+import threading
+
+from nose.tools import assert_equal, assert_false, assert_raises, assert_true
+
+from beeswax.data_export import DataAdapter, ResultPrefetcher
+from beeswax.server.dbms import QueryServerTimeoutException
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch, Mock
+else:
+  from mock import patch, Mock
+
+
+LOG = logging.getLogger()
+
+
+class MockDb(object):
+
+  def __init__(self, batches):
+    self.batches = batches
+    self.fetch_count = 0
+    self.close_count = 0
+
+  def fetch(self, handle, start_over=False, rows=None):
+    batch = self.fetch_count
+    self.fetch_count += 1
+    return Mock(
+      has_more=batch < self.batches,
+      full_cols=Mock(return_value=[{'name': 'id', 'type': 'INT_TYPE'}]),
+      rows=Mock(return_value=iter([[batch * 10 + i] for i in range(10)] if batch < self.batches else []))
+    )
+
+  def close(self, handle):
+    self.close_count += 1
+
+
+class TestDataAdapter():
+
+  def test_prefetch(self):
+    for prefetch_batches in (0, 2):
+      db = MockDb(batches=5)
+      content_generator = DataAdapter(db, prefetch_batches=prefetch_batches)
+
+      rows = [row for headers, data in content_generator for row in data]
+
+      assert_equal([[i] for i in range(50)], rows)
+      if content_generator.prefetcher is not None:
+        content_generator.prefetcher.join(5)
+      assert_equal(1, db.close_count)
+
+      content_generator.close()
+      assert_equal(1, db.close_count)
+
+
+  def test_prefetch_truncated(self):
+    db = MockDb(batches=100)
+    content_generator = DataAdapter(db, max_rows=25, prefetch_batches=2)
+
+    rows = [row for headers, data in content_generator for row in data]
+
+    assert_equal(25, len(rows))
+    assert_true(content_generator.is_truncated)
+    content_generator.prefetcher.join(5)
+    assert_equal(1, db.close_count)
+    assert_true(db.fetch_count < 100, db.fetch_count)
+
+
+  def test_prefetch_close_during_fetch(self):
+    db = MockDb(batches=100)
+    fetched = threading.Event()
+    resume = threading.Event()
+    fetch = db.fetch
+
+    def slow_fetch(handle, start_over=False, rows=None):
+      if db.fetch_count == 1:
+        fetched.set()
+        resume.wait(5)
+      return fetch(handle, start_over=start_over, rows=rows)
+
+    db.fetch = slow_fetch
+    content_generator = DataAdapter(db, prefetch_batches=2)
+    next(content_generator)
+    content_generator.prefetcher = ResultPrefetcher(db, None, fetch_size=10, depth=2)
+    content_generator.prefetcher.start()
+    assert_true(fetched.wait(5))
+
+    # The request thread is not blocked and the handle is not closed while the client is fetching
+    content_generator.close()
+    assert_equal(0, db.close_count)
+
+    resume.set()
+    content_generator.prefetcher.join(5)
+    assert_false(content_generator.prefetcher.is_alive())
+    assert_equal(1, db.close_count)
+
+
+  def test_prefetch_get_timeout(self):
+    db = MockDb(batches=5)
+    resume = threading.Event()
+    fetch = db.fetch
+    db.fetch = lambda handle, start_over=False, rows=None: resume.wait(5) and fetch(handle, start_over=start_over, rows=rows)
+
+    content_generator = DataAdapter(db, prefetch_batches=2)
+    content_generator.first_fetched = False
+
+    with patch('beeswax.data_export.FETCH_TIMEOUT_S', 0.1):
+      assert_raises(QueryServerTimeoutException, content_generator._fetch)
+
+    content_generator.close()
+    resume.set()
+    content_generator.prefetcher.join(5)
+    assert_equal(1, db.close_count)
@@ -16,6 +16,7 @@
 # limitations under the License.
 
 from builtins import object
+import copy
 import logging
 import re
 import sys
@@ -50,6 +51,7 @@ from beeswax.design import hql_query
 from beeswax.hive_site import hiveserver2_use_ssl, hiveserver2_impersonation_enabled, get_hiveserver2_kerberos_principal, \
     hiveserver2_transport_mode, hiveserver2_thrift_http_path
 from beeswax.models import QueryHistory, QUERY_TYPES
+from beeswax.server.metadata_cache import METADATA_CACHE
 
 
 if sys.version_info[0] > 2:
@@ -393,11 +395,19 @@ class HiveServer2Dbms(object):
     return cleaned
 
 
+  def _get_cached(self, fetch, database=None, table=None, call=()):
+    return METADATA_CACHE.get(
+        fetch, self.client.query_server['server_name'], self.client.user.username, database=database, table=table, call=call
+    )
+
+
   def get_databases(self, database_names='*'):
     if database_names != '*':
       database_names = self.to_matching_wildcard(database_names)
 
-    databases = self.client.get_databases(schemaName=database_names)
+    databases = list(self._get_cached(
+        lambda: self.client.get_databases(schemaName=database_names), call=('databases', database_names)
+    ))
 
     if len(databases) <= APPLY_NATURAL_SORT_MAX.get():
       databases = apply_natural_sort(databases)
@@ -436,9 +446,10 @@ class HiveServer2Dbms(object):
       identifier = None  # Impala
 
     if self.server_name == 'sparksql':
-      tables = self._get_tables_via_sparksql(database, identifier)
+      fetch = lambda: self._get_tables_via_sparksql(database, identifier)
     else:
-      tables = self.client.get_tables_meta(database, identifier)
+      fetch = lambda: self.client.get_tables_meta(database, identifier)
+    tables = list(self._get_cached(fetch, database=database, call=('tables_meta', identifier)))
 
     if len(tables) <= APPLY_NATURAL_SORT_MAX.get():
       tables = apply_natural_sort(tables, key='name')
@@ -453,7 +464,11 @@ class HiveServer2Dbms(object):
     else:
       identifier = None
 
-    tables = self.client.get_tables(database, identifier, table_types)
+    tables = list(self._get_cached(
+        lambda: self.client.get_tables(database, identifier, table_types),
+        database=database,
+        call=('tables', identifier, tuple(table_types) if table_types else None)
+    ))
 
     if len(tables) <= APPLY_NATURAL_SORT_MAX.get():
       tables = apply_natural_sort(tables)
@@ -488,6 +503,13 @@ class HiveServer2Dbms(object):
 
 
   def get_table(self, database, table_name):
+    # Callers modify the table they get, e.g. is_impala_only, which must not change the cached one
+    return copy.deepcopy(
+        self._get_cached(lambda: self._get_table(database, table_name), database=database, table=table_name, call=('table',))
+    )
+
+
+  def _get_table(self, database, table_name):
     try:
       return self.client.get_table(database, table_name)
     except QueryServerException as e:
@@ -1153,7 +1175,12 @@ class HiveServer2Dbms(object):
     if max_parts is None or max_parts > LIST_PARTITIONS_LIMIT.get():
       max_parts = LIST_PARTITIONS_LIMIT.get()
 
-    return self.client.get_partitions(db_name, table.name, partition_spec, max_parts=max_parts, reverse_sort=reverse_sort)
+    return list(self._get_cached(
+        lambda: self.client.get_partitions(db_name, table.name, partition_spec, max_parts=max_parts, reverse_sort=reverse_sort),
+        database=db_name,
+        table=table.name,
+        call=('partitions', partition_spec, max_parts, reverse_sort)
+    ))
 
 
   def get_partition(self, db_name, table_name, partition_spec, generate_ddl_only=False):
@@ -21,7 +21,7 @@ import sys
 
 from nose.tools import assert_equal, assert_true, assert_raises, assert_not_equal
 from nose.plugins.skip import SkipTest
-from TCLIService.ttypes import TStatusCode
+from TCLIService.ttypes import TStatusCode, TColumn, TI32Column, TStringColumn
 
 from desktop.auth.backend import rewrite_user
 from desktop.lib.django_test_util import make_logged_in_client
@@ -30,7 +30,7 @@ from useradmin.models import User
 from beeswax.conf import MAX_NUMBER_OF_SESSIONS, CLOSE_SESSIONS
 from beeswax.models import HiveServerQueryHandle, Session
 from beeswax.server.dbms import get_query_server_config, QueryServerException
-from beeswax.server.hive_server2_lib import HiveServerTable, HiveServerClient, HiveServerClientCompatible
+from beeswax.server.hive_server2_lib import HiveServerTable, HiveServerClient, HiveServerClientCompatible, HiveServerTColumnBatch2
 
 if sys.version_info[0] > 2:
   from unittest.mock import patch, Mock, MagicMock
@@ -1072,3 +1072,24 @@ class TestHiveServerClientCompatible():
     ]
 
     assert_equal(sorted_table, massaged_tables)
+
+
+class TestHiveServerTColumnBatch2():
+
+  def test_rows(self):
+    columns = [
+      TColumn(i32Val=TI32Column(values=[1, 2, 3], nulls=b'\x02')),
+      TColumn(stringVal=TStringColumn(values=['a', 'b', 'c'], nulls=b'\x04')),
+    ]
+
+    assert_equal([[1, 'a'], [None, 'b'], [3, None]], list(HiveServerTColumnBatch2(columns).rows()))
+
+
+  def test_rows_stops_at_shortest_column(self):
+    columns = [
+      TColumn(i32Val=TI32Column(values=[1, 2, 3], nulls=b'')),
+      TColumn(stringVal=TStringColumn(values=['a', 'b'], nulls=b'')),
+    ]
+
+    assert_equal([[1, 'a'], [2, 'b']], list(HiveServerTColumnBatch2(columns).rows()))
+    assert_equal([], list(HiveServerTColumnBatch2([]).rows()))
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process wide cache of the HiveServer2 metadata calls (databases, tables, table descriptions, partitions).
+
+Entries are keyed by query server, user (unless the cache is shared), database, table and call, expire after
+METADATA_CACHE_TTL seconds, and are invalidated when a statement changing the metadata is sent through Hue.
+Lookups of missing objects are cached for METADATA_CACHE_NEGATIVE_TTL seconds. Concurrent misses of the same
+entry wait for a single call to the query server.
+"""
+
+from builtins import object
+import logging
+import re
+import threading
+import time
+
+from collections import OrderedDict
+
+from beeswax.conf import METADATA_CACHE_TTL, METADATA_CACHE_NEGATIVE_TTL, METADATA_CACHE_MAX_ENTRIES, METADATA_CACHE_SHARED
+
+
+LOG = logging.getLogger()
+
+NOT_FOUND_REGEX = re.compile(r'not found|does not exist|could not be resolved', re.IGNORECASE)
+METADATA_STATEMENT_REGEX = re.compile(
+    r'^\s*(?:CREATE|DROP|ALTER|TRUNCATE|MSCK|REFRESH|INVALIDATE|COMPUTE|ANALYZE|INSERT|LOAD|IMPORT|UPSERT|UPDATE|DELETE|MERGE)\b',
+    re.IGNORECASE
+)
+DATABASE_STATEMENT_REGEX = re.compile(r'^\s*(?:CREATE|DROP|ALTER)\s+(?:DATABASE|SCHEMA)\b', re.IGNORECASE)
+COMMENT_REGEX = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+LITERAL_REGEX = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+IDENTIFIER_REGEX = re.compile(r'(?:`[^`]*`|\w+)(?:\s*\.\s*(?:`[^`]*`|\w+))?')
+STATEMENT_KEYWORDS = set([
+  'CREATE', 'DROP', 'ALTER', 'TRUNCATE', 'MSCK', 'REPAIR', 'REFRESH', 'INVALIDATE', 'METADATA', 'COMPUTE', 'INCREMENTAL',
+  'STATS', 'ANALYZE', 'INSERT', 'INTO', 'OVERWRITE', 'LOAD', 'DATA', 'LOCAL', 'INPATH', 'IMPORT', 'UPSERT', 'UPDATE', 'DELETE',
+  'FROM', 'MERGE', 'TABLE', 'VIEW', 'DATABASE', 'SCHEMA', 'EXTERNAL', 'TEMPORARY', 'TRANSACTIONAL', 'MATERIALIZED', 'OR',
+  'REPLACE', 'IF', 'NOT', 'EXISTS'
+])
+MAX_OPERATIONS = 1000
+
+
+class _Call(object):
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.result = None
+    self.error = None
+
+
+class MetadataCache(object):
+
+  def __init__(self, max_entries=None):
+    self._max_entries = max_entries
+    self._entries = OrderedDict()  # key -> (expiration, result, error)
+    self._calls = {}
+    self._operations = OrderedDict()  # operation id -> (server, databases) of the statements still running
+    self._lock = threading.Lock()
+
+  def get(self, fetch, server, user, database=None, table=None, call=()):
+    """
+    Returns the cached result of fetch() for this key, or calls it once for all the concurrent callers.
+    """
+    ttl = METADATA_CACHE_TTL.get()
+    if ttl <= 0:
+      return fetch()
+
+    key = (
+      server,
+      None if METADATA_CACHE_SHARED.get() else user,
+      database.lower() if database else None,
+      table.lower() if table else None,
+      call
+    )
+
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        if entry[0] > time.time():
+          self._entries[key] = self._entries.pop(key)
+          return self._result(entry[1], entry[2])
+        del self._entries[key]
+
+      pending = self._calls.get(key)
+      if pending is None:
+        pending = self._calls[key] = _Call()
+        is_owner = True
+      else:
+        is_owner = False
+
+    if not is_owner:
+      pending.done.wait()
+      return self._result(pending.result, pending.error)
+
+    try:
+      pending.result = fetch()
+      expiration = time.time() + ttl
+    except Exception as e:
+      pending.error = e
+      is_not_found = NOT_FOUND_REGEX.search('%s %s' % (e, getattr(e, 'message', '')))
+      expiration = time.time() + METADATA_CACHE_NEGATIVE_TTL.get() if is_not_found else None
+
+    with self._lock:
+      # An invalidation during the call removed the pending call: its result might be outdated and is not cached.
+      if self._calls.get(key) is pending:
+        del self._calls[key]
+        if expiration is not None:
+          self._set(key, (expiration, pending.result, pending.error))
+    pending.done.set()
+
+    return self._result(pending.result, pending.error)
+
+  def invalidate(self, server, database=None):
+    """
+    Removes the entries of a database and the list of databases, or all the entries of the server.
+    """
+    database = database.lower() if database else None
+
+    with self._lock:
+      for keys in (self._entries, self._calls):
+        for key in [key for key in keys if key[0] == server and (database is None or key[2] is None or key[2] == database)]:
+          del keys[key]
+
+  def invalidate_statement(self, server, statement, operation_id=None):
+    """
+    Invalidates the databases modified by a statement, or the whole server when they are not all known.
+    Asynchronous statements pass their operation id to be invalidated again with invalidate_operation() when they are done.
+    """
+    is_modifying, databases = _get_modified_databases(statement)
+    if not is_modifying:
+      return
+
+    self._invalidate_databases(server, databases)
+
+    if operation_id is not None:
+      with self._lock:
+        self._operations[operation_id] = (server, databases)
+        while len(self._operations) > MAX_OPERATIONS:
+          self._operations.popitem(last=False)
+
+  def invalidate_operation(self, operation_id):
+    with self._lock:
+      operation = self._operations.pop(operation_id, None)
+
+    if operation is not None:
+      self._invalidate_databases(*operation)
+
+  def _invalidate_databases(self, server, databases):
+    LOG.debug('Invalidating metadata cache of %s for databases %s' % (server, databases or 'all'))
+    if databases is None:
+      self.invalidate(server)
+    else:
+      for database in databases:
+        self.invalidate(server, database)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._calls.clear()
+      self._operations.clear()
+
+  def _set(self, key, entry):
+    self._entries[key] = entry
+    max_entries = self._max_entries if self._max_entries is not None else METADATA_CACHE_MAX_ENTRIES.get()
+    while len(self._entries) > max_entries:
+      self._entries.popitem(last=False)
+
+  def _result(self, result, error):
+    if error is not None:
+      raise error
+    return result
+
+
+def _get_modified_databases(statement):
+  """
+  Returns if the statement modifies some metadata, and the list of the databases it modifies or None if unknown.
+  """
+  if isinstance(statement, bytes):
+    statement = statement.decode('utf-8', 'replace')
+  statement = LITERAL_REGEX.sub(' ', COMMENT_REGEX.sub(' ', statement))
+
+  if not METADATA_STATEMENT_REGEX.match(statement):
+    return False, None
+
+  identifiers = IDENTIFIER_REGEX.findall(statement)
+  target = next((identifier for identifier in identifiers if identifier.upper() not in STATEMENT_KEYWORDS), None)
+
+  if target is None:
+    databases = None
+  elif DATABASE_STATEMENT_REGEX.match(statement):
+    databases = [target.strip('`')]
+  elif '.' in target:
+    databases = sorted(set(identifier.split('.')[0].strip().strip('`') for identifier in identifiers if '.' in identifier))
+  else:
+    databases = None  # Table of the current database of the session
+
+  return True, databases
+
+
+METADATA_CACHE = MetadataCache()
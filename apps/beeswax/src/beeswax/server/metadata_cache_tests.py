@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+import time
+
+from nose.tools import assert_equal, assert_raises
+
+from beeswax.conf import METADATA_CACHE_TTL, METADATA_CACHE_SHARED
+from beeswax.server.dbms import HiveServer2Dbms, QueryServerException
+from beeswax.server.metadata_cache import MetadataCache, _get_modified_databases
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch, Mock
+else:
+  from mock import patch, Mock
+
+
+class TestMetadataCache(object):
+
+  def setUp(self):
+    self.resets = [METADATA_CACHE_TTL.set_for_testing(60), METADATA_CACHE_SHARED.set_for_testing(False)]
+    self.cache = MetadataCache(max_entries=100)
+
+  def tearDown(self):
+    for reset in self.resets:
+      reset()
+
+  def test_get(self):
+    fetch = Mock(return_value=['default', 'sales'])
+
+    assert_equal(['default', 'sales'], self.cache.get(fetch, 'beeswax', 'hue', call=('databases', '*')))
+    assert_equal(['default', 'sales'], self.cache.get(fetch, 'beeswax', 'hue', call=('databases', '*')))
+    assert_equal(1, fetch.call_count)
+
+    self.cache.get(fetch, 'beeswax', 'other', call=('databases', '*'))
+    self.cache.get(fetch, 'impala', 'hue', call=('databases', '*'))
+    assert_equal(3, fetch.call_count)
+
+  def test_get_disabled(self):
+    fetch = Mock(return_value=[])
+    reset = METADATA_CACHE_TTL.set_for_testing(0)
+    try:
+      self.cache.get(fetch, 'beeswax', 'hue')
+      self.cache.get(fetch, 'beeswax', 'hue')
+    finally:
+      reset()
+
+    assert_equal(2, fetch.call_count)
+
+  def test_negative_caching(self):
+    fetch = Mock(side_effect=QueryServerException('Table not found customers'))
+
+    assert_raises(QueryServerException, self.cache.get, fetch, 'beeswax', 'hue', 'default', 'customers')
+    assert_raises(QueryServerException, self.cache.get, fetch, 'beeswax', 'hue', 'default', 'customers')
+    assert_equal(1, fetch.call_count)
+
+    fetch = Mock(side_effect=QueryServerException('Connection refused'))
+
+    assert_raises(QueryServerException, self.cache.get, fetch, 'beeswax', 'hue', 'default', 'orders')
+    assert_raises(QueryServerException, self.cache.get, fetch, 'beeswax', 'hue', 'default', 'orders')
+    assert_equal(2, fetch.call_count)
+
+  def test_coalescing(self):
+    started = threading.Event()
+    calls = []
+
+    def fetch():
+      calls.append(1)
+      started.set()
+      time.sleep(0.1)
+      return ['customers']
+
+    results = []
+    threads = [
+      threading.Thread(target=lambda: results.append(self.cache.get(fetch, 'beeswax', 'hue', 'default'))) for i in range(5)
+    ]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    assert_equal(1, len(calls))
+    assert_equal([['customers']] * 5, results)
+
+  def test_invalidate_statement(self):
+    fetch = Mock(return_value=[])
+    self.cache.get(fetch, 'beeswax', 'hue', call=('databases', '*'))
+    self.cache.get(fetch, 'beeswax', 'hue', 'default', 'customers')
+    self.cache.get(fetch, 'beeswax', 'hue', 'sales', 'orders')
+
+    self.cache.invalidate_statement('beeswax', 'SELECT * FROM default.customers')
+    self.cache.invalidate_statement('beeswax', 'DROP TABLE `default`.`customers`')
+
+    self.cache.get(fetch, 'beeswax', 'hue', call=('databases', '*'))
+    self.cache.get(fetch, 'beeswax', 'hue', 'default', 'customers')
+    self.cache.get(fetch, 'beeswax', 'hue', 'sales', 'orders')
+    assert_equal(5, fetch.call_count)
+
+  def test_invalidate_operation(self):
+    fetch = Mock(return_value=[])
+    self.cache.invalidate_statement('beeswax', 'CREATE TABLE sales.orders AS SELECT 1', operation_id=b'guid')
+    self.cache.get(fetch, 'beeswax', 'hue', 'sales')
+
+    self.cache.invalidate_operation(b'guid')
+    self.cache.get(fetch, 'beeswax', 'hue', 'sales')
+    self.cache.invalidate_operation(b'guid')
+    self.cache.get(fetch, 'beeswax', 'hue', 'sales')
+
+    assert_equal(2, fetch.call_count)
+
+  def test_get_table_returns_copies(self):
+    client = Mock(query_server={'server_name': 'beeswax', 'dialect': 'hive'})
+    client.user.username = 'hue'
+    client.get_table.return_value = Mock(is_impala_only=False)
+    db = HiveServer2Dbms(client, 'beeswax')
+
+    with patch('beeswax.server.dbms.METADATA_CACHE', self.cache):
+      db.get_table('default', 'sample_07').is_impala_only = True
+
+      assert_equal(False, db.get_table('default', 'sample_07').is_impala_only)
+      assert_equal(1, client.get_table.call_count)
+
+  def test_get_modified_databases(self):
+    assert_equal((False, None), _get_modified_databases('SELECT * FROM default.customers'))
+    assert_equal((False, None), _get_modified_databases('SHOW TABLES'))
+    assert_equal((True, ['sales']), _get_modified_databases('CREATE DATABASE IF NOT EXISTS sales'))
+    assert_equal((True, ['sales']), _get_modified_databases('-- Cleanup\nDROP SCHEMA `sales` CASCADE'))
+    assert_equal((True, None), _get_modified_databases('CREATE TABLE customers (id INT)'))
+    assert_equal((True, ['default', 'sales']), _get_modified_databases('ALTER TABLE default.customers RENAME TO sales.customers'))
+    assert_equal((True, ['sales']), _get_modified_databases("LOAD DATA INPATH '/user/hue/data.csv' INTO TABLE sales.orders"))
+    assert_equal((True, ['sales']), _get_modified_databases('INVALIDATE METADATA `sales`.`orders`'))
+    assert_equal((True, None), _get_modified_databases('INVALIDATE METADATA'))
@@ -31,6 +31,7 @@ from desktop.lib.fs.gc.gs import get_gs_home_directory
 from azure.abfs.__init__ import get_home_dir_for_abfs
 from aws.s3.s3fs import get_s3_home_directory
 
+from filebrowser.listing_cache import LISTING_CACHE
 from filebrowser.views import _normalize_path
 
 LOG = logging.getLogger()
@@ -97,6 +98,7 @@ def mkdir(request):
     raise Exception(_("Error creating %s directory. Slashes or hashes are not allowed in directory name." % name))
 
   request.fs.mkdir(request.fs.join(path, name))
+  LISTING_CACHE.invalidate(path)
   return HttpResponse(status=200)
 
 
@@ -109,6 +111,7 @@ def touch(request):
     raise Exception(_("Error creating %s file. Slashes are not allowed in filename." % name))
   
   request.fs.create(request.fs.join(path, name))
+  LISTING_CACHE.invalidate(path)
   return HttpResponse(status=200)
 
 @error_handler
@@ -130,6 +133,7 @@ def rename(request):
     raise Exception(_('The destination path "%s" already exists.') % dest_path)
 
   request.fs.rename(src_path, dest_path)
+  LISTING_CACHE.invalidate(src_path, dest_path)
   return HttpResponse(status=200)
 
 @error_handler
@@ -52,6 +52,44 @@ CONCURRENT_MAX_CONNECTIONS = Config(
   type=int,
   help=_('Configure the maximum number of concurrent connections(chunks) for file uploads using the chunked file uploader.'))
 
+UPLOAD_PART_PARALLELISM = Config(
+  key="upload_part_parallelism",
+  default=4,
+  type=int,
+  help=_('Number of parts of a chunked file upload sent concurrently to S3 or ABFS.'))
+
+UPLOAD_MAX_BUFFER_SIZE = Config(
+  key="upload_max_buffer_size",
+  default=512 * 1024 * 1024,
+  type=int,
+  help=_('Maximum number of bytes of a chunked file upload held in memory while its parts are sent to S3 or ABFS.'))
+
+UPLOAD_PART_RETRIES = Config(
+  key="upload_part_retries",
+  default=3,
+  type=int,
+  help=_('Number of times a failed part of a chunked file upload to S3 or ABFS is retried.'))
+
+LISTING_CACHE_TTL = Config(
+  key="listing_cache_ttl",
+  default=30,
+  type=int,
+  help=_('Number of seconds the listing of a directory is kept in memory for paging, sorting and filtering it. '
+         'The listing is refreshed sooner when the modification time of the directory changes. 0 disables the cache.'))
+
+LISTING_CACHE_TTL_WITHOUT_MTIME = Config(
+  key="listing_cache_ttl_without_mtime",
+  default=5,
+  type=int,
+  help=_('Number of seconds the listing of a directory without a modification time, like on S3 or ABFS, is kept in '
+         'memory. Changes made outside of the File Browser are only seen once it expires. 0 disables the cache for them.'))
+
+LISTING_CACHE_MAX_FILES = Config(
+  key="listing_cache_max_files",
+  default=1000000,
+  type=int,
+  help=_('Maximum number of files and directories of all the cached directory listings.'))
+
 def get_desktop_enable_download():
   """Get desktop enable_download default"""
   return ENABLE_DOWNLOAD.get()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Reads the window of a file displayed by the File Browser with ranged reads.
+
+Compressed files are decompressed chunk by chunk until the end of the window. Avro files are paged by byte like
+the splits of Hadoop: a page shows the blocks starting in its range. Parquet files are paged by row: only the footer
+and the pages of the row groups of the displayed rows are read.
+"""
+from builtins import object
+import json
+import logging
+import os
+import struct
+import zlib
+
+from avro import datafile, io as avro_io
+
+
+LOG = logging.getLogger()
+
+READ_BUFFER_SIZE = 64 * 1024
+PARQUET_BATCH_ROWS = 100
+PARQUET_PAGE_ROWS = 100
+SNAPPY_FRAMED_HEADER = b'\xff\x06\x00\x00sNaPpY'
+# The SnappyCodec compresses blocks of io.compression.codec.snappy.buffersize, 256 KB by default
+HADOOP_SNAPPY_MAX_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class RangeReader(object):
+  """
+  Read only file object over an open file of a filesystem, which reads ranges of at least buffer_size bytes.
+
+  Each read of a remote file is a request, the small reads of the Avro and Parquet readers are served from the
+  current range instead. The total number of bytes fetched is in bytes_read.
+  """
+
+  def __init__(self, fhandle, size, buffer_size=READ_BUFFER_SIZE):
+    self.size = size
+    self.bytes_read = 0
+    self.closed = False
+    self._fhandle = fhandle
+    self._buffer_size = buffer_size
+    self._buffer = b''
+    self._buffer_offset = 0
+    self._position = 0
+
+  def seek(self, offset, whence=os.SEEK_SET):
+    if whence == os.SEEK_CUR:
+      offset += self._position
+    elif whence == os.SEEK_END:
+      offset += self.size
+    self._position = max(offset, 0)
+    return self._position
+
+  def tell(self):
+    return self._position
+
+  def read(self, length=-1):
+    if length is None or length < 0:
+      length = self.size - self._position
+    length = max(min(length, self.size - self._position), 0)
+
+    start = self._position - self._buffer_offset
+    if start < 0 or start + length > len(self._buffer):
+      self._fill(max(length, self._buffer_size))
+      start = 0
+
+    data = self._buffer[start:start + length]
+    self._position += len(data)
+    return data
+
+  def readable(self):
+    return True
+
+  def seekable(self):
+    return True
+
+  def writable(self):
+    return False
+
+  def close(self):
+    # The file handle belongs to the caller
+    self.closed = True
+
+  def _fill(self, length):
+    remaining = min(length, self.size - self._position)
+    chunks = []
+
+    self._fhandle.seek(self._position)
+    while remaining > 0:
+      chunk = self._fhandle.read(remaining)
+      if not chunk:
+        break
+      chunks.append(chunk)
+      remaining -= len(chunk)
+
+    self._buffer = b''.join(chunks)
+    self._buffer_offset = self._position
+    self.bytes_read += len(self._buffer)
+
+
+class HadoopSnappyDecompressor(object):
+  """
+  Decompresses the format of the SnappyCodec of Hadoop: blocks made of their uncompressed length followed by
+  compressed chunks made of their length and data. Lengths are 4 bytes big endian integers.
+  """
+
+  unused_data = b''
+
+  def __init__(self):
+    self._buffer = b''
+    self._remaining = 0  # Uncompressed bytes left in the current block
+
+  def decompress(self, data):
+    import snappy
+
+    self._buffer += data
+    output = []
+
+    while len(self._buffer) >= 4:
+      length = struct.unpack('>I', self._buffer[:4])[0]
+      if self._remaining <= 0:
+        self._remaining = length
+        self._buffer = self._buffer[4:]
+        continue
+      if len(self._buffer) < 4 + length:
+        break
+
+      chunk = snappy.uncompress(self._buffer[4:4 + length])
+      self._buffer = self._buffer[4 + length:]
+      self._remaining -= len(chunk)
+      output.append(chunk)
+
+    return b''.join(output)
+
+
+def read_decompressed(fhandle, new_decompressor, offset=0, length=READ_BUFFER_SIZE, chunk_size=READ_BUFFER_SIZE):
+  """
+  Returns length bytes of the decompressed contents of the file from offset. The file is read chunk by chunk until the
+  end of this window. Concatenated streams, e.g. the members of a gzip file, are decompressed one after the other.
+  """
+  decompressor = new_decompressor()
+  window = []
+  position = 0
+  end = offset + length
+
+  while position < end:
+    data = fhandle.read(chunk_size)
+    if not data:
+      break
+
+    while data and position < end:
+      if getattr(decompressor, 'eof', False):
+        decompressor = new_decompressor()
+      decompressed = decompressor.decompress(data)
+      data = getattr(decompressor, 'unused_data', b'')
+
+      if position + len(decompressed) > offset:
+        window.append(decompressed[max(offset - position, 0):end - position])
+      position += len(decompressed)
+
+  return b''.join(window)
+
+
+def gzip_decompressor():
+  return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def get_snappy_decompressor(fhandle, size):
+  """
+  Returns the decompressor class of the streamable Snappy formats, or None for a file compressed as a whole.
+  Leaves the file at its beginning.
+  """
+  import snappy
+
+  fhandle.seek(0)
+  header = fhandle.read(len(SNAPPY_FRAMED_HEADER))
+  decompressor = None
+
+  if header == SNAPPY_FRAMED_HEADER:
+    decompressor = snappy.StreamDecompressor
+  elif len(header) >= 8:
+    uncompressed_length, compressed_length = struct.unpack('>II', header[:8])
+    # Probes at most one block, whatever the file is
+    if 0 < uncompressed_length <= HADOOP_SNAPPY_MAX_BLOCK_SIZE and 0 < compressed_length <= min(size - 8, HADOOP_SNAPPY_MAX_BLOCK_SIZE):
+      fhandle.seek(8)
+      if snappy.isValidCompressed(fhandle.read(compressed_length)):
+        decompressor = HadoopSnappyDecompressor
+
+  fhandle.seek(0)
+  return decompressor
+
+
+def is_snappy_length(header, size):
+  """
+  Whether a file of this size starting with these bytes could be compressed as a whole by Snappy: its uncompressed
+  length is encoded first as a varint, and Snappy expands data by at most a sixth.
+  """
+  length = 0
+  for index, byte in enumerate(bytearray(header[:5])):
+    length |= (byte & 0x7f) << (7 * index)
+    if byte < 0x80:
+      return size <= 32 + length + length // 6
+  return False
+
+
+def read_avro(fhandle, size, offset=0, length=READ_BUFFER_SIZE):
+  """
+  Returns the records of the Avro blocks starting between offset and offset + length, one per line.
+
+  A block starts after a sync marker, the first one after the marker ending the header: only the header and these
+  blocks are read.
+  """
+  reader = RangeReader(fhandle, size)
+  data_file_reader = datafile.DataFileReader(reader, avro_io.DatumReader())
+  sync_marker = data_file_reader.sync_marker
+  end = offset + length
+
+  block_start = _find(reader, sync_marker, max(offset - len(sync_marker), 0), end)
+  if block_start is None:
+    return ''
+  reader.seek(block_start)
+
+  contents_list = []
+  while not (contents_list and data_file_reader.block_count == 0 and reader.tell() + len(sync_marker) >= end):
+    try:
+      datum = next(data_file_reader)
+    except StopIteration:
+      break
+    contents_list.append(str(datum) + "\n")
+
+  LOG.debug('Read %d bytes of Avro file for the range %d-%d' % (reader.bytes_read, offset, end))
+  return ''.join(contents_list)
+
+
+def parquet_installed():
+  try:
+    import pyarrow.parquet
+    return True
+  except ImportError:
+    return False
+  except:
+    LOG.exception('failed to verify if pyarrow is installed')
+    return False
+
+
+def read_parquet(fhandle, size, offset=0, length=PARQUET_PAGE_ROWS, columns=None):
+  """
+  Returns the length rows of the Parquet file from the row number offset as JSON lines, and the number of rows of the
+  file. Only the footer and the pages of the columns of the row groups of these rows are read.
+  """
+  import pyarrow
+  import pyarrow.parquet
+
+  reader = RangeReader(fhandle, size)
+  parquet_file = pyarrow.parquet.ParquetFile(pyarrow.PythonFile(reader, mode='r'), buffer_size=READ_BUFFER_SIZE)
+  metadata = parquet_file.metadata
+  end = offset + length
+
+  lines = []
+  row = 0  # First row of the row group
+
+  for index in range(metadata.num_row_groups):
+    num_rows = metadata.row_group(index).num_rows
+
+    if offset < row + num_rows and row < end:
+      batch_row = row
+      batches = parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, row_groups=[index], columns=columns, use_threads=False)
+      for batch in batches:
+        if offset < batch_row + batch.num_rows:
+          for values in batch.to_pylist()[max(offset - batch_row, 0):end - batch_row]:
+            lines.append(json.dumps(values, default=str) + '\n')
+        batch_row += batch.num_rows
+        if batch_row >= end:
+          break
+
+    row += num_rows
+
+  LOG.debug('Read %d bytes of Parquet file for the rows %d-%d' % (reader.bytes_read, offset, offset + len(lines)))
+  return ''.join(lines), metadata.num_rows
+
+
+def _find(reader, marker, start, end):
+  """
+  Returns the position right after the first marker found from start, if it is before end.
+  """
+  reader.seek(start)
+  position = start  # Of data
+  data = b''
+
+  while position + len(marker) < end:
+    chunk = reader.read(READ_BUFFER_SIZE)
+    if not chunk:
+      return None
+    data += chunk
+
+    index = data.find(marker)
+    if index != -1:
+      marker_end = position + index + len(marker)
+      return marker_end if marker_end < end else None
+
+    position += len(data) - len(marker) + 1
+    data = data[-len(marker) + 1:]
+
+  return None
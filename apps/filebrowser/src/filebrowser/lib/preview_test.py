@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from builtins import range
+import bz2
+import gzip
+import io
+import json
+import struct
+
+from avro import datafile, io as avro_io, schema
+from nose.plugins.skip import SkipTest
+from nose.tools import assert_equal, assert_true
+
+from filebrowser.lib.preview import RangeReader, HadoopSnappyDecompressor, get_snappy_decompressor, gzip_decompressor, \
+    is_snappy_length, parquet_installed, read_avro, read_decompressed, read_parquet
+
+
+LINES = b''.join([b'line %05d\n' % i for i in range(10000)])
+
+
+class MockFile(io.BytesIO):
+
+  def __init__(self, data):
+    io.BytesIO.__init__(self, data)
+    self.reads = []
+
+  def read(self, length=-1):
+    data = io.BytesIO.read(self, length)
+    self.reads.append(len(data))
+    return data
+
+
+def test_range_reader():
+  fhandle = MockFile(LINES)
+  reader = RangeReader(fhandle, len(LINES), buffer_size=1000)
+
+  assert_equal(b'line 00000\n', reader.read(11))
+  assert_equal(b'line 00001\n', reader.read(11))
+  reader.seek(-11, 2)
+  assert_equal(b'line 09999\n', reader.read())
+  assert_equal(b'', reader.read(10))
+
+  assert_equal([1000, 11], fhandle.reads)
+  assert_equal(1011, reader.bytes_read)
+
+
+def test_read_decompressed_gzip():
+  data = gzip.compress(LINES[:55000]) + gzip.compress(LINES[55000:])
+  fhandle = MockFile(data)
+
+  assert_equal(LINES[:1000], read_decompressed(fhandle, gzip_decompressor, 0, 1000, chunk_size=100))
+  assert_true(sum(fhandle.reads) < len(data), fhandle.reads)
+
+  # Window over the two members of the file
+  assert_equal(LINES[54990:55010], read_decompressed(MockFile(data), gzip_decompressor, 54990, 20, chunk_size=100))
+  assert_equal(LINES[-10:], read_decompressed(MockFile(data), gzip_decompressor, len(LINES) - 10, 100))
+
+
+def test_read_decompressed_bz2():
+  data = bz2.compress(LINES)
+
+  assert_equal(LINES[5000:6000], read_decompressed(MockFile(data), bz2.BZ2Decompressor, 5000, 1000))
+
+
+def test_read_decompressed_hadoop_snappy():
+  try:
+    import snappy
+  except ImportError:
+    raise SkipTest
+
+  data = b''
+  for start in range(0, len(LINES), 40000):
+    block = LINES[start:start + 40000]
+    chunks = [snappy.compress(block[i:i + 10000]) for i in range(0, len(block), 10000)]
+    data += struct.pack('>I', len(block)) + b''.join([struct.pack('>I', len(chunk)) + chunk for chunk in chunks])
+  fhandle = MockFile(data)
+
+  assert_equal(HadoopSnappyDecompressor, get_snappy_decompressor(fhandle, len(data)))
+  assert_equal(LINES[39990:40010], read_decompressed(fhandle, HadoopSnappyDecompressor, 39990, 20, chunk_size=1000))
+  assert_equal(None, get_snappy_decompressor(MockFile(snappy.compress(LINES)), len(data)))
+
+  # Header of a huge block: not probed
+  fhandle = MockFile(struct.pack('>II', 2 ** 30, 2 ** 30) + b'x' * 10000)
+  assert_equal(None, get_snappy_decompressor(fhandle, 2 ** 31))
+  assert_true(sum(fhandle.reads) <= 10, fhandle.reads)
+
+
+def test_is_snappy_length():
+  try:
+    import snappy
+  except ImportError:
+    raise SkipTest
+
+  data = snappy.compress(LINES)
+  assert_true(is_snappy_length(data[:5], len(data)))
+  assert_true(not is_snappy_length(LINES[:5], len(LINES)))
+
+
+def test_read_avro():
+  test_schema = schema.Parse("""
+    {
+      "name": "test",
+      "type": "record",
+      "fields": [
+        { "name": "id", "type": "int" },
+        { "name": "comment", "type": "string" }
+      ]
+    }
+  """)
+  fhandle = io.BytesIO()
+  writer = datafile.DataFileWriter(fhandle, avro_io.DatumWriter(), test_schema)
+  for i in range(3000):
+    writer.append({'id': i, 'comment': 'x' * 200})
+  writer.flush()
+  data = fhandle.getvalue()
+
+  pages = [read_avro(MockFile(data), len(data), offset, 16384) for offset in range(0, len(data), 16384)]
+
+  assert_true(pages[0].startswith("{'id': 0, "), pages[0][:100])
+  assert_equal(list(range(3000)), [eval(line)['id'] for line in ''.join(pages).splitlines()])
+
+  fhandle = MockFile(data)
+  assert_equal(pages[-1], read_avro(fhandle, len(data), len(pages) * 16384 - 16384, 16384))
+  assert_true(sum(fhandle.reads) < len(data) / 2, fhandle.reads)
+
+
+def test_read_parquet():
+  if not parquet_installed():
+    raise SkipTest
+  import pyarrow
+  import pyarrow.parquet
+
+  fhandle = io.BytesIO()
+  table = pyarrow.table({'id': list(range(100000)), 'name': ['name %d' % i for i in range(100000)]})
+  pyarrow.parquet.write_table(table, fhandle, row_group_size=10000)
+  data = fhandle.getvalue()
+
+  fhandle = MockFile(data)
+  contents, num_rows = read_parquet(fhandle, len(data), 25000, 2)
+
+  assert_equal(100000, num_rows)
+  assert_equal(
+    [{'id': 25000, 'name': 'name 25000'}, {'id': 25001, 'name': 'name 25001'}],
+    [json.loads(line) for line in contents.splitlines()]
+  )
+  assert_true(sum(fhandle.reads) < len(data) / 5, (sum(fhandle.reads), len(data)))
+
+  # Pages over two row groups
+  contents = read_parquet(MockFile(data), len(data), 9950, 100)[0]
+  assert_equal(list(range(9950, 10050)), [json.loads(line)['id'] for line in contents.splitlines()])
+
+  contents = read_parquet(MockFile(data), len(data), 99999, 100)[0]
+  assert_equal([{'id': 99999, 'name': 'name 99999'}], [json.loads(line) for line in contents.splitlines()])
+  assert_equal('', read_parquet(MockFile(data), len(data), 100000, 100)[0])
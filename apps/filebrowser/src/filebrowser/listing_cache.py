@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process wide cache of the directory listings of the File Browser.
+
+The stats of a directory are listed once per user and kept for LISTING_CACHE_TTL seconds, so that the next pages,
+sort orders and filters of the directory are answered from memory. A listing is dropped sooner when the modification
+time of the directory changes or when the File Browser modifies it. The directories without a modification time, like
+on S3 or ABFS, are only kept for LISTING_CACHE_TTL_WITHOUT_MTIME seconds. The sorted views of a listing are computed on
+first use.
+"""
+
+from builtins import object
+import logging
+import operator
+import posixpath
+import threading
+import time
+
+from collections import OrderedDict
+
+from filebrowser.conf import LISTING_CACHE_TTL, LISTING_CACHE_TTL_WITHOUT_MTIME, LISTING_CACHE_MAX_FILES
+
+
+LOG = logging.getLogger()
+
+SORT_ATTRIBUTES = ('type', 'name', 'atime', 'mtime', 'user', 'group', 'size')
+
+
+class Listing(object):
+  """
+  Stats of a directory and their sorted views. The stats are never modified once listed.
+  """
+
+  def __init__(self, stats, mtime=None, ttl=0):
+    self.stats = stats
+    self.mtime = mtime
+    self.expiration = time.time() + ttl
+    self._views = {}
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return len(self.stats)
+
+  def get_view(self, sortby=None, descending=False, filter_str=None):
+    """
+    Returns the stats sorted by the attribute and matching the name filter, like a fresh listing would be.
+    """
+    if sortby in SORT_ATTRIBUTES:
+      key = (sortby, bool(descending))
+      with self._lock:
+        if key not in self._views:
+          self._views[key] = sorted(self.stats, key=operator.attrgetter(sortby), reverse=bool(descending))
+        view = self._views[key]
+    else:
+      view = self.stats
+
+    if filter_str:
+      view = [stats for stats in view if filter_str in stats['name']]
+
+    return view
+
+
+class ListingCache(object):
+
+  def __init__(self, max_files=None):
+    self._max_files = max_files
+    self._entries = OrderedDict()  # (username, path) -> Listing
+    self._files = 0
+    self._lock = threading.Lock()
+
+  def get(self, fs, path, username, mtime=None, do_as=None):
+    """
+    Returns the cached listing of the directory for this user if the directory did not change, or lists it again.
+    """
+    ttl = LISTING_CACHE_TTL.get()
+    if not mtime:
+      ttl = min(ttl, LISTING_CACHE_TTL_WITHOUT_MTIME.get())
+    if ttl <= 0:
+      return Listing(_do_as(fs, do_as, fs.listdir_stats, path), mtime)
+
+    key = (do_as or username, path)
+
+    with self._lock:
+      listing = self._entries.get(key)
+      if listing is not None:
+        if listing.expiration > time.time() and (not mtime or listing.mtime == mtime):
+          self._entries[key] = self._entries.pop(key)
+          return listing
+        self._pop(key)
+
+    listing = Listing(_do_as(fs, do_as, _listdir_stats_batches, fs, path), mtime, ttl)
+
+    with self._lock:
+      self._set(key, listing)
+
+    return listing
+
+  def invalidate(self, *paths):
+    """
+    Drops the listings of the directories of these paths, of their parent directories and of all the directories under
+    them, e.g. after a recursive chmod or delete.
+    """
+    directories = set()
+    prefixes = []
+    for path in paths:
+      if path:
+        path = path.rstrip('/') or path
+        directories.update([path, posixpath.dirname(path)])
+        prefixes.append(path if path.endswith('/') else path + '/')
+    prefixes = tuple(prefixes)
+
+    with self._lock:
+      for key in [key for key in self._entries
+                  if key[1] in directories or key[1].rstrip('/') in directories or key[1].startswith(prefixes)]:
+        self._pop(key)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._files = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+  def _set(self, key, listing):
+    max_files = self._max_files if self._max_files is not None else LISTING_CACHE_MAX_FILES.get()
+    if len(listing) > max_files:
+      return
+
+    if key in self._entries:
+      self._pop(key)
+    self._entries[key] = listing
+    self._files += len(listing)
+
+    while self._files > max_files:
+      self._pop(next(iter(self._entries)))
+
+  def _pop(self, key):
+    self._files -= len(self._entries.pop(key))
+
+
+def _listdir_stats_batches(fs, path):
+  stats = []
+  for batch in fs.listdir_stats_batches(path):
+    stats.extend(batch)
+  return stats
+
+
+def _do_as(fs, do_as, fn, *args):
+  if do_as:
+    return fs.do_as_user(do_as, fn, *args)
+  else:
+    return fn(*args)
+
+
+LISTING_CACHE = ListingCache()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from builtins import object
+
+from nose.tools import assert_equal, assert_false, assert_true
+
+from filebrowser.conf import LISTING_CACHE_TTL, LISTING_CACHE_TTL_WITHOUT_MTIME
+from filebrowser.listing_cache import ListingCache
+
+
+class MockStat(dict):
+
+  def __init__(self, name, size=0, mtime=0):
+    dict.__init__(self, name=name)
+    self.name = name
+    self.size = size
+    self.mtime = mtime
+
+  def __getattr__(self, key):
+    return self[key]
+
+
+class MockFs(object):
+
+  def __init__(self, batches):
+    self.batches = batches
+    self.listings = []
+    self.user = 'hue'
+
+  def listdir_stats_batches(self, path):
+    self.listings.append((self.user, path))
+    for batch in self.batches:
+      yield batch
+
+  def listdir_stats(self, path):
+    self.listings.append((self.user, path))
+    return [stats for batch in self.batches for stats in batch]
+
+  def do_as_user(self, username, fn, *args):
+    prev, self.user = self.user, username
+    try:
+      return fn(*args)
+    finally:
+      self.user = prev
+
+
+class TestListingCache(object):
+
+  def setUp(self):
+    self.reset = LISTING_CACHE_TTL.set_for_testing(60)
+    self.fs = MockFs([
+      [MockStat('b.csv', size=3, mtime=20), MockStat('a.csv', size=1, mtime=30)],
+      [MockStat('c.txt', size=2, mtime=10)]
+    ])
+
+  def tearDown(self):
+    self.reset()
+
+  def test_get(self):
+    cache = ListingCache(max_files=100)
+
+    listing = cache.get(self.fs, '/data', 'test', mtime=1000)
+    assert_equal(['b.csv', 'a.csv', 'c.txt'], [stats.name for stats in listing.get_view()])
+
+    # Later pages, sort orders and filters of the directory
+    listing = cache.get(self.fs, '/data', 'test', mtime=1000)
+    assert_equal(['a.csv', 'b.csv', 'c.txt'], [stats.name for stats in listing.get_view('name')])
+    assert_equal(['b.csv', 'c.txt', 'a.csv'], [stats.name for stats in listing.get_view('size', descending=True)])
+    assert_equal(['c.txt', 'b.csv', 'a.csv'], [stats.name for stats in listing.get_view('mtime')])
+    assert_equal(['a.csv', 'b.csv'], [stats.name for stats in listing.get_view('name', filter_str='.csv')])
+    assert_equal(['b.csv', 'a.csv', 'c.txt'], [stats.name for stats in listing.get_view('unknown')])
+    assert_equal([('hue', '/data')], self.fs.listings)
+
+    # Other user, modified directory
+    cache.get(self.fs, '/data', 'other', mtime=1000, do_as='other')
+    cache.get(self.fs, '/data', 'test', mtime=2000)
+    assert_equal([('hue', '/data'), ('other', '/data'), ('hue', '/data')], self.fs.listings)
+
+  def test_get_disabled(self):
+    self.reset_ttl = LISTING_CACHE_TTL.set_for_testing(0)
+    try:
+      cache = ListingCache()
+      cache.get(self.fs, '/data', 'test')
+      cache.get(self.fs, '/data', 'test')
+
+      assert_equal(2, len(self.fs.listings))
+      assert_equal(0, len(cache))
+    finally:
+      self.reset_ttl()
+
+  def test_get_without_mtime(self):
+    cache = ListingCache(max_files=100)
+    cache.get(self.fs, '/data', 'test', mtime=1000)
+    cache.get(self.fs, '/data', 'test', mtime=1000)
+    assert_equal(1, len(self.fs.listings))
+
+    # S3 or ABFS directory: its changes are not known
+    reset = LISTING_CACHE_TTL_WITHOUT_MTIME.set_for_testing(0)
+    try:
+      cache.get(self.fs, '/bucket', 'test')
+      cache.get(self.fs, '/bucket', 'test')
+      assert_equal(3, len(self.fs.listings))
+      assert_equal(1, len(cache))
+    finally:
+      reset()
+
+  def test_invalidate(self):
+    cache = ListingCache(max_files=100)
+    cache.get(self.fs, '/data', 'test')
+    cache.get(self.fs, '/data/logs', 'test')
+    cache.get(self.fs, '/other', 'test')
+
+    cache.invalidate('/data/logs/2021.log')
+
+    assert_equal(2, len(cache))
+    cache.get(self.fs, '/data', 'test')
+    assert_equal(3, len(self.fs.listings))
+    cache.get(self.fs, '/data/logs', 'test')
+    assert_equal(4, len(self.fs.listings))
+
+    # The directories under the path are dropped too, e.g. after a recursive chmod
+    cache.get(self.fs, '/database', 'test')
+    cache.invalidate('/data/')
+    assert_equal(2, len(cache))
+    cache.get(self.fs, '/data/logs', 'test')
+    assert_equal(6, len(self.fs.listings))
+    cache.get(self.fs, '/database', 'test')
+    assert_equal(6, len(self.fs.listings))
+
+  def test_max_files(self):
+    cache = ListingCache(max_files=5)
+    cache.get(self.fs, '/data', 'test')
+    cache.get(self.fs, '/other', 'test')
+
+    assert_equal(1, len(cache))
+    assert_true(cache.get(self.fs, '/other', 'test'))
+    assert_equal(2, len(self.fs.listings))
+
+    cache = ListingCache(max_files=2)
+    cache.get(self.fs, '/data', 'test')
+    assert_false(len(cache))
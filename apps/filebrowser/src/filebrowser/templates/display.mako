@@ -117,7 +117,7 @@ ${ fb_components.menubar() }
     </div>
     <div class="span10">
       <div class="card card-small" style="margin-bottom: 5px">
-        <!-- ko if: $root.isViewing() && $root.file() && ($root.file().view.compression() === null || $root.file().view.compression() === "avro" || $root.file().view.compression() === "none") -->
+        <!-- ko if: $root.isViewing() && $root.file() && ($root.file().view.compression() === null || $root.file().view.compression() === "avro" || $root.file().view.compression() === "parquet" || $root.file().view.compression() === "none") -->
           <div class="pull-right" style="margin-right: 20px; margin-top: 14px;">
             <div class="form-inline pagination-input-form inline">
               <span>${_('Page')}</span>
@@ -193,7 +193,7 @@ ${ fb_components.menubar() }
     begin: ${view['offset'] + 1},
     end: ${view['end']},
     length: ${view['length']},
-    size: ${stats['size']},
+    size: ${view['size']},
     max_size: ${view['max_chunk_size']}
   });
 
@@ -224,6 +224,14 @@ ${ fb_components.menubar() }
 
   var getChunks = function (startPage, endPage, view) {
     var chunkSize = view.length / (endPage - startPage + 1);
+    if (view.compression === 'parquet') { // Paged by row, one per line
+      var rows = view.contents.match(/[^\n]*\n|[^\n]+$/g) || [];
+      var chunks = [];
+      for (var i = 0; i < rows.length; i += chunkSize) {
+        chunks.push(rows.slice(i, i + chunkSize).join(''));
+      }
+      return chunks;
+    }
     return view.contents.match(new RegExp('[\\s\\S]{1,' + chunkSize + '}', 'g'));
   }
 
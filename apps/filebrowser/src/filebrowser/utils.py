@@ -16,10 +16,15 @@
 import io
 import os
 import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 LOG = logging.getLogger()
 
-from filebrowser.conf import ARCHIVE_UPLOAD_TEMPDIR
+from filebrowser.conf import ARCHIVE_UPLOAD_TEMPDIR, UPLOAD_MAX_BUFFER_SIZE, UPLOAD_PART_PARALLELISM, UPLOAD_PART_RETRIES
 DEFAULT_WRITE_SIZE = 1024 * 1024 * 128
+UPLOAD_RETRY_BACKOFF_S = 1
 
 def calculate_total_size(uuid, totalparts):
   total = 0
@@ -34,6 +39,10 @@ def calculate_total_size(uuid, totalparts):
   return total
 
 def generate_chunks(uuid, totalparts, default_write_size=DEFAULT_WRITE_SIZE):
+  """
+  Yields the uploaded parts as (chunk, total) buffers of default_write_size bytes, total being the offset of the end
+  of the chunk. The chunks are not reused, so they can still be read after the next one is generated.
+  """
   fp = io.BytesIO()
   total = 0
   files = [os.path.join(ARCHIVE_UPLOAD_TEMPDIR.get(), f'{uuid}_{i}') for i in range(totalparts)]
@@ -50,15 +59,70 @@ def generate_chunks(uuid, totalparts, default_write_size=DEFAULT_WRITE_SIZE):
         if fp.tell() >= default_write_size:
           fp.seek(0)
           yield fp, total
-          fp.close()
           fp = io.BytesIO()
   # Yield any remaining data in the buffer
   if fp.tell() > 0:
     fp.seek(0)
     yield fp, total + fp.tell()
-    fp.close()
   # chances are the chunk is zero and we never yielded
   else:
     fp.close()
   for file_path in files:
     os.remove(file_path)
+
+
+def upload_parts(chunks, upload_part, part_size=DEFAULT_WRITE_SIZE, parallelism=None, max_buffer_size=None, retries=None,
+                 backoff=UPLOAD_RETRY_BACKOFF_S):
+  """
+  Sends the (chunk, total) parts of generate_chunks concurrently with upload_part(part_num, chunk, offset).
+
+  The next part is only read once there is room for it in max_buffer_size, so at most max_buffer_size // part_size
+  parts are in memory. A failed part is retried with an exponential backoff. Once a part fails for good no more parts
+  are sent, the parts in flight are waited for and the error is raised.
+  """
+  parallelism = max(parallelism or UPLOAD_PART_PARALLELISM.get(), 1)
+  max_buffer_size = max_buffer_size or UPLOAD_MAX_BUFFER_SIZE.get()
+  retries = retries if retries is not None else UPLOAD_PART_RETRIES.get()
+  max_parts = max(min(parallelism, max_buffer_size // part_size), 1)
+
+  pending = set()
+  failure = None
+
+  with ThreadPoolExecutor(max_workers=max_parts) as executor:
+    try:
+      for part_num, (chunk, total) in enumerate(chunks, 1):
+        size = len(chunk.getbuffer())
+        pending.add(executor.submit(_upload_part, upload_part, part_num, chunk, total - size, retries, backoff))
+
+        while len(pending) >= max_parts and failure is None:
+          done, pending = wait(pending, return_when=FIRST_COMPLETED)
+          failure = _first_failure(done)
+        if failure is not None:
+          break
+    finally:
+      done, pending = wait(pending)
+      failure = failure or _first_failure(done)
+
+  if failure is not None:
+    raise failure
+
+
+def _upload_part(upload_part, part_num, chunk, offset, retries, backoff):
+  try:
+    for attempt in range(retries + 1):
+      try:
+        chunk.seek(0)
+        return upload_part(part_num, chunk, offset)
+      except Exception as e:
+        if attempt == retries:
+          raise
+        LOG.warning(f'Retrying upload of part {part_num} in {backoff * 2 ** attempt}s after error: {e}')
+        time.sleep(backoff * 2 ** attempt)
+  finally:
+    chunk.close()
+
+
+def _first_failure(futures):
+  for future in futures:
+    if future.exception() is not None:
+      return future.exception()
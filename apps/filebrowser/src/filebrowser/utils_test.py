@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import threading
+import time
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from filebrowser.utils import upload_parts
+
+
+def _chunks(count, size=10, read=None):
+  for i in range(count):
+    if read is not None:
+      read.append(i)
+    yield io.BytesIO(b'%d' % i * size), (i + 1) * size
+
+
+class TestUploadParts(object):
+
+  def test_upload_parts(self):
+    uploaded = {}
+
+    def upload_part(part_num, chunk, offset):
+      uploaded[part_num] = (chunk.read(), offset)
+
+    upload_parts(_chunks(5), upload_part, part_size=10, parallelism=3, max_buffer_size=100, retries=0)
+
+    assert_equal(dict((i + 1, (b'%d' % i * 10, i * 10)) for i in range(5)), uploaded)
+
+  def test_upload_parts_buffer_budget(self):
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def upload_part(part_num, chunk, offset):
+      with lock:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+      time.sleep(0.01)
+      with lock:
+        in_flight[0] -= 1
+
+    upload_parts(_chunks(20), upload_part, part_size=10, parallelism=8, max_buffer_size=30, retries=0)
+
+    assert_true(in_flight[1] <= 3, in_flight)
+
+  def test_upload_parts_retry(self):
+    attempts = []
+
+    def upload_part(part_num, chunk, offset):
+      attempts.append(chunk.read())
+      if len(attempts) < 3:
+        raise Exception('Slow down')
+
+    upload_parts(_chunks(1), upload_part, part_size=10, parallelism=1, max_buffer_size=10, retries=2, backoff=0)
+
+    assert_equal([b'0' * 10] * 3, attempts)
+
+  def test_upload_parts_failure(self):
+    read = []
+
+    def upload_part(part_num, chunk, offset):
+      if part_num == 2:
+        raise Exception('Access denied')
+
+    assert_raises(Exception, upload_parts, _chunks(20, read=read), upload_part, part_size=10, parallelism=1, max_buffer_size=10,
+                  retries=1, backoff=0)
+    assert_true(len(read) < 20, read)
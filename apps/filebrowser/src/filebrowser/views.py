@@ -24,10 +24,10 @@ from django.core.files.uploadhandler import FileUploadHandler, StopUpload, StopF
 from hadoop.conf import UPLOAD_CHUNK_SIZE
 
 from builtins import object
+import bz2
 import errno
 import logging
 import mimetypes
-import operator
 import os
 import posixpath
 import re
@@ -35,7 +35,6 @@ import stat as stat_module
 import sys
 import urllib.request, urllib.error
 
-from bz2 import decompress
 from datetime import datetime
 
 from django.core.paginator import EmptyPage, Paginator, Page, InvalidPage
@@ -82,6 +81,9 @@ from filebrowser.conf import ENABLE_EXTRACT_UPLOADED_ARCHIVE, MAX_SNAPPY_DECOMPR
 from filebrowser.lib.archives import archive_factory
 from filebrowser.lib.rwx import filetype, rwx
 from filebrowser.lib import xxd
+from filebrowser.lib.preview import PARQUET_PAGE_ROWS, get_snappy_decompressor, gzip_decompressor, is_snappy_length,\
+    parquet_installed, read_avro, read_decompressed, read_parquet
+from filebrowser.listing_cache import LISTING_CACHE, SORT_ATTRIBUTES, Listing
 from filebrowser.forms import RenameForm, UploadFileForm, UploadArchiveForm, MkDirForm, EditorForm, TouchForm,\
     RenameFormSet, RmTreeFormSet, ChmodFormSet, ChownFormSet, CopyFormSet, RestoreFormSet,\
     TrashPurgeForm, SetReplicationFactorForm
@@ -98,8 +100,6 @@ if sys.version_info[0] > 2:
   from urllib.parse import unquote as urllib_unquote
   from urllib.parse import urlparse as lib_urlparse
   from builtins import str as new_str
-  from avro import datafile, io
-  from gzip import decompress as decompress_gzip
   from django.utils.translation import gettext as _
 else:
   from cStringIO import StringIO as string_io
@@ -108,8 +108,6 @@ else:
   from urlparse import urlparse as lib_urlparse
   new_str = unicode
   import parquet
-  from avro import datafile, io
-  from gzip import GzipFile
   from django.utils.translation import ugettext as _
 
 
@@ -461,6 +459,8 @@ def save_file(request):
     raise PopupException(_("The file could not be saved"), detail=e.message.splitlines()[0])
   except Exception as e:
     raise PopupException(_("The file could not be saved"), detail=e)
+  finally:
+    LISTING_CACHE.invalidate(path)
 
   request.path = reverse("filebrowser:filebrowser_views_edit", kwargs=dict(path=path))
   return edit(request, path, form)
@@ -585,29 +585,23 @@ def listdir_paged(request, path):
   breadcrumbs = parse_breadcrumbs(path)
   s3_listing_not_allowed = ''
 
+  # Include same dir always as first option to see stats of the current folder.
+  # Its modification time tells if the cached listing of the directory is still current.
+  current_stat = request.fs.stats(path)
+
   try:
-    if do_as:
-      all_stats = request.fs.do_as_user(do_as, request.fs.listdir_stats, path)
-    else:
-      all_stats = request.fs.listdir_stats(path)
+    listing = LISTING_CACHE.get(request.fs, path, request.user.username, mtime=current_stat.mtime, do_as=do_as)
   except S3ListAllBucketsException as e:
     s3_listing_not_allowed = str(e)
-    all_stats = []
+    listing = Listing([])
 
-  # Filter first
+  # Filter and sort the listing
   filter_str = request.GET.get('filter', None)
-  if filter_str:
-    filtered_stats = [sb for sb in all_stats if filter_str in sb['name']]
-    all_stats = filtered_stats
-
-  # Sort next
   sortby = request.GET.get('sortby', None)
   descending_param = request.GET.get('descending', None)
-  if sortby is not None:
-    if sortby not in ('type', 'name', 'atime', 'mtime', 'user', 'group', 'size'):
-      logger.info("Invalid sort attribute '%s' for listdir." % sortby)
-    else:
-      all_stats = sorted(all_stats, key=operator.attrgetter(sortby), reverse=coerce_bool(descending_param))
+  if sortby is not None and sortby not in SORT_ATTRIBUTES:
+    logger.info("Invalid sort attribute '%s' for listdir." % sortby)
+  all_stats = listing.get_view(sortby, coerce_bool(descending_param), filter_str)
 
   # Do pagination
   try:
@@ -620,8 +614,6 @@ def listdir_paged(request, path):
     page = None
     shown_stats = []
 
-  # Include same dir always as first option to see stats of the current folder.
-  current_stat = request.fs.stats(path)
   # The 'path' field would be absolute, but we want its basename to be
   # actually '.' for display purposes. Encode it since _massage_stats expects byte strings.
   current_stat.path = path
@@ -784,7 +776,8 @@ def display(request, path):
     if begin >= end:
       raise PopupException(_("First byte to display must be before last byte to display."))
   else:
-    length = int(request.GET.get("length", DEFAULT_CHUNK_SIZE_BYTES))
+    # Default length depends on the file format, see read_contents
+    length = int(request.GET["length"]) if request.GET.get("length") else None
     # Display first block by default.
     offset = int(request.GET.get("offset", 0))
 
@@ -795,16 +788,22 @@ def display(request, path):
     raise PopupException(_("Mode must be one of 'binary' or 'text'."))
   if offset < 0:
     raise PopupException(_("Offset may not be less than zero."))
-  if length < 0:
+  if length is not None and length < 0:
     raise PopupException(_("Length may not be less than zero."))
-  if length > MAX_CHUNK_SIZE_BYTES:
+  if length is not None and length > MAX_CHUNK_SIZE_BYTES:
     raise PopupException(_("Cannot request chunks greater than %(bytes)d bytes.") % {'bytes': MAX_CHUNK_SIZE_BYTES})
 
   # Do not decompress in binary mode.
   if mode == 'binary':
     compression = 'none'
     # Read out based on meta.
-  compression, offset, length, contents = read_contents(compression, path, request.fs, offset, length)
+  compression, offset, length, contents, size = read_contents(compression, path, request.fs, offset, length)
+
+  if compression == 'parquet':
+    # Parquet files are paged by row, one per line
+    end = offset + contents.count('\n')
+  else:
+    end = offset + len(contents)
 
   # Get contents as string for text mode, or at least try
   uni_contents = None
@@ -842,11 +841,11 @@ def display(request, path):
   data["view"] = {
       'offset': offset,
       'length': length,
-      'end': offset + len(contents),
+      'end': end,
       'dirname': dirname,
       'mode': mode,
       'compression': compression,
-      'size': stats.size,
+      'size': size,
       'max_chunk_size': str(MAX_CHUNK_SIZE_BYTES)
   }
   data["filename"] = os.path.basename(path)
@@ -881,8 +880,9 @@ def read_contents(codec_type, path, fs, offset, length):
      path - The path of the file to read.
      fs - The FileSystem instance to use to read.
      offset - Offset to seek to before read begins.
-     length - Amount of bytes to read after offset.
-     Returns: A tuple of codec_type, offset, length and contents read.
+     length - Amount of bytes to read after offset, DEFAULT_CHUNK_SIZE_BYTES if None.
+     Parquet files are read by row instead: offset is the first row and length the number of rows.
+     Returns: A tuple of codec_type, offset, length, contents read and size of the file in bytes, or in rows for Parquet.
   """
   contents = ''
   fhandle = None
@@ -911,10 +911,17 @@ def read_contents(codec_type, path, fs, offset, length):
         codec_type = 'snappy'
       elif snappy_installed() and stats.size <= MAX_SNAPPY_DECOMPRESSION_SIZE.get():
         fhandle.seek(0)
-        if detect_snappy(fhandle.read()):
-          codec_type = 'snappy'
+        # Only read the whole file if its uncompressed length could be the one of a Snappy file of this size
+        if is_snappy_length(fhandle.read(5), stats.size):
+          fhandle.seek(0)
+          if detect_snappy(fhandle.read()):
+            codec_type = 'snappy'
 
     fhandle.seek(0)
+    size = stats.size
+
+    if length is None:
+      length = PARQUET_PAGE_ROWS if codec_type == 'parquet' else DEFAULT_CHUNK_SIZE_BYTES
 
     if codec_type == 'gzip':
       contents = _read_gzip(fhandle, path, offset, length, stats)
@@ -923,7 +930,7 @@ def read_contents(codec_type, path, fs, offset, length):
     elif codec_type == 'avro':
       contents = _read_avro(fhandle, path, offset, length, stats)
     elif codec_type == 'parquet':
-      contents = _read_parquet(fhandle, path, offset, length, stats)
+      contents, size = _read_parquet(fhandle, path, offset, length, stats)
     elif codec_type == 'snappy':
       contents = _read_snappy(fhandle, path, offset, length, stats)
     else:
@@ -934,7 +941,7 @@ def read_contents(codec_type, path, fs, offset, length):
     if fhandle:
       fhandle.close()
 
-  return (codec_type, offset, length, contents)
+  return (codec_type, offset, length, contents, size)
 
 
 def _decompress_snappy(compressed_content):
@@ -949,6 +956,13 @@ def _read_snappy(fhandle, path, offset, length, stats):
   if not snappy_installed():
     raise PopupException(_('Failed to decompress snappy compressed file. Snappy is not installed.'))
 
+  decompressor = get_snappy_decompressor(fhandle, stats.size)
+  if decompressor is not None:
+    try:
+      return read_decompressed(fhandle, decompressor, offset, length)
+    except Exception as e:
+      raise PopupException(_('Failed to decompress snappy compressed file.'), detail=e)
+
   if stats.size > MAX_SNAPPY_DECOMPRESSION_SIZE.get():
     raise PopupException(_('Failed to decompress snappy compressed file. '
                            'File size is greater than allowed max snappy decompression size of %d.')
@@ -960,24 +974,7 @@ def _read_snappy(fhandle, path, offset, length, stats):
 def _read_avro(fhandle, path, offset, length, stats):
   contents = ''
   try:
-    fhandle.seek(offset)
-    data_file_reader = datafile.DataFileReader(fhandle, io.DatumReader())
-
-    try:
-      contents_list = []
-      read_start = fhandle.tell()
-      # Iterate over the entire sought file.
-      for datum in data_file_reader:
-        read_length = fhandle.tell() - read_start
-        if read_length > length and len(contents_list) > 0:
-          break
-        else:
-          datum_str = str(datum) + "\n"
-          contents_list.append(datum_str)
-    finally:
-      data_file_reader.close()
-
-    contents = "".join(contents_list)
+    contents = read_avro(fhandle, stats.size, offset, length)
   except Exception as e:
     logging.exception('Could not read avro file at "%s": %s' % (path, e))
     raise PopupException(_("Failed to read Avro file."))
@@ -985,14 +982,21 @@ def _read_avro(fhandle, path, offset, length, stats):
 
 
 def _read_parquet(fhandle, path, offset, length, stats):
+  if not parquet_installed() and sys.version_info[0] > 2:
+    raise PopupException(_('Failed to read Parquet file. Pyarrow is not installed.'))
+
   try:
-    size = 1 * 128 * 1024 * 1024  # Buffer file stream to 128 MB chunks
-    data = string_io(fhandle.read(size))
+    # The offset is the first row to display and the length the number of rows
+    if parquet_installed():
+      return read_parquet(fhandle, stats.size, offset, length)
+    else:
+      size = 1 * 128 * 1024 * 1024  # Buffer file stream to 128 MB chunks
+      data = string_io(fhandle.read(size))
 
-    dumped_data = string_io()
-    parquet._dump(data, ParquetOptions(limit=1000), out=dumped_data)
-    dumped_data.seek(offset)
-    return dumped_data.read()
+      dumped_data = string_io()
+      parquet._dump(data, ParquetOptions(limit=1000), out=dumped_data)
+      lines = dumped_data.getvalue().splitlines(True)
+      return ''.join(lines[offset:offset + length]), len(lines)
   except Exception as e:
     logging.exception('Could not read parquet file at "%s": %s' % (path, e))
     raise PopupException(_("Failed to read Parquet file."))
@@ -1003,10 +1007,7 @@ def _read_gzip(fhandle, path, offset, length, stats):
   if offset and offset != 0:
     raise PopupException(_("Offsets are not supported with Gzip compression."))
   try:
-    if sys.version_info[0] > 2:
-      contents = decompress_gzip(fhandle.read())
-    else:
-      contents = GzipFile('', 'r', 0, string_io(fhandle.read())).read(length)
+    contents = read_decompressed(fhandle, gzip_decompressor, offset, length)
   except Exception as e:
     logging.exception('Could not decompress file at "%s": %s' % (path, e))
     raise PopupException(_("Failed to decompress file."))
@@ -1016,7 +1017,7 @@ def _read_gzip(fhandle, path, offset, length, stats):
 def _read_bz2(fhandle, path, offset, length, stats):
   contents = ''
   try:
-    contents = decompress(fhandle.read(length))
+    contents = read_decompressed(fhandle, bz2.BZ2Decompressor, offset, length)
   except Exception as e:
     logging.exception('Could not decompress file at "%s": %s' % (path, e))
     raise PopupException(_("Failed to decompress file."))
@@ -1076,8 +1077,10 @@ def detect_snappy(contents):
 def detect_parquet(fhandle):
   """
   Detect parquet from magic header bytes.
-  Python 2 only currently.
+  Requires pyarrow with Python 3.
   """
+  if parquet_installed():
+    return fhandle.read(4) == b'PAR1'
   return False if sys.version_info[0] > 2 else parquet._check_header_magic_bytes(fhandle)
 
 
@@ -1251,6 +1254,10 @@ def generic_op(form_class, request, op, parameter_names, piggyback=None, templat
       except NotImplementedError as e:
         msg = _("Cannot perform operation.")
         raise PopupException(msg, detail=e)
+      finally:
+        LISTING_CACHE.invalidate(*[
+            value for arg in args for value in (list(arg.values()) if isinstance(arg, dict) else [arg]) if isinstance(value, str)
+        ])
 
       if next:
         logging.debug("Next: %s" % next)
@@ -1481,6 +1488,7 @@ def perform_upload(request, *args, **kwargs):
   upload_class = UPLOAD_CLASSES.get(scheme, LocalFineUploaderChunkedUpload)
   _fs = upload_class(request, **kwargs)
   _fs.upload()
+  LISTING_CACHE.invalidate(kwargs['dest'])
   if scheme == 'hdfs':
     result = _massage_stats(request, stat_absolute_path(_fs.filepath, request.fs.stats(_fs.filepath)))
   else:
@@ -1596,6 +1604,7 @@ def _upload_file(request):
 
     try:
       request.fs.upload(file=uploaded_file, path=dest, username=request.user.username)
+      LISTING_CACHE.invalidate(dest)
       response['status'] = 0
     except IOError as ex:
       already_exists = False
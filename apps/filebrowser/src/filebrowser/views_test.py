@@ -62,8 +62,9 @@ from hadoop.fs.webhdfs import WebHdfs
 from useradmin.models import User, Group
 
 from filebrowser.conf import ENABLE_EXTRACT_UPLOADED_ARCHIVE, MAX_SNAPPY_DECOMPRESSION_SIZE,\
-  REMOTE_STORAGE_HOME
+  REMOTE_STORAGE_HOME, LISTING_CACHE_TTL
 from filebrowser.lib.rwx import expand_mode
+from filebrowser.listing_cache import LISTING_CACHE
 from filebrowser.views import snappy_installed, _normalize_path
 
 if sys.version_info[0] > 2:
@@ -104,6 +105,10 @@ class TestFileBrowser():
     self.user = User.objects.get(username="test_filebrowser")
     grant_access(self.user.username, 'test_filebrowser', 'filebrowser')
     add_to_group(self.user.username, 'test_filebrowser')
+    self.reset = LISTING_CACHE_TTL.set_for_testing(0)
+
+  def tearDown(self):
+    self.reset()
 
   def test_listdir_paged(self):
 
@@ -266,6 +271,7 @@ class TestFileBrowserWithHadoop(object):
     self.cluster.fs.setuser('test')
     self.prefix = self.cluster.fs_prefix + '/filebrowser'
     self.cluster.fs.do_as_user('test', self.cluster.fs.create_home_dir, '/user/test')
+    LISTING_CACHE.clear()
 
   def tearDown(self):
     cleanup_tree(self.cluster, self.prefix)
@@ -27,6 +27,7 @@ from beeswax.models import QUERY_TYPES
 from beeswax.server import dbms
 from beeswax.server.dbms import HiveServer2Dbms, QueryServerException, QueryServerTimeoutException, \
   get_query_server_config as beeswax_query_server_config, get_query_server_config_via_connector
+from beeswax.server.metadata_cache import METADATA_CACHE
 
 from impala import conf
 from impala.impala_flags import get_hs2_http_port
@@ -201,6 +202,8 @@ class ImpalaDbms(HiveServer2Dbms):
         name=Cluster(self.client.user).get_app_config().get_hive_metastore_interpreters()[0]
       )
     )
+    # Compare with the current tables of the metastore
+    METADATA_CACHE.invalidate(beeswax_query_server.client.query_server['server_name'], database)
     return beeswax_query_server.get_tables(database=database)
 
 
@@ -34,8 +34,9 @@ import hadoop.yarn.node_manager_api as node_manager_api
 import hadoop.yarn.resource_manager_api as resource_manager_api
 import hadoop.yarn.spark_history_server_api as spark_history_server_api
 
-from jobbrowser.conf import SHARE_JOBS
+from jobbrowser.conf import SHARE_JOBS, YARN_APPS_SNAPSHOT_INTERVAL
 from jobbrowser.yarn_models import Application, YarnV2Job, Job as YarnJob, KilledJob as KilledYarnJob, Container, SparkJob
+from jobbrowser.yarn_snapshot import get_snapshot
 from desktop.auth.backend import is_admin
 
 if sys.version_info[0] > 2:
@@ -103,11 +104,16 @@ class YarnApi(JobBrowserApi):
       filters['finalStatus'] = state_filters[kwargs['state']]
     if kwargs.get('states'):
       filters['states'] = ','.join([states_filters[_s] for _s in kwargs['states']])
+    if kwargs.get('queue'):
+      filters['queue'] = kwargs['queue']
     if kwargs.get('limit'):
       filters['limit'] = kwargs['limit']
     if kwargs.get('time_value'):
       filters['startedTimeBegin'] = self._get_started_time_begin(kwargs.get('time_value'), kwargs.get('time_unit'))
 
+    if self.resource_manager_api and YARN_APPS_SNAPSHOT_INTERVAL.get() > 0:
+      return self._get_jobs_from_snapshot(user, filters, kwargs['text'])
+
     if self.resource_manager_api: # This happens when yarn is not configured, but we need jobbrowser for Impala
       json = self.resource_manager_api.apps(**filters)
     else:
@@ -129,6 +135,24 @@ class YarnApi(JobBrowserApi):
 
     return self.filter_jobs(user, jobs)
 
+  def _get_jobs_from_snapshot(self, user, filters, text):
+    if not SHARE_JOBS.get() and not is_admin(user):
+      if filters.get('user', user.username) != user.username:
+        return []
+      filters['user'] = user.username
+
+    apps = get_snapshot().search(
+        username=filters.get('user'),
+        final_status=filters.get('finalStatus'),
+        states=filters['states'].split(',') if filters.get('states') else None,
+        queue=filters.get('queue'),
+        started_time_begin=filters.get('startedTimeBegin'),
+        text=text,
+        limit=filters.get('limit')
+    )
+
+    return self.filter_jobs(user, [Application(app) for app in apps])
+
   def _get_started_time_begin(self, time_value, time_unit):
     if time_unit == 'hours':
       start_date = datetime.utcnow() - timedelta(hours=time_value)
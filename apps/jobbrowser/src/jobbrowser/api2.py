@@ -143,9 +143,11 @@ def logs(request):
   app_id = json.loads(request.POST.get('app_id'))
   app_type = json.loads(request.POST.get('type'))
   log_name = json.loads(request.POST.get('name'))
+  # Optional byte range of the YARN logs, e.g. from the 'end' of the previous range for following a running job
+  log_range = dict((key, int(json.loads(request.POST[key]))) for key in ('offset', 'length') if request.POST.get(key))
 
   response['logs'] = get_api(request.user, interface, cluster=cluster).logs(
-      app_id, app_type, log_name, json.loads(request.GET.get('is_embeddable', 'false').lower())
+      app_id, app_type, log_name, json.loads(request.GET.get('is_embeddable', 'false').lower()), **log_range
   )
   response['status'] = 0
 
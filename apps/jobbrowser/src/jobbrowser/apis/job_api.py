@@ -63,8 +63,8 @@ class JobApi(Api):
   def action(self, app_ids, operation):
     return self._get_api(app_ids).action(operation, app_ids)
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
-    return self._get_api(appid).logs(appid, app_type, log_name, is_embeddable)
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
+    return self._get_api(appid).logs(appid, app_type, log_name, is_embeddable, offset=offset, length=length)
 
   def profile(self, appid, app_type, app_property, app_filters):
     return self._get_api(appid).profile(appid, app_type, app_property, app_filters)
@@ -227,13 +227,15 @@ class YarnApi(Api):
       return {}
 
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
     logs = ''
     logs_list = []
+    log_range = {}
+    offset = LOG_OFFSET_BYTES if offset is None else offset
     try:
       if app_type == 'YarnV2' or app_type == 'MAPREDUCE':
         if log_name == 'default':
-          response = job_single_logs(MockDjangoRequest(self.user), job=appid)
+          response = job_single_logs(MockDjangoRequest(self.user), job=appid, offset=offset)
           parseResponse = json.loads(response.content)
           logs = parseResponse.get('logs')
           logs_list = parseResponse.get('logsList')
@@ -243,16 +245,24 @@ class YarnApi(Api):
             else:
               logs = logs[1]
         else:
-          response = job_attempt_logs_json(MockDjangoRequest(self.user), job=appid, name=log_name, is_embeddable=is_embeddable)
-          logs = json.loads(response.content).get('log')
+          log_range = job_attempt_logs_json(
+              MockDjangoRequest(self.user, get={'format': 'python'}), job=appid, name=log_name, offset=offset, length=length,
+              is_embeddable=is_embeddable
+          )
+          logs = log_range.get('log')
       elif app_type == 'SPARK':
-        response = job_executor_logs(MockDjangoRequest(self.user), job=appid, name=log_name)
-        logs = json.loads(response.content).get('log')
+        response = job_executor_logs(
+            MockDjangoRequest(self.user, get={'format': 'python'}), job=appid, name=log_name, offset=offset, length=length
+        )
+        logs = response.get('log')
       else:
         logs = None
     except PopupException as e:
       LOG.warning('No task attempt found for logs: %s' % smart_str(e))
-    return {'logs': logs, 'logsList': logs_list}
+
+    response = {'logs': logs, 'logsList': logs_list}
+    response.update((key, value) for key, value in log_range.items() if key in ('offset', 'end', 'total'))
+    return response
 
 
   def profile(self, appid, app_type, app_property, app_filters):
@@ -320,14 +330,14 @@ class YarnAttemptApi(Api):
     return common
 
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
-    if log_name == 'default':
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
+    if log_name not in ('stdout', 'stderr', 'syslog'):
       log_name = 'stdout'
 
     task = NativeYarnApi(self.user).get_task(jobid=self.app_id, task_id=self.task_id).get_attempt(self.attempt_id)
-    stdout, stderr, syslog = task.get_task_log()
+    log_range = task.get_task_log_range(log_name, LOG_OFFSET_BYTES if offset is None else offset, length)
 
-    return {'progress': 0, 'logs': syslog if log_name == 'syslog' else stderr if log_name == 'stderr' else stdout}
+    return {'progress': 0, 'logs': log_range['log'], 'offset': log_range['offset'], 'end': log_range['end'], 'total': log_range['total']}
 
 
   def profile(self, appid, app_type, app_property, app_filters):
@@ -418,17 +428,21 @@ class YarnMapReduceTaskApi(Api):
     return common
 
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
     if log_name == 'default':
       log_name = 'stdout'
 
+    response = {'progress': 0, 'logs': ''}
     try:
-      response = job_attempt_logs_json(MockDjangoRequest(self.user), job=self.app_id, name=log_name, is_embeddable=is_embeddable)
-      logs = json.loads(response.content)['log']
+      log_range = job_attempt_logs_json(
+          MockDjangoRequest(self.user, get={'format': 'python'}), job=self.app_id, name=log_name,
+          offset=LOG_OFFSET_BYTES if offset is None else offset, length=length, is_embeddable=is_embeddable
+      )
+      response['logs'] = log_range.get('log', '')
+      response.update((key, value) for key, value in log_range.items() if key in ('offset', 'end', 'total'))
     except PopupException as e:
       LOG.warning('No task attempt found for default logs: %s' % e)
-      logs = ''
-    return {'progress': 0, 'logs': logs}
+    return response
 
 
   def profile(self, appid, app_type, app_property, app_filters):
@@ -496,14 +510,14 @@ class YarnMapReduceTaskAttemptApi(Api):
     return common
 
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
-    if log_name == 'default':
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
+    if log_name not in ('stdout', 'stderr', 'syslog'):
       log_name = 'stdout'
 
     task = NativeYarnApi(self.user).get_task(jobid=self.app_id, task_id=self.task_id).get_attempt(self.attempt_id)
-    stdout, stderr, syslog = task.get_task_log()
+    log_range = task.get_task_log_range(log_name, LOG_OFFSET_BYTES if offset is None else offset, length)
 
-    return {'progress': 0, 'logs': syslog if log_name == 'syslog' else stderr if log_name == 'stderr' else stdout}
+    return {'progress': 0, 'logs': log_range['log'], 'offset': log_range['offset'], 'end': log_range['end'], 'total': log_range['total']}
 
 
   def profile(self, appid, app_type, app_property, app_filters):
@@ -600,11 +614,19 @@ class SparkExecutorApi(Api):
        "logs": executor['logs']
     }
 
-  def logs(self, appid, app_type, log_name, is_embeddable=False):
-    log = ""
+  def logs(self, appid, app_type, log_name, is_embeddable=False, offset=None, length=None):
+    response = {
+       "logs": ""
+    }
 
     if self._executors and self._executors[0]:
-      log = self.history_server_api.download_executor_logs(self.user, self._executors[0], log_name, LOG_OFFSET_BYTES)
-    return {
-       "logs": log
-    }
+      log_range = self.history_server_api.retrieve_log_range(
+          self._executors[0]['logs'], log_name, self.user.username, LOG_OFFSET_BYTES if offset is None else offset, length
+      )
+      response = {
+         "logs": log_range['log'],
+         "offset": log_range['offset'],
+         "end": log_range['end'],
+         "total": log_range['total']
+      }
+    return response
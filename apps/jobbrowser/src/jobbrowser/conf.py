@@ -62,6 +62,22 @@ MAX_JOB_FETCH = Config(
   help=_('Maximum number of jobs to fetch and display when pagination is not supported for the type.')
 )
 
+YARN_APPS_SNAPSHOT_INTERVAL = Config(
+  key='yarn_apps_snapshot_interval',
+  default=10,
+  type=int,
+  help=_('Number of seconds between two refreshes of the snapshot of the YARN applications listed by the job browser. '
+       'Only the running applications and the ones finished since the previous refresh are fetched from the Resource Manager. '
+       'A value of 0 lists the applications from the Resource Manager at each request.')
+)
+
+YARN_APPS_SNAPSHOT_MAX_APPS = Config(
+  key='yarn_apps_snapshot_max_apps',
+  default=10000,
+  type=int,
+  help=_('Maximum number of YARN applications kept in the snapshot, the oldest ones being evicted first.')
+)
+
 # Deprecated
 ENABLE_QUERY_BROWSER = Config(
   key="enable_query_browser",
@@ -46,13 +46,18 @@ from jobbrowser import views
 from jobbrowser.api import get_api
 from jobbrowser.apis.query_api import QueryApi
 from jobbrowser.apis import job_api
-from jobbrowser.conf import SHARE_JOBS
+from jobbrowser.conf import SHARE_JOBS, YARN_APPS_SNAPSHOT_INTERVAL
 from jobbrowser.models import can_view_job, can_modify_job, LinkJobLogs
 from jobbrowser.yarn_models import SparkJob
 
 from datetime import datetime
 from babel import localtime
 
+if sys.version_info[0] > 2:
+  from unittest.mock import patch, Mock
+else:
+  from mock import patch, Mock
+
 
 LOG = logging.getLogger()
 _INITIALIZED = False
@@ -410,7 +415,8 @@ class TestMapReduce2NoHadoop(object):
 
     self.finish = [
         YARN_CLUSTERS['default'].SUBMIT_TO.set_for_testing(True),
-        SHARE_JOBS.set_for_testing(False)
+        SHARE_JOBS.set_for_testing(False),
+        YARN_APPS_SNAPSHOT_INTERVAL.set_for_testing(0)
     ]
     assert_true(cluster.is_yarn())
 
@@ -533,12 +539,14 @@ class TestResourceManagerHaNoHadoop(object):
     history_server_api.get_history_server_api = lambda username: HistoryServerHaApi(username)
 
     self.finish = []
+    self.reset_snapshot = YARN_APPS_SNAPSHOT_INTERVAL.set_for_testing(0)  # Tests the failover of the direct Resource Manager calls
 
   def tearDown(self):
     resource_manager_api.ResourceManagerApi = getattr(resource_manager_api, 'old_ResourceManagerApi')
     resource_manager_api.API_CACHE = None
     mapreduce_api.get_mapreduce_api = getattr(mapreduce_api, 'old_get_mapreduce_api')
     history_server_api.get_history_server_api = getattr(history_server_api, 'old_get_history_server_api')
+    self.reset_snapshot()
 
     for f in self.finish:
       f()
@@ -726,6 +734,23 @@ class TestSparkNoHadoop(object):
     assert_equal(response_log['logs']['logs'], 'dummy_logs')
 
 
+class TestYarnAttemptLogs(object):
+
+  def test_logs_default_to_the_tail(self):
+    user = Mock()
+    for api_class in (job_api.YarnAttemptApi, job_api.YarnMapReduceTaskAttemptApi):
+      with patch('jobbrowser.apis.job_api.NativeYarnApi') as NativeYarnApi:
+        attempt = NativeYarnApi.return_value.get_task.return_value.get_attempt.return_value
+        attempt.get_task_log_range.return_value = {'log': 'end', 'offset': 10, 'end': 13, 'total': 13}
+        api = api_class(user, 'attempt_1356251510842_0054_m_000000_0')
+
+        assert_equal('end', api.logs(None, None, 'syslog')['logs'])
+        attempt.get_task_log_range.assert_called_with('syslog', job_api.LOG_OFFSET_BYTES, None)
+
+        api.logs(None, None, 'syslog', offset=0, length=100)
+        attempt.get_task_log_range.assert_called_with('syslog', 0, 100)
+
+
 class MockYarnApi(object):
   def __init__(self, user, jt=None):
     self.user = user
@@ -1711,10 +1736,10 @@ class MockSparkHistoryApi(SparkHistoryServerApi):
 
     return EXECUTORS_LISTS[app_id] if app_id in EXECUTORS_LISTS else []
 
-  def download_executors_logs(self, request, job, name, offset):
+  def download_executors_logs(self, request, job, name, offset, length=None):
     return 'dummy_logs'
 
-  def download_executor_logs(self, user, executor, name, offset):
+  def download_executor_logs(self, user, executor, name, offset, length=None):
     return 'dummy_log'
 
   def get_executors_loglinks(self, job):
@@ -53,6 +53,8 @@ urlpatterns = [
   re_path(r'^jobs/(?P<job>\w+)/job_attempt_logs/(?P<attempt_index>\d+)$', jobbrowser_views.job_attempt_logs, name='job_attempt_logs'),
   re_path(r'^jobs/(?P<job>\w+)/job_attempt_logs_json/(?P<attempt_index>\d+)(?:/(?P<name>\w+))?(?:/(?P<offset>[\d-]+))?/?$',
   jobbrowser_views.job_attempt_logs_json, name='job_attempt_logs_json'),
+  re_path(r'^jobs/(?P<job>\w+)/job_attempt_logs_download/(?P<attempt_index>\d+)/(?P<name>\w+)$',
+  jobbrowser_views.job_attempt_logs_download, name='job_attempt_logs_download'),
   re_path(r'^jobs/(?P<jobid>\w+)/job_not_assigned/(?P<path>.+)$', jobbrowser_views.job_not_assigned, name='job_not_assigned'),
 
   # Unused
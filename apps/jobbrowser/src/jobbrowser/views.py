@@ -29,10 +29,9 @@ import time
 import urllib.request, urllib.error, urllib.parse
 import urllib.parse
 
-from lxml import html
 from urllib.parse import quote_plus
 
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.utils.functional import wraps
 from django.urls import reverse
 
@@ -42,12 +41,11 @@ from desktop.lib.exceptions import MessageException
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.json_utils import JSONEncoderForHTML
 from desktop.lib.rest.http_client import RestException
-from desktop.lib.rest.resource import Resource
 from desktop.log.access import access_log_level
 from desktop.views import register_status_bar_view
 
 from hadoop import cluster
-from hadoop.yarn.clients import get_log_client
+from hadoop.yarn.clients import get_log_range, iter_log
 from hadoop.yarn import resource_manager_api as resource_manager_api
 
 if sys.version_info[0] > 2:
@@ -129,7 +127,7 @@ def apps(request):
 
 
 def job_not_assigned(request, jobid, path):
-  if request.GET.get('format') == 'json':
+  if request.GET.get('format') in ('json', 'python'):
     result = {'status': -1, 'message': ''}
 
     try:
@@ -140,6 +138,8 @@ def job_not_assigned(request, jobid, path):
     except Exception as e:
       result['message'] = _('Error polling job %s: %s') % (jobid, e)
 
+    if request.GET.get('format') == 'python':
+      return result
     return JsonResponse(result, encoder=JSONEncoderForHTML)
   else:
     return render('job_not_assigned.mako', request, {'jobid': jobid, 'path': path})
@@ -342,18 +342,21 @@ def kill_job(request, job):
   raise Exception(_("Job did not appear as killed within 15 seconds."))
 
 @check_job_permission
-def job_executor_logs(request, job, attempt_index=0, name='syslog', offset=LOG_OFFSET_BYTES):
+def job_executor_logs(request, job, attempt_index=0, name='syslog', offset=LOG_OFFSET_BYTES, length=None):
   response = {'status': -1}
   try:
     log = ''
     if job.status not in ('NEW', 'SUBMITTED', 'ACCEPTED'):
-      log = job.history_server_api.download_executors_logs(request, job, name, offset)
+      log = job.history_server_api.download_executors_logs(request, job, name, offset, length=length)
     response['status'] = 0
     response['log'] = LinkJobLogs._make_hdfs_links(log)
   except Exception as e:
     response['log'] = _('Failed to retrieve executor log: %s' % e)
 
-  return JsonResponse(response)
+  if request.GET.get('format') == 'python':
+    return response
+  else:
+    return JsonResponse(response)
 
 
 @check_job_permission
@@ -365,11 +368,12 @@ def job_attempt_logs(request, job, attempt_index=0):
   })
 
 
-@check_job_permission
-def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=LOG_OFFSET_BYTES, is_embeddable=False):
-  """For async log retrieval as Yarn servers are very slow"""
+def _get_job_attempt_log_link(request, job, attempt_index=0):
+  """
+  Returns the container log link of the job attempt, or None and the reason when there is none.
+  """
   log_link = None
-  response = {'status': -1}
+  message = None
 
   try:
     jt = get_api(request.user, request.jt)
@@ -379,7 +383,7 @@ def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=L
       if app['finalStatus'] in ('SUCCEEDED', 'FAILED', 'KILLED'):
         attempt_index = int(attempt_index)
         if not job.job_attempts['jobAttempt']:
-          response = {'status': 0, 'log': _('Job has no tasks')}
+          message = _('Job has no tasks')
         else:
           attempt = job.job_attempts['jobAttempt'][attempt_index]
 
@@ -395,36 +399,52 @@ def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=L
   except Exception as e:
     raise Exception(_("Failed to get application for job %s: %s") % (job.jobId, e))
 
-  if log_link:
-    link = '/%s/' % name
-    params = {
-      'doAs': request.user.username
-    }
+  return log_link, message
 
-    if offset != 0:
-      params['start'] = offset
 
-    root = Resource(get_log_client(log_link), urllib.parse.urlsplit(log_link)[2], urlencode=False)
-    api_resp = None
+@check_job_permission
+def job_attempt_logs_json(request, job, attempt_index=0, name='syslog', offset=LOG_OFFSET_BYTES, is_embeddable=False, length=None):
+  """For async log retrieval as Yarn servers are very slow"""
+  response = {'status': -1}
 
+  log_link, message = _get_job_attempt_log_link(request, job, attempt_index)
+  if message:
+    response = {'status': 0, 'log': message}
+
+  if log_link:
     try:
-      api_resp = root.get(link, params=params)
-      log = html.fromstring(api_resp, parser=html.HTMLParser()).xpath('/html/body/table/tbody/tr/td[2]')[0].text_content()
+      log_range = get_log_range(log_link, name, request.user.username, offset, length or request.GET.get('length'))
 
+      response.update(log_range)
       response['status'] = 0
-      response['log'] = LinkJobLogs._make_hdfs_links(log, is_embeddable)
+      response['log'] = LinkJobLogs._make_hdfs_links(log_range['log'], is_embeddable)
     except Exception as e:
       response['log'] = _('Failed to retrieve log: %s' % e)
-      try:
-        debug_info = '\nLog Link: %s' % log_link
-        if api_resp:
-          debug_info += '\nHTML Response: %s' % response
-        response['debug'] = debug_info
-        LOG.error(debug_info)
-      except:
-        LOG.exception('failed to create debug info')
-
-  return JsonResponse(response)
+      response['debug'] = '\nLog Link: %s' % log_link
+      LOG.error(response['debug'])
+
+  if request.GET.get('format') == 'python':
+    return response
+  else:
+    return JsonResponse(response)
+
+
+@check_job_permission
+def job_attempt_logs_download(request, job, attempt_index=0, name='syslog'):
+  """
+  Streams the log of the job attempt window by window, from the byte offset of the request (default: the whole log).
+  """
+  log_link, message = _get_job_attempt_log_link(request, job, attempt_index)
+  if not log_link:
+    raise PopupException(message or _('No logs found for job %(id)s.') % {'id': job.jobId})
+
+  response = StreamingHttpResponse(
+      iter_log(log_link, name, request.user.username, request.GET.get('offset', 0), request.GET.get('length')),
+      content_type='text/plain; charset=utf-8'
+  )
+  response['Content-Disposition'] = 'attachment; filename="%s-%s.log"' % (job.jobId, name)
+
+  return response
 
 
 @check_job_permission
@@ -36,7 +36,7 @@ from desktop.lib.rest.resource import Resource
 from desktop.lib.view_util import big_filesizeformat, format_duration_in_millis
 
 from hadoop import cluster
-from hadoop.yarn.clients import get_log_client
+from hadoop.yarn.clients import get_log_client, get_log_range
 
 from jobbrowser.models import format_unixtime_ms
 
@@ -621,45 +621,34 @@ class Attempt(object):
     return [x and len(x) >= 2 and x[2].split('/')[-2] or '' for x in parsed_links]
 
   def get_task_log(self, offset=0):
-    logs = []
-
     log_link, user = self.get_log_link()
     if not log_link:
       return ['', '', '']
 
-    for name in ('stdout', 'stderr', 'syslog'):
-      link = '/%s/' % name
-      if self.type == 'Oozie Launcher' and not self.task.job.status == 'FINISHED': # Yarn currently dumps with 500 error with doas in running state
-        params = {}
-      else:
-        params = {
-          'doAs': user
-        }
+    return [self._get_log_range(log_link, user, name, offset)['log'] for name in ('stdout', 'stderr', 'syslog')]
 
-      if int(offset) != 0:
-        params['start'] = offset
-      else:
-        params['start'] = 0
+  def get_task_log_range(self, name, offset=0, length=None):
+    """
+    Byte range of the stdout, stderr or syslog of the attempt, see hadoop.yarn.clients.get_log_range().
+    """
+    log_link, user = self.get_log_link()
+    if not log_link:
+      return {'log': '', 'offset': 0, 'end': 0, 'total': 0}
 
-      response = None
-      try:
-        log_link = re.sub('job_[^/]+', str(self.id), log_link)
-        root = Resource(get_log_client(log_link), urllib.parse.urlsplit(log_link)[2], urlencode=False)
-        response = root.get(link, params=params)
-        log = html.fromstring(response, parser=html.HTMLParser()).xpath('/html/body/table/tbody/tr/td[2]')[0].text_content()
-      except Exception as e:
-        log = _('Failed to retrieve log: %s' % e)
-        try:
-          debug_info = '\nLog Link: %s' % log_link
-          if response:
-            debug_info += '\nHTML Response: %s' % response
-          LOG.error(debug_info)
-        except:
-          LOG.exception('failed to build debug info')
-
-      logs.append(log)
-
-    return logs + [''] * (3 - len(logs))
+    return self._get_log_range(log_link, user, name, offset, length)
+
+  def _get_log_range(self, log_link, user, name, offset=0, length=None):
+    # Yarn currently dumps with 500 error with doas in running state
+    if self.type == 'Oozie Launcher' and not self.task.job.status == 'FINISHED':
+      user = None
+
+    log_link = re.sub('job_[^/]+', str(self.id), log_link)
+
+    try:
+      return get_log_range(log_link, name, user, offset, length)
+    except Exception as e:
+      LOG.error('Failed to retrieve log %s from %s: %s' % (name, log_link, e))
+      return {'log': _('Failed to retrieve log: %s' % e), 'offset': int(offset), 'end': int(offset), 'total': None}
 
 class YarnV2Attempt(Attempt):
   def __init__(self, task, attrs):
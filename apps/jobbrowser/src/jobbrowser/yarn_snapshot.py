@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Snapshot of the YARN applications listed by the job browser.
+
+The applications of a cluster are listed once from the Resource Manager, then a background thread refreshes them
+every YARN_APPS_SNAPSHOT_INTERVAL seconds by only fetching the active applications and the ones finished since the
+previous refresh. The job browser polls are answered from the indexes of the snapshot by user, state, final status
+and queue. The background refresh stops when the job browser is not used for IDLE_TIMEOUT seconds.
+
+The applications are listed as the Hue service user, the permissions of the users are checked by the job browser.
+"""
+
+from builtins import object
+import logging
+import threading
+import time
+
+from collections import defaultdict
+
+from hadoop import cluster
+from hadoop.cluster import rm_ha
+from hadoop.yarn import resource_manager_api
+
+from jobbrowser.conf import YARN_APPS_SNAPSHOT_INTERVAL, YARN_APPS_SNAPSHOT_MAX_APPS
+
+
+LOG = logging.getLogger()
+
+ACTIVE_STATES = ('NEW', 'NEW_SAVING', 'SUBMITTED', 'ACCEPTED', 'RUNNING')
+FULL_REFRESH_INTERVAL = 10 * 60
+IDLE_TIMEOUT = 5 * 60
+FINISHED_TIME_OVERLAP_MS = 60 * 1000  # Margin for the clock skew between Hue and the Resource Manager
+
+SNAPSHOTS = {}
+SNAPSHOTS_LOCK = threading.Lock()
+
+
+class _Index(object):
+  """
+  Applications of a refresh and their indexes. Never modified, a refresh swaps it as a whole.
+  """
+
+  def __init__(self, apps):
+    self.apps = apps
+    self.order = sorted(apps, key=_app_id_key, reverse=True)  # Most recent first, like the job browser
+    self.by_user = defaultdict(set)
+    self.by_state = defaultdict(set)
+    self.by_final_status = defaultdict(set)
+    self.by_queue = defaultdict(set)
+    self.text = {}
+
+    for app_id, app in apps.items():
+      self.by_user[app.get('user')].add(app_id)
+      self.by_state[app.get('state')].add(app_id)
+      self.by_final_status[app.get('finalStatus')].add(app_id)
+      self.by_queue[app.get('queue')].add(app_id)
+      self.text[app_id] = '\n'.join([app.get(field) or '' for field in ('name', 'id', 'user', 'queue')]).lower()
+
+
+class YarnAppsSnapshot(object):
+
+  def __init__(self, rm_api):
+    self.user = None  # Used by rm_ha for failing over as the Hue service user
+    self.resource_manager_api = rm_api
+    self._index = None
+    self._last_refresh = 0
+    self._last_full_refresh = 0
+    self._last_access = 0
+    self._refresh_lock = threading.Lock()
+    self._thread_lock = threading.Lock()
+    self._thread = None
+
+  def search(self, username=None, final_status=None, states=None, queue=None, started_time_begin=None, text=None, limit=None):
+    """
+    Returns the applications matching the filters, most recent first, like the Resource Manager /apps API would.
+    """
+    index = self._get_index()
+
+    candidates = None
+    filters = [
+      index.by_user.get(username, set()) if username else None,
+      index.by_final_status.get(final_status, set()) if final_status else None,
+      set().union(*[index.by_state.get(state, set()) for state in states]) if states else None,
+      index.by_queue.get(queue, set()) if queue else None,
+    ]
+    for app_ids in sorted([app_ids for app_ids in filters if app_ids is not None], key=len):
+      candidates = app_ids if candidates is None else candidates & app_ids
+
+    text = text.lower() if text else None
+    apps = []
+
+    for app_id in index.order:
+      if candidates is not None and app_id not in candidates:
+        continue
+      app = index.apps[app_id]
+      if started_time_begin and (app.get('startedTime') or 0) < started_time_begin:
+        continue
+      if text and text not in index.text[app_id]:
+        continue
+      apps.append(app)
+      if limit and len(apps) >= limit:
+        break
+
+    return apps
+
+  def refresh(self, max_age=None):
+    """
+    Fetches the changes since the previous refresh, or all the applications the first time and every FULL_REFRESH_INTERVAL.
+    """
+    with self._refresh_lock:
+      now = time.time()
+      if max_age is not None and self._index is not None and now - self._last_refresh < max_age:
+        return  # Refreshed by a concurrent caller
+
+      max_apps = YARN_APPS_SNAPSHOT_MAX_APPS.get()
+
+      if self._index is None or now - self._last_full_refresh > FULL_REFRESH_INTERVAL:
+        apps = dict((app['id'], app) for app in self._apps(limit=max_apps))
+        self._last_full_refresh = now
+      else:
+        apps = dict(self._index.apps)
+        updated = self._apps(states=','.join(ACTIVE_STATES))
+        updated += self._apps(finishedTimeBegin=int(self._last_refresh * 1000) - FINISHED_TIME_OVERLAP_MS)
+        for app in updated:
+          apps[app['id']] = app
+
+        updated_ids = set(app['id'] for app in updated)
+        active_ids = set().union(*[self._index.by_state.get(state, set()) for state in ACTIVE_STATES])
+        if active_ids - updated_ids:
+          # Neither running nor recently finished, e.g. already removed from the Resource Manager
+          self._last_full_refresh = 0
+
+      if len(apps) > max_apps:
+        apps = dict((app_id, apps[app_id]) for app_id in sorted(apps, key=_app_id_key, reverse=True)[:max_apps])
+
+      self._index = _Index(apps)
+      self._last_refresh = now
+
+  def _get_index(self):
+    interval = YARN_APPS_SNAPSHOT_INTERVAL.get()
+    self._last_access = time.time()
+
+    if self._index is None or time.time() - self._last_refresh > 2 * interval:
+      self.refresh(max_age=interval)
+    self._start_refresh_thread()
+
+    return self._index
+
+  def _start_refresh_thread(self):
+    with self._thread_lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._thread = threading.Thread(target=self._refresh_periodically, name='YarnAppsSnapshot')
+        self._thread.daemon = True
+        self._thread.start()
+
+  def _refresh_periodically(self):
+    while time.time() - self._last_access < IDLE_TIMEOUT:
+      interval = YARN_APPS_SNAPSHOT_INTERVAL.get()
+      if interval <= 0:
+        break
+      time.sleep(interval)
+      try:
+        self.refresh(max_age=interval / 2.0)
+      except Exception as e:
+        LOG.warning('Failed to refresh the YARN applications snapshot: %s' % e)
+
+  @rm_ha
+  def _apps(self, **filters):
+    response = self.resource_manager_api.apps(**filters)
+    if type(response) == str and 'This is standby RM' in response:
+      raise Exception(response)
+    return (response.get('apps') or {}).get('app') or []
+
+
+def _app_id_key(app_id):
+  """
+  Orders the applications by submission: application_<cluster timestamp>_<sequence number>, the sequence number
+  being only padded to 4 digits.
+  """
+  parts = app_id.split('_')
+  try:
+    return (int(parts[-2]), int(parts[-1]), app_id)
+  except (IndexError, ValueError):
+    return (0, 0, app_id)
+
+
+def get_snapshot():
+  """
+  Snapshot of the current YARN cluster. The Resource Managers of a HA cluster share the snapshot if it has a logical name.
+  """
+  yarn_cluster = cluster.get_yarn()
+  key = yarn_cluster.LOGICAL_NAME.get() or yarn_cluster.RESOURCE_MANAGER_API_URL.get()
+
+  with SNAPSHOTS_LOCK:
+    if key not in SNAPSHOTS:
+      SNAPSHOTS[key] = YarnAppsSnapshot(resource_manager_api.ResourceManagerApi(
+          yarn_cluster.RESOURCE_MANAGER_API_URL.get(), yarn_cluster.SECURITY_ENABLED.get(), yarn_cluster.SSL_CERT_CA_VERIFY.get()
+      ))
+    return SNAPSHOTS[key]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from builtins import object
+
+from nose.tools import assert_equal, assert_true
+
+from jobbrowser.conf import YARN_APPS_SNAPSHOT_INTERVAL, YARN_APPS_SNAPSHOT_MAX_APPS
+from jobbrowser.yarn_snapshot import YarnAppsSnapshot
+
+
+def _app(seq, user='test', state='FINISHED', final_status='SUCCEEDED', queue='default', name='job', started=1000):
+  return {
+    'id': 'application_1428442704693_%04d' % seq,
+    'user': user,
+    'state': state,
+    'finalStatus': final_status,
+    'queue': queue,
+    'name': name,
+    'startedTime': started,
+    'url': 'localhost'
+  }
+
+
+class MockResourceManagerApi(object):
+
+  def __init__(self, apps):
+    self.apps_list = apps
+    self.calls = []
+    self.url = 'http://rm:8088'
+
+  def apps(self, **kwargs):
+    self.calls.append(kwargs)
+    apps = self.apps_list
+    if 'states' in kwargs:
+      apps = [app for app in apps if app['state'] in kwargs['states'].split(',')]
+    if 'finishedTimeBegin' in kwargs:
+      apps = [app for app in apps if app.get('finishedTime', 0) >= kwargs['finishedTimeBegin']]
+    if 'limit' in kwargs:
+      apps = apps[:kwargs['limit']]
+    return {'apps': {'app': apps} if apps else None}
+
+
+class TestYarnAppsSnapshot(object):
+
+  def setUp(self):
+    self.resets = [
+      YARN_APPS_SNAPSHOT_INTERVAL.set_for_testing(3600),  # Only refresh explicitly
+      YARN_APPS_SNAPSHOT_MAX_APPS.set_for_testing(100),
+    ]
+
+  def tearDown(self):
+    for reset in self.resets:
+      reset()
+
+  def test_search(self):
+    rm_api = MockResourceManagerApi([
+      _app(1, user='test', name='Daily ETL', started=1000),
+      _app(2, user='other', state='RUNNING', final_status='UNDEFINED', queue='root.etl', started=2000),
+      _app(3, user='test', state='FAILED', final_status='FAILED', started=3000),
+      _app(4, user='test', state='ACCEPTED', final_status='UNDEFINED', started=0),
+    ])
+    snapshot = YarnAppsSnapshot(rm_api)
+
+    def ids(apps):
+      return [int(app['id'][-4:]) for app in apps]
+
+    assert_equal([4, 3, 2, 1], ids(snapshot.search()))
+    assert_equal([4, 3, 1], ids(snapshot.search(username='test')))
+    assert_equal([3], ids(snapshot.search(username='test', final_status='FAILED')))
+    assert_equal([4, 2], ids(snapshot.search(states=['NEW', 'ACCEPTED', 'RUNNING'])))
+    assert_equal([2], ids(snapshot.search(queue='root.etl')))
+    assert_equal([1], ids(snapshot.search(text='etl', username='test')))
+    assert_equal([2, 1], ids(snapshot.search(text='ETL')))
+    assert_equal([3, 2], ids(snapshot.search(started_time_begin=1500)))
+    assert_equal([4, 3], ids(snapshot.search(limit=2)))
+    assert_equal([], ids(snapshot.search(username='nobody')))
+
+    assert_equal([{'limit': 100}], rm_api.calls)
+
+  def test_refresh(self):
+    running = _app(2, state='RUNNING', final_status='UNDEFINED')
+    rm_api = MockResourceManagerApi([_app(1), running])
+    snapshot = YarnAppsSnapshot(rm_api)
+    snapshot.search()
+
+    finished = dict(running, state='FINISHED', finalStatus='SUCCEEDED', finishedTime=2 ** 62)
+    rm_api.apps_list = [_app(1), finished, _app(3, state='RUNNING', final_status='UNDEFINED')]
+    rm_api.calls = []
+    snapshot.refresh()
+
+    assert_equal(2, len(rm_api.calls))
+    assert_equal('NEW,NEW_SAVING,SUBMITTED,ACCEPTED,RUNNING', rm_api.calls[0]['states'])
+    assert_true(rm_api.calls[1]['finishedTimeBegin'] > 0, rm_api.calls)
+    assert_equal(
+      [
+        ('application_1428442704693_0003', 'RUNNING'),
+        ('application_1428442704693_0002', 'FINISHED'),
+        ('application_1428442704693_0001', 'FINISHED')
+      ],
+      [(app['id'], app['state']) for app in snapshot.search()]
+    )
+
+    # The running application 3 is not listed anymore: all the applications are listed again
+    rm_api.apps_list = [_app(1)]
+    rm_api.calls = []
+    snapshot.refresh()
+    snapshot.refresh()
+
+    assert_equal([{'limit': 100}], rm_api.calls[2:])
+    assert_equal(['application_1428442704693_0001'], [app['id'] for app in snapshot.search()])
+
+  def test_max_apps(self):
+    self.resets.append(YARN_APPS_SNAPSHOT_MAX_APPS.set_for_testing(2))
+    rm_api = MockResourceManagerApi([_app(1), _app(2)])
+    snapshot = YarnAppsSnapshot(rm_api)
+    snapshot.search()
+
+    rm_api.apps_list = [_app(1), _app(2), _app(3, state='RUNNING', final_status='UNDEFINED')]
+    snapshot.refresh()
+
+    assert_equal(['application_1428442704693_0003', 'application_1428442704693_0002'], [app['id'] for app in snapshot.search()])
+
+  def test_order_past_9999(self):
+    self.resets.append(YARN_APPS_SNAPSHOT_MAX_APPS.set_for_testing(3))
+    rm_api = MockResourceManagerApi([_app(9998), _app(9999), _app(10000), _app(10001)])
+    snapshot = YarnAppsSnapshot(rm_api)
+    snapshot.search()
+
+    rm_api.apps_list.append(_app(10002, state='RUNNING', final_status='UNDEFINED'))
+    snapshot.refresh()
+
+    assert_equal(
+      ['application_1428442704693_10002', 'application_1428442704693_10000', 'application_1428442704693_9999'],
+      [app['id'] for app in snapshot.search()]
+    )
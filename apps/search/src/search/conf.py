@@ -43,10 +43,39 @@ SECURITY_ENABLED = Config(
 
 DOWNLOAD_LIMIT = Config(
   key="download_limit",
-  help=_("Default 1000 rows, max is 15K rows."),
+  help=_("Maximum number of rows of a CSV or Excel download of a facet or of a JSON download, -1 for no limit. "
+         "Default 1000 rows, max is 15K rows for JSON."),
   default=1000,
   type=int)
 
+STREAMING_DOWNLOAD_LIMIT = Config(
+  key="streaming_download_limit",
+  help=_("Maximum number of rows of a CSV or Excel download of the documents, which are streamed page by page from Solr. "
+         "-1 for no limit."),
+  default=1000000,
+  type=int)
+
+QUERY_CACHE_TTL = Config(
+  key="query_cache_ttl",
+  help=_("Number of seconds the responses of the dashboard queries are cached, so that identical dashboards refreshed by "
+         "several viewers only query Solr once. Rolling time windows are also refreshed at each gap of the window. "
+         "A value of 0 disables the cache."),
+  default=10,
+  type=int)
+
+QUERY_CACHE_MAX_ENTRIES = Config(
+  key="query_cache_max_entries",
+  help=_("Maximum number of dashboard responses cached, the least recently used ones being evicted first."),
+  default=500,
+  type=int)
+
+QUERY_CACHE_SHARED = Config(
+  key="query_cache_shared",
+  help=_("Share the cached dashboard responses between all the users instead of caching them per user. "
+         "Only enable when all the users are authorized to see the same documents."),
+  default=False,
+  type=coerce_bool)
+
 # Unused: deprecated by dashboard
 LATEST = Config(
   key="latest",
@@ -20,6 +20,7 @@ import logging
 from libsolr.api import SolrApi
 from indexer.solr_client import SolrClient
 from search.conf import SOLR_URL
+from search.query_cache import QUERY_CACHE
 
 from dashboard.dashboard_api import DashboardApi
 from dashboard.models import augment_solr_response
@@ -38,8 +39,15 @@ class SearchApi(DashboardApi):
     if facet:
       collection['template']['rows'] = 0
       collection['facets'] = [facet]
-    response = self.api.query(collection, query)
-    return augment_solr_response(response, collection, query)
+
+    def fetch():
+      response = self.api.query(collection, query)
+      return augment_solr_response(response, collection, query)
+
+    return QUERY_CACHE.get(fetch, self.user, collection, query)
+
+  def export_documents(self, collection, query, limit=None):
+    return self.api.export_documents(collection, query, limit=limit)
 
   def datasets(self, show_all=False, database=None): # True if non Solr Cloud
     client = SolrClient(user=self.user)
@@ -0,0 +1,31 @@
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from desktop.lib.metrics import global_registry
+
+query_cache_hits = global_registry().counter(
+    name='search.query-cache.hits',
+    label='Dashboard Query Cache Hits',
+    description='Number of dashboard queries answered from the query cache',
+    numerator='queries',
+)
+
+query_cache_misses = global_registry().counter(
+    name='search.query-cache.misses',
+    label='Dashboard Query Cache Misses',
+    description='Number of dashboard queries sent to Solr because they were not in the query cache',
+    numerator='queries',
+)
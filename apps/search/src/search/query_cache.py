@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process wide cache of the normalized responses of the dashboard queries.
+
+Entries are keyed by the canonicalized collection and query of the dashboard and by user (unless the cache is
+shared), and expire after QUERY_CACHE_TTL seconds. The borders of rolling time windows are recomputed from NOW
+at each query, so they are left out of the key and replaced by the current gap of the window: all the viewers
+of a dashboard share the same entry until the window moves by one gap. Concurrent misses of the same entry wait
+for a single Solr query.
+"""
+
+from builtins import object
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+
+from libsolr.api import GAPS
+
+from search.conf import QUERY_CACHE_TTL, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_SHARED
+from search.metrics import query_cache_hits, query_cache_misses
+
+
+LOG = logging.getLogger()
+
+UNIT_SECONDS = {
+  'SECONDS': 1,
+  'MINUTES': 60,
+  'HOURS': 60 * 60,
+  'DAYS': 24 * 60 * 60,
+  'MONTHS': 30 * 24 * 60 * 60,
+  'YEARS': 365 * 24 * 60 * 60,
+}
+VOLATILE_QUERY_KEYS = ('uuid', 'timezone')
+RANGE_BORDERS = ('start', 'end', 'min', 'max', 'gap')
+
+
+class _Call(object):
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.result = None
+    self.error = None
+
+
+class QueryCache(object):
+
+  def __init__(self, max_entries=None):
+    self._max_entries = max_entries
+    self._entries = OrderedDict()  # key -> (expiration, response)
+    self._calls = {}
+    self._lock = threading.Lock()
+
+  def get(self, fetch, user, collection, query):
+    """
+    Returns a copy of the cached response of fetch() for this dashboard state, or calls it once for all the concurrent callers.
+    """
+    ttl = QUERY_CACHE_TTL.get()
+    if ttl <= 0 or query.get('download'):
+      return fetch()
+
+    key = get_query_key(collection, query, None if QUERY_CACHE_SHARED.get() else user.username)
+
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        if entry[0] > time.time():
+          self._entries[key] = self._entries.pop(key)
+          query_cache_hits.inc()
+          return copy.deepcopy(entry[1])
+        del self._entries[key]
+
+      pending = self._calls.get(key)
+      if pending is None:
+        pending = self._calls[key] = _Call()
+        is_owner = True
+      else:
+        is_owner = False
+
+    if not is_owner:
+      pending.done.wait()
+      query_cache_hits.inc()
+      return self._result(pending)
+
+    query_cache_misses.inc()
+    try:
+      pending.result = fetch()
+    except Exception as e:
+      pending.error = e
+
+    with self._lock:
+      if self._calls.get(key) is pending:
+        del self._calls[key]
+        if pending.error is None:
+          self._set(key, (time.time() + ttl, pending.result))
+    pending.done.set()
+
+    return self._result(pending)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._calls.clear()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def _set(self, key, entry):
+    self._entries[key] = entry
+    max_entries = self._max_entries if self._max_entries is not None else QUERY_CACHE_MAX_ENTRIES.get()
+    while len(self._entries) > max_entries:
+      self._entries.popitem(last=False)
+
+  def _result(self, pending):
+    if pending.error is not None:
+      raise pending.error
+    return copy.deepcopy(pending.result)
+
+
+def get_query_key(collection, query, username=None, now=None):
+  """
+  Hash of the parts of the dashboard state that the Solr query and the normalization of its response depend on.
+  """
+  collection = copy.deepcopy(collection)
+  query = dict((key, value) for key, value in query.items() if key not in VOLATILE_QUERY_KEYS)
+
+  time_filter = collection.get('timeFilter') or {}
+  window = None
+
+  if time_filter.get('field') and time_filter.get('type') == 'rolling' and time_filter.get('value') != 'all':
+    gap = GAPS.get(time_filter['value'], {}).get('histogram-widget')
+    interval = int(gap['coeff']) * UNIT_SECONDS.get(gap['unit'], 1) if gap else 60
+    window = int((now if now is not None else time.time()) // interval)
+
+    time_filter.pop('from', None)
+    time_filter.pop('to', None)
+    for facet in collection.get('facets', []):
+      _remove_rolling_borders(facet, time_filter['field'])
+
+  key = json.dumps([username, collection, query, window], sort_keys=True, default=str)
+
+  return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _remove_rolling_borders(facet, time_field):
+  """
+  The borders of the time facets showing the whole window are recomputed from NOW by the query and can differ between viewers.
+  """
+  properties = facet.get('properties', facet)
+
+  if facet.get('field') == time_field and properties.get('start') == properties.get('min') and \
+      properties.get('end') == properties.get('max'):
+    for border in RANGE_BORDERS:
+      properties.pop(border, None)
+
+  for dimension in properties.get('facets') or []:
+    if isinstance(dimension, dict):
+      _remove_rolling_borders(dimension, time_field)
+
+
+QUERY_CACHE = QueryCache()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from builtins import object
+import threading
+import time
+
+from nose.tools import assert_equal, assert_not_equal, assert_raises
+
+from search.conf import QUERY_CACHE_TTL, QUERY_CACHE_SHARED
+from search.query_cache import QueryCache, get_query_key
+
+
+class MockUser(object):
+
+  def __init__(self, username):
+    self.username = username
+
+
+def _get_collection(value='1HOURS', borders=None):
+  borders = borders or {'start': '2021-01-01T10:00:00Z', 'end': '2021-01-01T11:00:00Z'}
+  return {
+    'name': 'logs',
+    'timeFilter': {'field': 'time', 'type': 'rolling', 'value': value, 'from': borders['start'], 'to': borders['end']},
+    'facets': [{
+      'id': 'f1',
+      'field': 'time',
+      'type': 'range',
+      'properties': {
+        'start': borders['start'], 'min': borders['start'], 'end': borders['end'], 'max': borders['end'], 'gap': '+1MINUTES',
+        'facets': []
+      }
+    }]
+  }
+
+
+class TestQueryCache(object):
+
+  def setUp(self):
+    self.cache = QueryCache(max_entries=2)
+    self.calls = []
+    self.resets = [QUERY_CACHE_TTL.set_for_testing(60), QUERY_CACHE_SHARED.set_for_testing(False)]
+
+  def tearDown(self):
+    for reset in self.resets:
+      reset()
+
+  def _fetch(self, response=None):
+    def fetch():
+      self.calls.append(1)
+      return response if response is not None else {'response': {'docs': [{'id': len(self.calls)}]}}
+    return fetch
+
+  def test_get(self):
+    user = MockUser('test')
+    query = {'qs': [{'q': 'error'}], 'fqs': [], 'start': 0}
+
+    response = self.cache.get(self._fetch(), user, _get_collection(), query)
+    response['response']['docs'].append('modified')
+    cached = self.cache.get(self._fetch(), user, _get_collection(), dict(query, uuid='viewer 2'))
+
+    assert_equal({'response': {'docs': [{'id': 1}]}}, cached)
+    assert_equal(1, len(self.calls))
+
+    self.cache.get(self._fetch(), user, _get_collection(), dict(query, start=10))
+    self.cache.get(self._fetch(), MockUser('other'), _get_collection(), query)
+    assert_equal(3, len(self.calls))
+    assert_equal(2, len(self.cache))
+
+    self.cache.get(self._fetch(), user, _get_collection(), dict(query, download=True))
+    assert_equal(4, len(self.calls))
+
+  def test_get_shared(self):
+    self.resets.append(QUERY_CACHE_SHARED.set_for_testing(True))
+    query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
+
+    self.cache.get(self._fetch(), MockUser('test'), _get_collection(), query)
+    self.cache.get(self._fetch(), MockUser('other'), _get_collection(), query)
+
+    assert_equal(1, len(self.calls))
+
+  def test_get_disabled(self):
+    self.resets.append(QUERY_CACHE_TTL.set_for_testing(0))
+    query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
+
+    self.cache.get(self._fetch(), MockUser('test'), _get_collection(), query)
+    self.cache.get(self._fetch(), MockUser('test'), _get_collection(), query)
+
+    assert_equal(2, len(self.calls))
+    assert_equal(0, len(self.cache))
+
+  def test_get_error(self):
+    query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
+
+    def fetch():
+      self.calls.append(1)
+      raise Exception('Solr is down')
+
+    assert_raises(Exception, self.cache.get, fetch, MockUser('test'), _get_collection(), query)
+    assert_raises(Exception, self.cache.get, fetch, MockUser('test'), _get_collection(), query)
+    assert_equal(2, len(self.calls))
+
+  def test_concurrent_misses(self):
+    query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def fetch():
+      self.calls.append(1)
+      started.set()
+      release.wait(5)
+      return {'response': {'docs': []}}
+
+    def get():
+      results.append(self.cache.get(fetch, MockUser('test'), _get_collection(), query))
+
+    threads = [threading.Thread(target=get) for i in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+      thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+      thread.join()
+
+    assert_equal(1, len(self.calls))
+    assert_equal([{'response': {'docs': []}}] * 5, results)
+
+
+def test_get_query_key_rolling_window():
+  query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
+  now = 1000 * 30 + 1  # 1HOURS windows have a gap of 30 seconds
+
+  key = get_query_key(_get_collection(), query, 'test', now=now)
+
+  # Viewers send back the borders of their last refresh
+  other_borders = {'start': '2021-01-01T10:00:30Z', 'end': '2021-01-01T11:00:30Z'}
+  assert_equal(key, get_query_key(_get_collection(borders=other_borders), query, 'test', now=now + 28))
+
+  assert_not_equal(key, get_query_key(_get_collection(), query, 'test', now=now + 30))
+  assert_not_equal(key, get_query_key(_get_collection(value='1DAYS'), query, 'test', now=now))
+  assert_not_equal(key, get_query_key(_get_collection(), query, 'other', now=now))
+
+  # Zoomed in facets keep their borders
+  zoomed = _get_collection()
+  zoomed['facets'][0]['properties'].update({'start': '2021-01-01T10:10:00Z', 'end': '2021-01-01T10:20:00Z'})
+  assert_not_equal(key, get_query_key(zoomed, query, 'test', now=now))
+
+  fixed = _get_collection()
+  fixed['timeFilter']['type'] = 'fixed'
+  assert_equal(get_query_key(fixed, query, now=now), get_query_key(fixed, query, now=now + 3600))
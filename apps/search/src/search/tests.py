@@ -28,6 +28,8 @@ from desktop.lib.test_utils import grant_access
 from desktop.lib.rest import resource
 from desktop.models import Document2, User
 
+from search.conf import QUERY_CACHE_TTL
+
 from dashboard.facet_builder import _round_number_range
 from dashboard.models import Collection2
 from dashboard.controller import DashboardController
@@ -95,6 +97,7 @@ class TestSearchBase(object):
 
     self.prev_resource = resource.Resource
     resource.Resource = MockResource
+    self.reset = QUERY_CACHE_TTL.set_for_testing(0)  # The mocked responses change between identical queries
 
     self.collection = Collection2(user=self.user, name='collection_1')
 
@@ -130,6 +133,7 @@ class TestSearchBase(object):
   def tearDown(self):
     # Remove monkey patching
     resource.Resource = self.prev_resource
+    self.reset()
 
 
 class TestWithMockedSolr(TestSearchBase):
@@ -1026,6 +1026,15 @@ SASL_MAX_BUFFER = Config(
   type=int
 )
 
+THRIFT_POOL_IDLE_TIMEOUT = Config(
+  key="thrift_pool_idle_timeout",
+  help=_("Number of seconds after which an unused Thrift connection is closed and removed from its pool. "
+         "Connections are opened on demand, up to the number of server threads per service endpoint. "
+         "A value of 0 keeps the idle connections open."),
+  type=int,
+  default=300
+)
+
 ENABLE_SMART_THRIFT_POOL = Config(
   key="enable_smart_thrift_pool",
   help=_("Hue will try to get the actual host of the Service, even if it resides behind a load balancer. "
@@ -2003,6 +2012,19 @@ TASK_SERVER = ConfigSection(
       default='{"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://localhost:6379/0", '
       '"OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},"KEY_PREFIX": "queries"}'
     ),
+    RESULT_CACHE_MAX_BYTES=Config(
+      key='result_cache_max_bytes',
+      default=1024 * 1024 * 1024,
+      type=coerce_positive_integer,
+      help=_('Maximum number of compressed bytes of query results kept in the result cache. '
+      'Least recently used results are evicted first.')
+    ),
+    RESULT_CACHE_MAX_BYTES_PER_USER=Config(
+      key='result_cache_max_bytes_per_user',
+      default=100 * 1024 * 1024,
+      type=coerce_positive_integer,
+      help=_('Maximum number of compressed bytes of query results kept in the result cache for a single user.')
+    ),
     RESULT_STORAGE=Config(
       key='result_storage',
       type=str,
@@ -145,6 +145,7 @@ export interface ExecuteStatusApiResponse {
   status: string;
   message?: string;
   has_result_set?: boolean;
+  progress?: number; // When pushed over websockets
 }
 
 export interface ExecuteApiOptions {
@@ -21,6 +21,7 @@ import {
   closeStatement,
   ExecuteApiResponse,
   executeStatement,
+  ExecuteStatusApiResponse,
   ExecutionHandle,
   ExecutionHistory
 } from 'apps/editor/execution/api';
@@ -130,6 +131,9 @@ export default class SqlExecutable {
   observerState: { [key: string]: unknown } = {};
   lost = false;
   edited = false;
+  statusPushed = false;
+  statusEnded = false;
+  unwatchStatus?: () => void;
   parsedStatement: ParsedSqlStatement;
 
   constructor(options: {
@@ -317,20 +321,85 @@ export default class SqlExecutable {
 
     let actualCheckCount = statusCheckCount || 0;
     if (!statusCheckCount) {
+      this.statusEnded = false;
       this.addCancellable({
         cancel: () => {
           window.clearTimeout(checkStatusTimeout);
         }
       });
+      if ((<hueWindow>window).WEB_SOCKETS_ENABLED) {
+        this.watchStatus();
+      }
     }
     actualCheckCount++;
 
     const queryStatus = await checkExecutionStatus({ executable: this });
 
+    await this.handleStatus(queryStatus, () => {
+      // The pushed status replaces the polling, it's only checked once in a while in case the socket is lost.
+      checkStatusTimeout = window.setTimeout(
+        () => {
+          this.checkStatus(actualCheckCount);
+        },
+        this.statusPushed ? 30000 : actualCheckCount > 45 ? 5000 : 1000
+      );
+    });
+  }
+
+  watchStatus(): void {
+    const operationId = this.operationId;
+    this.statusPushed = false;
+
+    const watchedSub = huePubSub.subscribe<{ operationId: string }>(
+      'editor.ws.query.status_watched',
+      data => {
+        if (data.operationId === operationId) {
+          this.statusPushed = true;
+        }
+      }
+    );
+    const statusSub = huePubSub.subscribe<ExecuteStatusApiResponse & { operationId: string }>(
+      'editor.ws.query.status',
+      queryStatus => {
+        if (queryStatus.operationId === operationId && this.operationId === operationId) {
+          this.handleStatus(queryStatus);
+        }
+      }
+    );
+    const unwatch = () => {
+      watchedSub.remove();
+      statusSub.remove();
+      huePubSub.publish('editor.ws.query.unwatch_status', { operationId });
+      this.unwatchStatus = undefined;
+    };
+
+    this.unwatchStatus = unwatch;
+    this.addCancellable({ cancel: unwatch });
+    huePubSub.publish('editor.ws.query.watch_status', { operationId });
+  }
+
+  async handleStatus(
+    queryStatus: ExecuteStatusApiResponse,
+    checkAgain?: () => void
+  ): Promise<void> {
+    if (this.statusEnded) {
+      return; // Already handled by the polling or the push
+    }
+
     if (this.handle && typeof queryStatus.has_result_set !== 'undefined') {
       this.handle.has_result_set = queryStatus.has_result_set;
     }
 
+    this.statusEnded = ![
+      ExecutionStatus.streaming,
+      ExecutionStatus.running,
+      ExecutionStatus.starting,
+      ExecutionStatus.waiting
+    ].includes(<ExecutionStatus>queryStatus.status);
+    if (this.statusEnded && this.unwatchStatus) {
+      this.unwatchStatus();
+    }
+
     switch (queryStatus.status) {
       case ExecutionStatus.success:
         this.executeEnded = Date.now();
@@ -373,12 +442,12 @@ export default class SqlExecutable {
       case ExecutionStatus.starting:
       case ExecutionStatus.waiting:
         this.setStatus(queryStatus.status);
-        checkStatusTimeout = window.setTimeout(
-          () => {
-            this.checkStatus(statusCheckCount);
-          },
-          actualCheckCount > 45 ? 5000 : 1000
-        );
+        if (typeof queryStatus.progress === 'number') {
+          this.setProgress(queryStatus.progress);
+        }
+        if (checkAgain) {
+          checkAgain();
+        }
         break;
       case ExecutionStatus.failed:
         this.executeEnded = Date.now();
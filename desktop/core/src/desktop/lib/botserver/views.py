@@ -299,7 +299,7 @@ def send_result_file(request, channel_id, message_ts, doc, file_format):
   try:
     slack_client.files_upload(
       channels=channel_id,
-      file=next(content_generator), 
+      file=b''.join(content_generator),
       thread_ts=message_ts,
       filetype=file_format,
       filename='{name}.{format}'.format(name=file_name, format=file_format),
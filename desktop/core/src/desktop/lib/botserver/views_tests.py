@@ -425,4 +425,17 @@ class TestBotServer(unittest.TestCase):
         ]
         
         handle_query_bank(self.channel_id, self.user_id)
-        _send_message.assert_called_with(self.channel_id, block_element=test_query_block)
\ No newline at end of file
+        _send_message.assert_called_with(self.channel_id, block_element=test_query_block)
+  def test_send_result_file(self):
+    with patch('desktop.lib.botserver.views.get_api') as get_api:
+      with patch('desktop.lib.botserver.views.slack_client.files_upload') as files_upload:
+        with patch('desktop.lib.botserver.views._get_snippet_name') as _get_snippet_name:
+          doc = Mock(data=json.dumps({'snippets': [{'statement_raw': 'SELECT 1'}]}))
+          get_api.return_value.download.return_value = iter([b'PK\x03\x04', b'sheet', b'PK\x05\x06'])
+          _get_snippet_name.return_value = 'query'
+
+          send_result_file('request', self.channel_id, self.message_ts, doc, 'xls')
+
+          # The streamed XLSX chunks are uploaded as a single file
+          assert_equal(files_upload.call_args[1]['file'], b'PK\x03\x04sheetPK\x05\x06')
+          assert_equal(files_upload.call_args[1]['filename'], 'query.xlsx')
@@ -21,21 +21,28 @@ Common library to export either CSV or XLS.
 from future import standard_library
 standard_library.install_aliases()
 from builtins import next, object
+import csv
 import gc
 import logging
+import math
 import numbers
 import openpyxl
 import re
 import six
 import sys
 import tablib
+import zipfile
+
+from xml.sax.saxutils import escape as xml_escape
+
+from openpyxl.utils import get_column_letter
 
 from django.http import StreamingHttpResponse, HttpResponse
 from django.utils.encoding import smart_str
 from desktop.lib import i18n
 
 if sys.version_info[0] > 2:
-  from io import BytesIO as string_io
+  from io import BytesIO as string_io, StringIO
   from urllib.parse import quote
 else:
   from StringIO import StringIO as string_io
@@ -46,6 +53,8 @@ LOG = logging.getLogger()
 
 DOWNLOAD_CHUNK_SIZE = 1 * 1024 * 1024 # 1MB
 ILLEGAL_CHARS = r'[\000-\010]|[\013-\014]|[\016-\037]'
+ILLEGAL_CHARS_TRANSLATION = dict((char, u'?') for char in list(range(0o0, 0o11)) + [0o13, 0o14] + list(range(0o16, 0o40)))
+EXCEL_LINK_REGEX = re.compile('^(https?://.+)', re.IGNORECASE)
 FORMAT_TO_CONTENT_TYPE = {
     'csv': 'application/csv',
     'xls': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
@@ -71,9 +80,9 @@ def encode_row(row, encoding=None, make_excel_links=False):
 
   for cell in row:
     if isinstance(cell, six.string_types):
-      cell = re.sub(ILLEGAL_CHARS, '?', cell)
+      cell = cell.translate(ILLEGAL_CHARS_TRANSLATION) if isinstance(cell, six.text_type) else re.sub(ILLEGAL_CHARS, '?', cell)
       if make_excel_links:
-        cell = re.compile('^(https?://.+)', re.IGNORECASE).sub(r'=HYPERLINK("\1")', cell)
+        cell = EXCEL_LINK_REGEX.sub(r'=HYPERLINK("\1")', cell)
     cell = nullify(cell)
     if not isinstance(cell, numbers.Number):
       cell = smart_str(cell, encoding, strings_only=True, errors='replace')
@@ -81,6 +90,60 @@ def encode_row(row, encoding=None, make_excel_links=False):
   return encoded_row
 
 
+def encode_csv_row(row, encoding):
+  """Same as encode_row() but leaves the serialization of the cells to csv.writer."""
+  return [
+    cell.translate(ILLEGAL_CHARS_TRANSLATION) if isinstance(cell, six.text_type) else
+    'NULL' if cell is None else
+    cell if isinstance(cell, numbers.Number) else
+    smart_str(cell, encoding, strings_only=True, errors='replace')
+    for cell in row
+  ]
+
+
+def csv_generator(content_generator, encoding=None, chunk_size=DOWNLOAD_CHUNK_SIZE):
+  """
+  Writes the rows with a single csv.writer into a reusable buffer and yields the UTF-8 encoded output in chunks of
+  at most chunk_size bytes. The chunks are cut on character boundaries so that each one can be decoded on its own.
+  """
+  encoding = encoding or i18n.get_site_encoding()
+  buffer = StringIO()
+  writer = csv.writer(buffer)
+  pending = bytearray()
+  show_headers = True
+
+  for headers, data in content_generator:
+    if show_headers and headers:
+      writer.writerow(encode_csv_row(headers, encoding))
+    show_headers = False
+
+    writer.writerows(encode_csv_row(row, encoding) for row in data)
+
+    if buffer.tell() >= chunk_size:
+      pending += buffer.getvalue().encode('utf-8')
+      buffer.seek(0)
+      buffer.truncate()
+
+      while len(pending) >= chunk_size:
+        end = _utf8_boundary(pending, chunk_size)
+        yield bytes(pending[:end])
+        del pending[:end]
+
+  pending += buffer.getvalue().encode('utf-8')
+  if pending:
+    yield bytes(pending)
+
+
+def _utf8_boundary(data, end):
+  """Moves end back to the start of the UTF-8 character it falls into, continuation bytes being 0b10xxxxxx."""
+  if end >= len(data):
+    return end
+  start = end
+  while start > 0 and data[start] & 0xC0 == 0x80:
+    start -= 1
+  return start or end
+
+
 def dataset(headers, data, encoding=None):
   """
   dataset(headers, data) -> Dataset object
@@ -110,12 +173,167 @@ def xls_dataset(workbook):
   return XlsWrapper(output.read())
 
 
+class ZipStreamBuffer(object):
+  """
+  Write-only, non seekable file object collecting the bytes written by a ZipFile until they are read.
+  """
+
+  def __init__(self):
+    self.chunks = []
+    self.offset = 0
+
+  def write(self, data):
+    self.chunks.append(data)
+    self.offset += len(data)
+    return len(data)
+
+  def tell(self):
+    return self.offset
+
+  def flush(self):
+    pass
+
+  def read(self):
+    data = b''.join(self.chunks)
+    self.chunks = []
+    return data
+
+
+XLSX_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+XLSX_PARTS = [
+  ('[Content_Types].xml',
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'),
+  ('_rels/.rels',
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="%s/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>' % XLSX_REL_NS),
+  ('xl/workbook.xml',
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="%s" xmlns:r="%s"><sheets><sheet name="Sheet" sheetId="1" r:id="rId1"/></sheets></workbook>' % (
+      XLSX_NS, XLSX_REL_NS)),
+  ('xl/_rels/workbook.xml.rels',
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="%s/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="%s/styles" Target="styles.xml"/>'
+    '</Relationships>' % (XLSX_REL_NS, XLSX_REL_NS)),
+  ('xl/styles.xml',
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="%s">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>' % XLSX_NS),
+]
+
+
+class XlsxStreamWriter(object):
+  """
+  Writes a single sheet XLSX document row by row.
+
+  The sheet XML is compressed into the zip archive as rows are appended and the bytes produced so far are
+  returned by read(), so memory usage does not depend on the number of rows.
+  """
+
+  def __init__(self):
+    self.buffer = ZipStreamBuffer()
+    self.zip = zipfile.ZipFile(self.buffer, 'w', zipfile.ZIP_DEFLATED)
+    for name, content in XLSX_PARTS:
+      self.zip.writestr(name, content)
+
+    self.sheet = self.zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+    self.sheet.write(
+      ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="%s"><sheetData>' % XLSX_NS).encode('utf-8')
+    )
+    self.row_count = 0
+    self.column_letters = []
+
+  def append(self, row):
+    self.row_count += 1
+    while len(self.column_letters) < len(row):
+      self.column_letters.append(get_column_letter(len(self.column_letters) + 1))
+
+    cells = []
+    for letter, cell in zip(self.column_letters, row):
+      ref = '%s%d' % (letter, self.row_count)
+      if isinstance(cell, bool):
+        cells.append('<c r="%s" t="b"><v>%d</v></c>' % (ref, cell))
+      elif isinstance(cell, numbers.Number) and not (isinstance(cell, float) and (math.isnan(cell) or math.isinf(cell))):
+        cells.append('<c r="%s" t="n"><v>%s</v></c>' % (ref, cell))
+      else:
+        if isinstance(cell, bytes):
+          cell = cell.decode('utf-8', 'replace')
+        elif not isinstance(cell, six.string_types):
+          cell = str(cell)
+        if cell.startswith('=') and len(cell) > 1:
+          cells.append('<c r="%s"><f>%s</f></c>' % (ref, xml_escape(cell[1:])))
+        else:
+          cells.append('<c r="%s" t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (ref, xml_escape(cell)))
+
+    self.sheet.write(('<row r="%d">%s</row>' % (self.row_count, ''.join(cells))).encode('utf-8'))
+
+  def read(self):
+    return self.buffer.read()
+
+  def close(self):
+    self.sheet.write(b'</sheetData></worksheet>')
+    self.sheet.close()
+    self.zip.close()
+    return self.buffer.read()
+
+
 def create_generator(content_generator, format, encoding=None):
-  if format == 'csv':
+  try:
+    for chunk in _create_generator(content_generator, format, encoding):
+      yield chunk
+  finally:
+    # Also releases the results when the client goes away before the end of the download
+    if hasattr(content_generator, 'close'):
+      content_generator.close()
+
+
+def _create_generator(content_generator, format, encoding=None):
+  if format == 'csv' and sys.version_info[0] > 2:
+    for chunk in csv_generator(content_generator, encoding):
+      yield chunk
+  elif format == 'csv':
     show_headers = True
     for headers, data in content_generator:
       yield dataset(show_headers and headers or None, data, encoding).csv
       show_headers = False
+  elif format == 'xls' and sys.version_info[0] > 2:
+    writer = XlsxStreamWriter()
+    row_ctr = 0
+
+    for _headers, _data in content_generator:
+      # Write headers to workbook once
+      if _headers and row_ctr == 0:
+        writer.append(encode_row(_headers, encoding))
+        row_ctr += 1
+
+      # Write row data to workbook
+      for row in _data:
+        writer.append(encode_row(row, encoding, make_excel_links=True))
+        row_ctr += 1
+
+      chunk = writer.read()
+      if chunk:
+        yield chunk
+
+    yield writer.close()
   elif format == 'xls':
     workbook = openpyxl.Workbook(write_only=True)
     worksheet = workbook.create_sheet()
@@ -154,7 +372,10 @@ def make_response(generator, format, name, encoding=None, user_agent=None): #TOD
       pass
   elif format == 'xls':
     format = 'xlsx'
-    resp = HttpResponse(next(generator), content_type=content_type)
+    if sys.version_info[0] > 2:
+      resp = StreamingHttpResponse(generator, content_type=content_type)
+    else:
+      resp = HttpResponse(next(generator), content_type=content_type)
   elif format == 'json' or format == 'txt':
     resp = HttpResponse(generator, content_type=content_type)
   else:
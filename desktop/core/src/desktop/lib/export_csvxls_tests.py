@@ -18,18 +18,24 @@
 
 from future import standard_library
 standard_library.install_aliases()
+import logging
 import sys
+import time
 
-from nose.tools import assert_equal
+from nose.plugins.attrib import attr
+from nose.tools import assert_equal, assert_true
 from openpyxl import load_workbook
 
-from desktop.lib.export_csvxls import create_generator, make_response
+from desktop.lib.export_csvxls import create_generator, make_response, csv_generator, dataset
 
 if sys.version_info[0] > 2:
   from io import BytesIO as string_io
 else:
   from cStringIO import StringIO as string_io
 
+LOG = logging.getLogger()
+
+
 def content_generator(header, data):
   yield header, data
 
@@ -70,6 +76,50 @@ def test_export_csv():
 
 
 
+def test_export_csv_chunks():
+  headers = ["x", "y"]
+  data = [[i, u"€\x01%d" % i] for i in range(1000)]
+  expected = b'x,y\r\n' + b''.join(('%d,€?%d\r\n' % (i, i)).encode('utf-8') for i in range(1000))
+
+  chunks = list(csv_generator(content_generator(headers, data), chunk_size=100))
+
+  assert_equal(expected, b''.join(chunks))
+  assert_true(all(98 <= len(chunk) <= 100 for chunk in chunks[:-1]))
+  # Multibyte characters are never split across two chunks
+  assert_equal(expected.decode('utf-8'), u''.join(chunk.decode('utf-8') for chunk in chunks))
+
+
+def test_export_csv_exact_chunk_size():
+  data = [["a" * 98], ["b" * 98]]
+
+  # Each batch fills the buffer with exactly chunk_size bytes
+  chunks = list(csv_generator(((None, [row]) for row in data), chunk_size=100))
+
+  assert_equal([b'a' * 98 + b'\r\n', b'b' * 98 + b'\r\n'], chunks)
+
+
+@attr('notdefault')
+def test_export_csv_benchmark():
+  headers = ["id", "name", "url", "price", "comment"]
+  data = [[i, "name %d" % i, "http://gethue.com/%d" % i, i * 1.5, None] for i in range(1000)]
+  batches = 100
+
+  def batch_generator():
+    for i in range(batches):
+      yield headers, data
+
+  start = time.time()
+  tablib_csv = ''.join(dataset(i == 0 and headers or None, data).csv for i, (headers, data) in enumerate(batch_generator()))
+  tablib_rows_per_second = len(data) * batches / (time.time() - start)
+
+  start = time.time()
+  streaming_csv = b''.join(csv_generator(batch_generator()))
+  streaming_rows_per_second = len(data) * batches / (time.time() - start)
+
+  LOG.info('CSV export: tablib %d rows/s, csv_generator %d rows/s' % (tablib_rows_per_second, streaming_rows_per_second))
+  assert_equal(tablib_csv.encode('utf-8'), streaming_csv)
+
+
 def test_export_xls():
   headers = ["x", "y"]
   data = [["1", "2"], ["3", "4"], ["5,6", "7"], [None, None], ["http://gethue.com", "http://gethue.com"]]
@@ -87,8 +137,26 @@ def test_export_xls():
   assert_equal('attachment; filename="foo.xlsx"', response["content-disposition"])
 
 
+def test_export_xls_streaming():
+  headers = ["x", "y"]
+
+  def batches():
+    for batch in range(5):
+      yield headers, [[batch * 1000 + i, u'€ & <%d>' % i] for i in range(1000)]
+
+  generator = create_generator(batches(), "xls")
+  response = make_response(generator, "xls", "foo")
+  assert_true(response.streaming)
+
+  sheet_data = _read_xls_sheet_data(response)
+
+  assert_equal(5001, len(sheet_data))
+  assert_equal(headers, sheet_data[0])
+  assert_equal([4999, u'€ & <999>'], sheet_data[-1])
+
+
 def _read_xls_sheet_data(response):
-  content = bytes(response.content)
+  content = b''.join(response.streaming_content) if response.streaming else bytes(response.content)
 
   data = string_io()
   data.write(content)
@@ -130,6 +130,9 @@ class OzoneFS(WebHdfs):
     filestatus_list = json['FileStatuses']['FileStatus']
     return [OzoneFSStat(st, path, self._netloc) for st in filestatus_list]
 
+  def listdir_stats_batches(self, path):
+    yield self.listdir_stats(path)
+
   def _stats(self, path):
     """
     This stats method returns None if the entry is not found.
@@ -154,6 +154,13 @@ class ProxyFS(object):
   def listdir_stats(self, path, **kwargs):
     return self._get_fs(path).listdir_stats(path, **kwargs)
 
+  def listdir_stats_batches(self, path):
+    fs = self._get_fs(path)
+    if hasattr(fs, 'listdir_stats_batches'):
+      return fs.listdir_stats_batches(path)
+    else:
+      return iter([fs.listdir_stats(path)])
+
   def listdir(self, path, glob=None):
     return self._get_fs(path).listdir(path, glob)
 
@@ -23,9 +23,13 @@ import functools
 import pyformance
 import logging
 import os
+import threading
+import time
 
 from multiprocessing import Manager
 
+from desktop.lib.metrics.sketch import LatencySketch
+
 LOG = logging.getLogger()
 
 MAX_LABEL_SUFFIX = ': Max'
@@ -79,6 +83,16 @@ AUTH_LDAP_AUTH_TIME_KEY = 'auth.ldap.auth-time'
 AUTH_PAM_AUTH_TIME_KEY = 'auth.pam.auth-time'
 AUTH_SPNEGO_AUTH_TIME_KEY = 'auth.spnego.auth-time'
 
+PERCENTILE_KEYS = (
+  ('median', 0.5),
+  ('50_percentile', 0.5),
+  ('75_percentile', 0.75),
+  ('95_percentile', 0.95),
+  ('99_percentile', 0.99),
+  ('999_percentile', 0.999),
+)
+RATE_KEYS = ('1m_rate', '5m_rate', '15m_rate', 'mean_rate')
+
 class MetricsRegistry(object):
   def __init__(self, registry=None):
     import sys
@@ -86,6 +100,8 @@ class MetricsRegistry(object):
       registry = pyformance.global_registry()
     self._registry = registry
     self._schemas = []
+    self._sketches = {}
+    self._flush_thread = None
     global metrics_dict
     metrics_dict = Manager().dict() if 'rungunicornserver' in sys.argv else None
     self._metrics_dict = metrics_dict
@@ -119,52 +135,65 @@ class MetricsRegistry(object):
 
   def timer(self, name, **kwargs):
     self._schemas.append(TimerDefinition(name, **kwargs))
-    return Timer(self._registry.timer(name))
+    sketch = self._sketches.setdefault(name, LatencySketch())
+    return Timer(self._registry.timer(name), sketch)
+
+  def start_shared_data_flush(self, interval):
+    """
+    Publishes the metrics of this Gunicorn worker every `interval` seconds, from a background thread.
+    """
+    if self._metrics_dict is None:
+      return
+
+    thread = self._flush_thread
+    if thread is None or thread.pid != os.getpid():
+      # Not inherited from the Gunicorn master, which would be a copy without the thread
+      with _flush_lock:
+        if self._flush_thread is thread:
+          self._flush_thread = SharedDataFlushThread(self, interval)
+          self._flush_thread.start()
 
   def update_metrics_shared_data(self):
-    # Update from middleware in Gunicorn worker process
-    metrics = self.dump_metrics()
+    # Update from the flush thread of the Gunicorn worker process
     if self._metrics_dict is not None:
-      self._metrics_dict[os.getpid()] = metrics
+      self._metrics_dict[os.getpid()] = {
+        'metrics': self.dump_metrics(),
+        'sketches': dict((name, sketch.to_json()) for name, sketch in self._sketches.items()),
+      }
 
   def get_metrics_shared_data(self):
     # Getting from reporter in Gunicorn main process
-    metrics_data = self._metrics_dict.values() if self._metrics_dict is not None else []
-    size = len(metrics_data)
-
-    if size > 0:
-      active_requests_list = []
-      active_exceptions_list = []
-      requests_response_time_list = []
-      auth_oauth_auth_time_list = []
-      auth_saml2_auth_time_list = []
-      auth_ldap_auth_time_list = []
-      auth_pam_auth_time_list = []
-      auth_spnego_auth_time_list = []
-
-      for value in metrics_data:
-        active_requests_list.append(value['requests.active'])
-        active_exceptions_list.append(value['requests.exceptions'])
-        requests_response_time_list.append(value[REQUESTS_RESPONSE_TIME_KEY])
-        auth_oauth_auth_time_list.append(value[AUTH_OAUTH_AUTH_TIME_KEY])
-        auth_saml2_auth_time_list.append(value[AUTH_SAML2_AUTH_TIME_KEY])
-        auth_ldap_auth_time_list.append(value[AUTH_LDAP_AUTH_TIME_KEY])
-        auth_pam_auth_time_list.append(value[AUTH_PAM_AUTH_TIME_KEY])
-        auth_spnego_auth_time_list.append(value[AUTH_SPNEGO_AUTH_TIME_KEY])
-
-      metrics_master = self.dump_metrics()
-      self.calculate_count(metrics_master[REQUESTS_ACTIVE_KEY], active_requests_list)
-      self.calculate_count(metrics_master[REQUESTS_EXCEPTIONS_KEY], active_exceptions_list)
-      self.calculate_time_series(metrics_master[REQUESTS_RESPONSE_TIME_KEY], requests_response_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_OAUTH_AUTH_TIME_KEY], auth_oauth_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_SAML2_AUTH_TIME_KEY], auth_saml2_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_LDAP_AUTH_TIME_KEY], auth_ldap_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_PAM_AUTH_TIME_KEY], auth_pam_auth_time_list, size)
-      self.calculate_time_series(metrics_master[AUTH_SPNEGO_AUTH_TIME_KEY], auth_spnego_auth_time_list, size)
-
-      return metrics_master
-    else:
-      return self.dump_metrics()
+    workers = list(self._metrics_dict.items()) if self._metrics_dict is not None else []
+    workers_data = []
+
+    for pid, data in workers:
+      if _is_process_alive(pid):
+        workers_data.append(data)
+      else:
+        self._metrics_dict.pop(pid, None)
+
+    metrics_master = self.dump_metrics()
+
+    if workers_data:
+      for schema in self._schemas:
+        if schema.name not in metrics_master:
+          continue
+        # Workers only publish the metrics they used, the other ones are skipped
+        if isinstance(schema, CounterDefinition):
+          counts = [data['metrics'].get(schema.name) for data in workers_data]
+          self.calculate_count(metrics_master[schema.name], [count for count in counts if count is not None])
+        elif isinstance(schema, TimerDefinition):
+          published = [
+            data for data in workers_data if schema.name in data['metrics'] and data['sketches'].get(schema.name) is not None
+          ]
+          if published:
+            self.calculate_time_series(
+              metrics_master[schema.name],
+              [data['metrics'][schema.name] for data in published],
+              [LatencySketch.from_json(data['sketches'][schema.name]) for data in published]
+            )
+
+    return metrics_master
 
   def calculate_count(self, count_obj, count_list):
     value = 0
@@ -172,55 +201,28 @@ class MetricsRegistry(object):
       value += count['count']
     count_obj['count'] = value
 
-  def calculate_time_series(self, time_obj, time_list, size):
-    avg_list = []
-    sum_list = []
-    count_list = []
-    max_lit = []
-    min_list = []
-    std_dev_list = []
-    rate_15m_list = []
-    rate_5m_list = []
-    rate_1m_list = []
-    mean_rate_list = []
-    # percentile_50_list = []
-    percentile_75_list = []
-    percentile_95_list = []
-    percentile_99_list = []
-    percentile_999_list = []
-
-    for time in time_list:
-      avg_list.append(time['avg'])
-      sum_list.append(time['sum'])
-      count_list.append(time['count'])
-      max_lit.append(time['max'])
-      min_list.append(time['min'])
-      std_dev_list.append(time['std_dev'])
-      rate_15m_list.append(time['15m_rate'])
-      rate_5m_list.append(time['5m_rate'])
-      rate_1m_list.append(time['1m_rate'])
-      mean_rate_list.append(time['mean_rate'])
-      # percentile_50_list.append(time['50_percentile'])
-      percentile_75_list.append(time['75_percentile'])
-      percentile_95_list.append(time['95_percentile'])
-      percentile_99_list.append(time['99_percentile'])
-      percentile_999_list.append(time['999_percentile'])
-
-    time_obj['avg'] = sum(avg_list) / size
-    time_obj['sum'] = sum(sum_list) / size
-    time_obj['count'] = sum(count_list)
-    time_obj['max'] = sum(max_lit) / size
-    time_obj['min'] = sum(min_list) / size
-    time_obj['std_dev'] = sum(std_dev_list) / size
-    time_obj['15m_rate'] = sum(rate_15m_list) / size
-    time_obj['5m_rate'] = sum(rate_5m_list) / size
-    time_obj['1m_rate'] = sum(rate_1m_list) / size
-    time_obj['mean_rate'] = sum(mean_rate_list) / size
-    # time_obj['50_percentile'] = sum(percentile_50_list) / size
-    time_obj['75_percentile'] = sum(percentile_75_list) / size
-    time_obj['95_percentile'] = sum(percentile_95_list) / size
-    time_obj['99_percentile'] = sum(percentile_99_list) / size
-    time_obj['999_percentile'] = sum(percentile_999_list) / size
+  def calculate_time_series(self, time_obj, time_list, sketches):
+    """
+    Merges the timers of the workers: the counts and rates add up, and the percentiles come from their merged sketches.
+    """
+    sketch = LatencySketch()
+    for worker_sketch in sketches:
+      sketch.merge(worker_sketch)
+
+    time_obj['count'] = sketch.count
+    time_obj['sum'] = sketch.sum
+    time_obj['avg'] = sketch.sum / sketch.count if sketch.count else 0.0
+    time_obj['min'] = sketch.min or 0.0
+    time_obj['max'] = sketch.max or 0.0
+    time_obj['std_dev'] = sketch.std_dev()
+
+    for key in RATE_KEYS:
+      if key in time_obj:
+        time_obj[key] = sum(worker_time.get(key, 0.0) for worker_time in time_list)
+
+    for key, quantile in PERCENTILE_KEYS:
+      if key in time_obj:
+        time_obj[key] = sketch.percentile(quantile)
 
   def get_hue_metrics(self, key):
     return self._registry.get_metrics(key)
@@ -500,21 +502,76 @@ class Timer(object):
   annotation.
   """
 
-  def __init__(self, timer):
+  def __init__(self, timer, sketch=None):
     self._timer = timer
+    self._sketch = sketch
 
   def __call__(self, fn, *args, **kwargs):
     @functools.wraps(fn)
     def wrapper(*args, **kwargs):
-      with self._timer.time():
+      with self.time():
         return fn(*args, **kwargs)
 
     return wrapper
 
+  def time(self, *args, **kwargs):
+    context = self._timer.time(*args, **kwargs)
+    return TimerContext(context, self._sketch) if self._sketch is not None else context
+
   def __getattr__(self, *args, **kwargs):
     return getattr(self._timer, *args, **kwargs)
 
 
+class TimerContext(object):
+  """
+  Also records the durations of a pyformance TimerContext in the sketch of the timer.
+  """
+
+  def __init__(self, context, sketch):
+    self._context = context
+    self._sketch = sketch
+
+  def stop(self):
+    elapsed = self._context.stop()
+    if elapsed is not None:
+      self._sketch.add(elapsed)
+    return elapsed
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, t, v, tb):
+    self.stop()
+
+
+class SharedDataFlushThread(threading.Thread):
+
+  def __init__(self, registry, interval):
+    super(SharedDataFlushThread, self).__init__(name='MetricsSharedDataFlush')
+    self.daemon = True
+    self.pid = os.getpid()
+    self.registry = registry
+    self.interval = interval
+
+  def run(self):
+    while True:
+      try:
+        self.registry.update_metrics_shared_data()
+      except Exception:
+        LOG.exception('Failed to publish the metrics of worker %s' % self.pid)
+      time.sleep(self.interval)
+
+
+def _is_process_alive(pid):
+  try:
+    os.kill(pid, 0)
+  except OSError:
+    return False
+  return True
+
+
+_flush_lock = threading.Lock()
+
 _global_registry = MetricsRegistry()
 
 
@@ -0,0 +1,155 @@
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Mergeable latency histograms.
+
+The pyformance timers keep a random sample of their values per process, and the percentiles of several processes
+cannot be combined. A LatencySketch counts the values in logarithmic buckets instead, so that the sketches of
+several Gunicorn workers can be added together and give the same percentiles as a single process would have.
+
+Like the percentiles of the timers, the percentiles of a sketch only cover the recent values: its buckets are
+renewed every WINDOW seconds and the percentiles are computed on the current and previous windows, i.e. over the
+past 30 to 60 minutes. The count, sum, min and max are computed over the lifetime of the process.
+"""
+
+from builtins import object
+import math
+import threading
+import time
+
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 1e-6  # Values are durations in seconds, anything below a microsecond falls in the first bucket
+WINDOW = 30 * 60
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+class LatencySketch(object):
+  """
+  Histogram of positive values in buckets of RELATIVE_ACCURACY relative width.
+
+  Percentiles are within RELATIVE_ACCURACY of the exact ones, and merging two sketches is exact.
+  """
+
+  def __init__(self):
+    self.buckets = {}
+    self._previous_buckets = {}
+    self._window_start = time.time()
+    self.count = 0
+    self.sum = 0.0
+    self.sum_of_squares = 0.0
+    self.min = None
+    self.max = None
+    self._lock = threading.Lock()
+
+  def add(self, value):
+    index = int(math.ceil(math.log(max(value, MIN_VALUE)) / _LOG_GAMMA))
+
+    with self._lock:
+      self._rotate()
+      self.buckets[index] = self.buckets.get(index, 0) + 1
+      self.count += 1
+      self.sum += value
+      self.sum_of_squares += value * value
+      self.min = value if self.min is None else min(self.min, value)
+      self.max = value if self.max is None else max(self.max, value)
+
+  def merge(self, other):
+    buckets = other.window_buckets()
+
+    with self._lock:
+      self._rotate()
+      for index, count in buckets.items():
+        self.buckets[index] = self.buckets.get(index, 0) + count
+      self.count += other.count
+      self.sum += other.sum
+      self.sum_of_squares += other.sum_of_squares
+      if other.count:
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+  def percentile(self, quantile):
+    """
+    Returns the value below which `quantile` (between 0 and 1) of the values fall.
+    """
+    buckets = self.window_buckets()
+    count = sum(buckets.values())
+
+    with self._lock:
+      if not count:
+        return 0.0
+
+      rank = quantile * (count - 1)
+      seen = 0
+      for index in sorted(buckets):
+        seen += buckets[index]
+        if seen > rank:
+          # Middle of the bucket, clamped to the values actually seen
+          value = 2 * _GAMMA ** index / (_GAMMA + 1)
+          return min(max(value, self.min), self.max)
+
+      return self.max
+
+  def std_dev(self):
+    if not self.count:
+      return 0.0
+    mean = self.sum / self.count
+    return math.sqrt(max(self.sum_of_squares / self.count - mean * mean, 0.0))
+
+  def window_buckets(self):
+    """
+    Returns the counts of the buckets of the current and previous windows.
+    """
+    with self._lock:
+      self._rotate()
+      buckets = dict(self._previous_buckets)
+      for index, count in self.buckets.items():
+        buckets[index] = buckets.get(index, 0) + count
+      return buckets
+
+  def to_json(self):
+    buckets = self.window_buckets()
+
+    with self._lock:
+      return {
+        'buckets': buckets,
+        'count': self.count,
+        'sum': self.sum,
+        'sum_of_squares': self.sum_of_squares,
+        'min': self.min,
+        'max': self.max,
+      }
+
+  @classmethod
+  def from_json(cls, data):
+    sketch = cls()
+    sketch.buckets = dict((int(index), count) for index, count in data['buckets'].items())
+    sketch.count = data['count']
+    sketch.sum = data['sum']
+    sketch.sum_of_squares = data['sum_of_squares']
+    sketch.min = data['min']
+    sketch.max = data['max']
+    return sketch
+
+  def _rotate(self):
+    now = time.time()
+    if now - self._window_start >= WINDOW:
+      self._previous_buckets = self.buckets if now - self._window_start < 2 * WINDOW else {}
+      self.buckets = {}
+      self._window_start = now
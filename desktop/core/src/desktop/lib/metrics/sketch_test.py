@@ -0,0 +1,136 @@
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import sys
+
+import pyformance
+
+from nose.tools import assert_equal, assert_true
+
+from desktop.lib.metrics.registry import MetricsRegistry
+from desktop.lib.metrics.sketch import LatencySketch, RELATIVE_ACCURACY, WINDOW
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch
+else:
+  from mock import patch
+
+
+def _exact_percentile(values, quantile):
+  values = sorted(values)
+  return values[int(quantile * (len(values) - 1))]
+
+
+class TestLatencySketch(object):
+
+  def test_percentiles(self):
+    values = [random.lognormvariate(-3, 1) for i in range(10000)]
+    sketch = LatencySketch()
+    for value in values:
+      sketch.add(value)
+
+    for quantile in (0.5, 0.75, 0.95, 0.99, 0.999):
+      exact = _exact_percentile(values, quantile)
+      assert_true(abs(sketch.percentile(quantile) - exact) <= exact * RELATIVE_ACCURACY, (quantile, exact))
+
+    assert_equal(10000, sketch.count)
+    assert_equal(min(values), sketch.min)
+    assert_equal(max(values), sketch.max)
+
+  def test_merge(self):
+    # One worker with fast requests and one with slow ones: averaging their p99 would be wrong
+    fast = [random.uniform(0.01, 0.02) for i in range(9900)]
+    slow = [random.uniform(1, 2) for i in range(100)]
+    single, merged = LatencySketch(), LatencySketch()
+    workers = [LatencySketch(), LatencySketch()]
+
+    for sketch, values in zip(workers, (fast, slow)):
+      for value in values:
+        sketch.add(value)
+        single.add(value)
+    for sketch in workers:
+      merged.merge(LatencySketch.from_json(sketch.to_json()))
+
+    for quantile in (0.5, 0.95, 0.99, 0.999):
+      assert_equal(single.percentile(quantile), merged.percentile(quantile))
+    assert_equal(single.count, merged.count)
+
+  def test_empty(self):
+    assert_equal(0.0, LatencySketch().percentile(0.99))
+    assert_equal(0.0, LatencySketch().std_dev())
+
+  def test_window(self):
+    with patch('desktop.lib.metrics.sketch.time.time') as time:
+      time.return_value = 1000
+      sketch = LatencySketch()
+      for i in range(100):
+        sketch.add(10)
+
+      # Still in the previous window
+      time.return_value = 1000 + WINDOW
+      sketch.add(0.01)
+      assert_true(abs(sketch.percentile(0.5) - 10) <= 10 * RELATIVE_ACCURACY)
+
+      time.return_value = 1000 + 2 * WINDOW
+      assert_true(abs(sketch.percentile(0.5) - 0.01) <= 0.01 * RELATIVE_ACCURACY)
+      assert_equal(1, sum(LatencySketch.from_json(sketch.to_json()).buckets.values()))
+
+      time.return_value = 1000 + 4 * WINDOW
+      assert_equal(0.0, sketch.percentile(0.5))
+      assert_equal(101, sketch.count)
+      assert_equal(10, sketch.max)
+
+
+class TestMetricsRegistry(object):
+
+  def test_calculate_time_series(self):
+    workers = [LatencySketch(), LatencySketch()]
+    for i in range(98):
+      workers[0].add(0.01)
+    workers[1].add(10)
+    workers[1].add(10)
+    time_obj = {'count': 0, '99_percentile': 0, '1m_rate': 0}
+
+    MetricsRegistry().calculate_time_series(time_obj, [{'1m_rate': 1.0}, {'1m_rate': 2.0}], workers)
+
+    assert_equal(100, time_obj['count'])
+    assert_equal(3.0, time_obj['1m_rate'])
+    assert_equal(10, time_obj['max'])
+    assert_true(abs(time_obj['99_percentile'] - 10) <= 10 * RELATIVE_ACCURACY)
+
+  def test_get_metrics_shared_data_of_unpublished_metrics(self):
+    registry = MetricsRegistry(registry=pyformance.MetricsRegistry())
+    registry.counter('test.counter', label='Counter', description='Counter', numerator='requests')
+    registry.timer(
+      'test.timer', label='Timer', description='Timer', numerator='seconds', counter_numerator='requests', rate_denominator='seconds'
+    )
+    registry.timer(
+      'test.other-timer', label='Timer', description='Timer', numerator='seconds', counter_numerator='requests', rate_denominator='seconds'
+    )
+    sketch = LatencySketch()
+    sketch.add(1)
+    registry._metrics_dict = {
+      1: {'metrics': {}, 'sketches': {}},
+      2: {'metrics': {'test.counter': {'count': 2}, 'test.timer': {'count': 1}}, 'sketches': {'test.timer': sketch.to_json()}},
+    }
+
+    with patch('desktop.lib.metrics.registry._is_process_alive', return_value=True):
+      metrics = registry.get_metrics_shared_data()
+
+    assert_equal(2, metrics['test.counter']['count'])
+    assert_equal(1, metrics['test.timer']['count'])
+    assert_equal(0, metrics['test.other-timer']['count'])
@@ -40,9 +40,11 @@ from thrift.protocol.TBinaryProtocol import TBinaryProtocol
 from thrift.protocol.TMultiplexedProtocol import TMultiplexedProtocol
 
 from django.conf import settings
-from desktop.conf import SASL_MAX_BUFFER, CHERRYPY_SERVER_THREADS, ENABLE_SMART_THRIFT_POOL, USE_THRIFT_HTTP_JWT, ENABLE_ORGANIZATIONS
+from desktop.conf import SASL_MAX_BUFFER, CHERRYPY_SERVER_THREADS, ENABLE_SMART_THRIFT_POOL, USE_THRIFT_HTTP_JWT, ENABLE_ORGANIZATIONS, \
+    THRIFT_POOL_IDLE_TIMEOUT
 
 from desktop.lib.apputil import WARN_LEVEL_CALL_DURATION_MS, INFO_LEVEL_CALL_DURATION_MS
+from desktop.lib.metrics import global_registry
 from desktop.lib.python_util import create_synchronous_io_multiplexer
 from desktop.lib.thrift_.http_client import THttpClient
 from desktop.lib.thrift_.TSSLSocketWithWildcardSAN import TSSLSocketWithWildcardSAN
@@ -176,102 +178,61 @@ class ConnectionPooler(object):
   this could be made general).
 
   Each host,port pair has a connection pool set associated with it.
-  Clients can get connections from this pool and then block when
-  none are available.
+  Connections are opened on demand, up to poolsize per pool. Clients can
+  get connections from this pool and then block when all of them are in use.
 
   A connection is a 'SuperClient', which deals with timeout errors
   automatically so we don't have to worry about refreshing a stale pool.
+  Idle connections are checked on checkout, and closed after idle_timeout seconds.
 
   We could be fancier here - we could reclaim clients ourselves without
   relying on them to be returned but that would increase complexity. The
   benefit would be not having to hit the connection pool on every client call.
   """
 
-  def __init__(self, poolsize=10):
+  def __init__(self, poolsize=10, idle_timeout=None):
     self.pooldict = {}
     self.poolsize = poolsize
+    self.idle_timeout = idle_timeout
     self.dictlock = threading.Lock()
 
   def create_pool_impala(self, conf):
-    self.dictlock.acquire()
-    try:
-      if _get_pool_key(conf) not in self.pooldict:
-        q = LifoQueue(self.poolsize)
-        self.pooldict[_get_pool_key(conf)] = q
-    finally:
-      self.dictlock.release()
+    # Pool of the connections returned by a coordinator: other connections would not reach the same coordinator.
+    return self._get_pool(conf, can_grow=False)
 
   def create_pool(self, conf):
-    # First up, check to see if we have a pool for this endpoint
-    if _get_pool_key(conf) not in self.pooldict:
-      # Uh-oh, we need to initialise the queue. Take the dict lock.
-      # Note that this is 'double-checked locking'.
-
-      # The reason this pattern doesn't work in Java is that the write to the dict
-      # may get issued before the construction of the Queue due to new Queue(..) not
-      # being atomic. However in Python this becomes CALL_FUNCTION and STORE_FAST,
-      # therefore as long as a) the function doesn't get inlined b) Python's bytecode
-      # generator doesn't move the write to q before the function completes there's no
-      # way for another thread to observe a partially constructed queue.
-
-      # I haven't found a reference for the Python memory model, so I'm leaving this comment
-      # here in case unladen-swallow or something breaks this assumption of correctness.
-
-      self.dictlock.acquire()
-      try:
-        if _get_pool_key(conf) not in self.pooldict:
-          q = LifoQueue(self.poolsize)
-          for i in range(self.poolsize):
-            client = construct_superclient(conf)
-            client.CID = i
-            q.put(client, False)
-
-          # Wait until the queue has been filled with connections before adding
-          # it to the pool. This is done last because any exceptions thrown
-          # by the client construction could result in there being no
-          # connections available in this pool. When `get_client` is called next,
-          # it would skip this block because the key has a value, but then it
-          # would deadlock later because there are no connections for it to
-          # fetch from the pool.
-          self.pooldict[_get_pool_key(conf)] = q
-      finally:
-        self.dictlock.release()
+    return self._get_pool(conf)
+
+  def _get_pool(self, conf, can_grow=True):
+    key = _get_pool_key(conf)
+    pool = self.pooldict.get(key)
+
+    if pool is None:
+      # The dict lock only guards the creation of the empty pool: connections are opened without it, so that
+      # a slow or down endpoint does not block the other ones.
+      with self.dictlock:
+        pool = self.pooldict.get(key)
+        if pool is None:
+          pool = self.pooldict[key] = _EndpointPool(conf, self.poolsize, can_grow)
+
+    return pool
 
   def get_client(self, conf, get_client_timeout=None):
     """
-    Could block while we wait for the pool to become non-empty.
+    Could block while we wait for a connection of the pool to be returned.
 
     @param get_client_timeout: how long (in seconds) to wait on the pool
                                to get a client before failing
     """
-    connection = None
-
+    pool = self.create_pool(conf)
     start_pool_get_time = time.time()
-    has_waited_for = 0
 
-    self.create_pool(conf)
+    with pool.wait_time.time():
+      connection = pool.checkout(conf, get_client_timeout, self._get_idle_timeout())
 
-    while connection is None:
-      if get_client_timeout is not None:
-        this_round_timeout = max(min(get_client_timeout - has_waited_for, 1), 0)
-      else:
-        this_round_timeout = None
-
-      try:
-        connection = self.pooldict[_get_pool_key(conf)].get(block=True, timeout=this_round_timeout)
-        if connection is not None:
-          duration = time.time() - start_pool_get_time
-          message = "Thrift client %s got connection %s after %.2f seconds" % (self, connection.CID, duration)
-          log_if_slow_call(duration=duration, message=message)
-      except queue.Empty:
-        has_waited_for = time.time() - start_pool_get_time
-        if get_client_timeout is not None and has_waited_for > get_client_timeout:
-          raise socket.timeout(
-            ("Timed out after %.2f seconds waiting to retrieve a %s client from the pool.") % (has_waited_for, conf.service_name))
-        else:
-          message = "Waited %d seconds for a Thrift client to %s:%d %s" % (has_waited_for,
-                                                                           conf.host, conf.port, conf.get_coordinator_host())
-          log_if_slow_call(duration=has_waited_for, message=message)
+    duration = time.time() - start_pool_get_time
+    message = "Thrift client %s got connection %s after %.2f seconds" % (self, connection.CID, duration)
+    log_if_slow_call(duration=duration, message=message)
 
     return connection
 
@@ -287,7 +248,167 @@ class ConnectionPooler(object):
     if client.get_coordinator_host() is not None and client.get_coordinator_host() != conf.get_coordinator_host():
       conf.update_coordinator_host(client.get_coordinator_host())
 
-    self.pooldict[_get_pool_key(conf)].put(client)
+    origin = self.pooldict[client.pool_key]
+    pool = self.pooldict[_get_pool_key(conf)]
+
+    if pool is origin:
+      pool.checkin(client, self._get_idle_timeout())
+    else:
+      origin.release(client, close=False)
+      pool.adopt(client, self._get_idle_timeout())
+
+  def _get_idle_timeout(self):
+    return self.idle_timeout if self.idle_timeout is not None else THRIFT_POOL_IDLE_TIMEOUT.get()
+
+
+class _EndpointPool(object):
+  """
+  The connections of one endpoint: the idle ones, most recently used last, and a count of the opened ones.
+  """
+
+  def __init__(self, conf, maxsize, can_grow=True):
+    self.key = _get_pool_key(conf)
+    self.service_name = conf.service_name
+    self.host = conf.host
+    self.port = conf.port
+    self.maxsize = maxsize
+    self.can_grow = can_grow
+    self.size = 0
+    self.in_use = 0
+    self.idle = []  # (last used time, client)
+    self.next_cid = 0
+    self.condition = threading.Condition(threading.Lock())
+
+    name = 'thrift.pool.%s' % '.'.join(str(part) for part in (conf.service_name, conf.host, conf.port, conf.get_coordinator_host()) if part)
+    registry = global_registry()
+    registry.gauge_callback(
+        name=name + '.in-use',
+        callback=lambda: self.in_use,
+        label='%s Thrift Connections In Use' % conf.service_name,
+        description='Number of Thrift connections to %s:%s in use' % (conf.host, conf.port),
+        numerator='connections',
+    )
+    registry.gauge_callback(
+        name=name + '.idle',
+        callback=lambda: len(self.idle),
+        label='%s Idle Thrift Connections' % conf.service_name,
+        description='Number of idle Thrift connections to %s:%s' % (conf.host, conf.port),
+        numerator='connections',
+    )
+    self.wait_time = registry.timer(
+        name=name + '.wait-time',
+        label='%s Thrift Connection Wait Time' % conf.service_name,
+        description='Time spent waiting for a Thrift connection to %s:%s' % (conf.host, conf.port),
+        numerator='seconds',
+        counter_numerator='connections',
+        rate_denominator='seconds',
+    )
+
+  def checkout(self, conf, timeout, idle_timeout):
+    start = time.time()
+
+    with self.condition:
+      self._evict(idle_timeout)
+
+      while not self.idle and not self._can_open():
+        has_waited_for = time.time() - start
+        if timeout is not None and has_waited_for >= timeout:
+          raise socket.timeout(
+            ("Timed out after %.2f seconds waiting to retrieve a %s client from the pool.") % (has_waited_for, conf.service_name))
+        message = "Waited %d seconds for a Thrift client to %s:%d %s" % (has_waited_for, conf.host, conf.port, conf.get_coordinator_host())
+        log_if_slow_call(duration=has_waited_for, message=message)
+
+        self.condition.wait(max(min(timeout - has_waited_for, 1), 0) if timeout is not None else 1)
+
+      self.in_use += 1
+      if self.idle:
+        client = self.idle.pop()[1]
+      else:
+        client = None
+        self.size += 1
+        cid = self.next_cid
+        self.next_cid += 1
+
+    try:
+      if client is None:
+        # Opened outside of the lock: only the callers of this endpoint wait for it.
+        client = construct_superclient(conf)
+        client.CID = cid
+        client.pool_key = self.key
+      else:
+        _check_connection(conf, client)
+    except:
+      self.release(client)
+      raise
+
+    return client
+
+  def _can_open(self):
+    # A coordinator pool only gets its connections from the coordinator, but opens one through the endpoint when it
+    # has none left to wait for, e.g. after they all failed their check.
+    return self.size < self.maxsize and (self.can_grow or self.size == 0)
+
+  def checkin(self, client, idle_timeout):
+    with self.condition:
+      self.in_use -= 1
+      self.idle.append((time.time(), client))
+      self._evict(idle_timeout)
+      self.condition.notify()
+
+  def adopt(self, client, idle_timeout):
+    with self.condition:
+      if self.size >= self.maxsize:
+        client.transport.close()
+        return
+      self.size += 1
+      client.pool_key = self.key
+      self.idle.append((time.time(), client))
+      self._evict(idle_timeout)
+      self.condition.notify()
+
+  def release(self, client, close=True):
+    with self.condition:
+      self.in_use -= 1
+      self.size -= 1
+      self.condition.notify()
+    if client is not None and close:
+      try:
+        client.transport.close()
+      except Exception as e:
+        LOG.debug('Failed to close Thrift connection %s: %s' % (client.CID, e))
+
+  def _evict(self, idle_timeout):
+    # Called with the lock held. The least recently used connections are first in the list. The connections of a
+    # coordinator pool are kept as they cannot be reopened to the same coordinator.
+    if not idle_timeout or not self.can_grow:
+      return
+
+    expired = time.time() - idle_timeout
+    while self.idle and self.idle[0][0] < expired:
+      client = self.idle.pop(0)[1]
+      self.size -= 1
+      try:
+        client.transport.close()
+      except Exception as e:
+        LOG.debug('Failed to close idle Thrift connection %s: %s' % (client.CID, e))
+    self.condition.notify_all()
+
+
+def _check_connection(conf, superclient):
+  """
+  Poke the connection to see if it's closed on the other end. This can happen if a connection
+  sits in the connection pool longer than the read timeout of the server.
+  """
+  sock = conf.transport_mode != 'http' and superclient.transport.isOpen() and _grab_transport_from_wrapper(superclient.transport).handle
+  if sock and create_synchronous_io_multiplexer().read([sock]):
+    # the socket is readable, meaning there is either data from a previous call
+    # (i.e our protocol is out of sync), or the connection was shut down on the
+    # remote side. Either way, we need to reopen the connection.
+    # If the socket was closed remotely, btw, socket.read() will return
+    # an empty string.  This is a fairly normal condition, btw, since
+    # there are timeouts on both the server and client sides.
+    superclient.transport.close()
+    superclient.transport.open()
 
 def _get_pool_key(conf):
   """
@@ -436,19 +557,6 @@ class PooledClient(object):
         attr = getattr(superclient, attr_name)
 
         try:
-          # Poke it to see if it's closed on the other end. This can happen if a connection
-          # sits in the connection pool longer than the read timeout of the server.
-          sock = self.conf.transport_mode != 'http' and _grab_transport_from_wrapper(superclient.transport).handle
-          if sock and create_synchronous_io_multiplexer().read([sock]):
-            # the socket is readable, meaning there is either data from a previous call
-            # (i.e our protocol is out of sync), or the connection was shut down on the
-            # remote side. Either way, we need to reopen the connection.
-            # If the socket was closed remotely, btw, socket.read() will return
-            # an empty string.  This is a fairly normal condition, btw, since
-            # there are timeouts on both the server and client sides.
-            superclient.transport.close()
-            superclient.transport.open()
-
           superclient.set_timeout(self.conf.timeout_seconds)
           return attr(*args, **kwargs)
         except TApplicationException as e:
@@ -372,6 +372,105 @@ class TestSuperClient(unittest.TestCase):
       # Could check output for several "Thrift exception; retrying: some error"
 
 
+class TestConnectionPooler(unittest.TestCase):
+
+  def _conf(self, host='hs2.gethue.com'):
+    return thrift_util.ConnectionConfig(Mock(), host, 10000, 'HiveServer2', transport_mode='http')
+
+  def _superclient(self, conf):
+    return Mock(get_coordinator_host=Mock(return_value=None))
+
+  def test_lazy_growth(self):
+    pooler = thrift_util.ConnectionPooler(poolsize=2, idle_timeout=0)
+    conf = self._conf()
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=self._superclient) as construct_superclient:
+      pooler.create_pool(conf)
+      assert_equal(0, construct_superclient.call_count)
+
+      client1 = pooler.get_client(conf)
+      client2 = pooler.get_client(conf)
+      assert_equal(2, construct_superclient.call_count)
+
+      assert_raises(socket.timeout, pooler.get_client, conf, get_client_timeout=0.1)
+
+      pooler.return_client(conf, client1)
+      assert_true(client1 is pooler.get_client(conf))
+      assert_equal(2, construct_superclient.call_count)
+
+      pool = pooler.pooldict[thrift_util._get_pool_key(conf)]
+      assert_equal(2, pool.in_use)
+      assert_equal(0, len(pool.idle))
+
+  def test_failed_connection_frees_slot(self):
+    pooler = thrift_util.ConnectionPooler(poolsize=1, idle_timeout=0)
+    conf = self._conf()
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=Exception('Connection refused')):
+      assert_raises(Exception, pooler.get_client, conf)
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=self._superclient):
+      pooler.get_client(conf, get_client_timeout=0.1)
+
+  def test_idle_eviction(self):
+    pooler = thrift_util.ConnectionPooler(poolsize=2, idle_timeout=0.05)
+    conf = self._conf()
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=self._superclient) as construct_superclient:
+      client = pooler.get_client(conf)
+      pooler.return_client(conf, client)
+      time.sleep(0.1)
+
+      assert_true(client is not pooler.get_client(conf))
+      client.transport.close.assert_called()
+      assert_equal(2, construct_superclient.call_count)
+      assert_equal(1, pooler.pooldict[thrift_util._get_pool_key(conf)].size)
+
+  def test_coordinator_pool(self):
+    pooler = thrift_util.ConnectionPooler(poolsize=2, idle_timeout=0.05)
+    conf = self._conf()
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=self._superclient) as construct_superclient:
+      client = pooler.get_client(conf)
+      client.get_coordinator_host = Mock(return_value='coordinator.gethue.com:25000')
+      pooler.return_client(conf, client)  # Adopted by the pool of the coordinator
+      time.sleep(0.1)
+
+      # Not evicted when idle
+      assert_true(client is pooler.get_client(conf, get_client_timeout=0.1))
+      assert_equal(1, construct_superclient.call_count)
+
+      # Reopened through the endpoint once all its connections are closed
+      pool = pooler.pooldict[thrift_util._get_pool_key(conf)]
+      pool.release(client)
+      assert_equal(0, pool.size)
+      assert_true(client is not pooler.get_client(conf, get_client_timeout=0.1))
+      assert_equal(2, construct_superclient.call_count)
+
+  def test_slow_endpoint_does_not_block_others(self):
+    pooler = thrift_util.ConnectionPooler(poolsize=2, idle_timeout=0)
+    slow_conf, conf = self._conf('slow.gethue.com'), self._conf()
+    connecting, resume = threading.Event(), threading.Event()
+
+    def construct_superclient(conf):
+      if conf.host == 'slow.gethue.com':
+        connecting.set()
+        resume.wait(5)
+      return self._superclient(conf)
+
+    with patch('desktop.lib.thrift_util.construct_superclient', side_effect=construct_superclient):
+      slow = threading.Thread(target=pooler.get_client, args=(slow_conf,))
+      slow.start()
+      connecting.wait(5)
+
+      start = time.time()
+      pooler.get_client(conf)
+      assert_true(time.time() - start < 1)
+
+      resume.set()
+      slow.join()
+
+
 class TestThriftJWT(unittest.TestCase):
   def setUp(self):
     self.sample_token = "some_jwt_token"
@@ -885,7 +885,7 @@ class MetricsMiddleware(MiddlewareMixin):
     self._response_timer = metrics.response_time.time()
     metrics.active_requests.inc()
     if is_gunicorn_report_enabled():
-      global_registry().update_metrics_shared_data()
+      global_registry().start_shared_data_flush(METRICS.COLLECTION_INTERVAL.get() / 1000.0)
 
   def process_exception(self, request, exception):
     self._response_timer.stop()
@@ -894,8 +894,6 @@ class MetricsMiddleware(MiddlewareMixin):
   def process_response(self, request, response):
     self._response_timer.stop()
     metrics.active_requests.dec()
-    if is_gunicorn_report_enabled():
-      global_registry().update_metrics_shared_data()
     return response
 
 
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.20 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_missing_history_summaries(apps, schema_editor):
+    from notebook.api import add_missing_history_summaries
+
+    add_missing_history_summaries(
+        document_model=apps.get_model('desktop', 'Document2'),
+        summary_model=apps.get_model('desktop', 'Document2HistorySummary')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('desktop', '0013_alter_document2_is_trashed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document2HistorySummary',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='history_summary', serialize=False, to='desktop.document2')),
+                ('statement', models.TextField(default='', help_text='Beginning of the statement of the query.')),
+                ('dialect', models.CharField(db_index=True, default='', max_length=32)),
+                ('connector', models.CharField(db_index=True, default='', help_text='Id of the connector of the query.', max_length=64)),
+                ('status', models.CharField(db_index=True, default='', max_length=32)),
+                ('last_executed', models.BigIntegerField(db_index=True, default=-1, help_text='Timestamp in milliseconds.')),
+                ('parent_saved_query_uuid', models.CharField(db_index=True, default='', max_length=36)),
+            ],
+        ),
+        migrations.RunPython(add_missing_history_summaries, migrations.RunPython.noop),
+    ]
@@ -1737,6 +1737,35 @@ class Document2Permission(models.Model):
     return self.is_link_on or user in self.users.all() or self.groups.filter(id__in=user.groups.all()).exists()
 
 
+class Document2HistorySummary(models.Model):
+  """
+  Columns of a history document displayed by the query history, copied from its data when the query is historified
+  and when its status changes. The history is filtered, sorted and paginated on them without parsing the data.
+
+  The documents historified before are summarized in batches by the migration creating the table. The
+  `backfill_history_summaries` command summarizes any left over.
+  """
+  document = models.OneToOneField(Document2, on_delete=models.CASCADE, primary_key=True, related_name='history_summary')
+
+  statement = models.TextField(default='', help_text=_t('Beginning of the statement of the query.'))
+  dialect = models.CharField(default='', max_length=32, db_index=True)
+  connector = models.CharField(default='', max_length=64, db_index=True, help_text=_t('Id of the connector of the query.'))
+  status = models.CharField(default='', max_length=32, db_index=True)
+  last_executed = models.BigIntegerField(default=-1, db_index=True, help_text=_t('Timestamp in milliseconds.'))
+  parent_saved_query_uuid = models.CharField(default='', max_length=36, db_index=True)
+
+  def __str__(self):
+    return force_unicode('%s - %s - %s') % (self.document_id, self.status, self.last_executed)
+
+  def to_dict(self):
+    return {
+      'statement': self.statement,
+      'lastExecuted': self.last_executed,
+      'status': self.status,
+      'parentSavedQueryUuid': self.parent_saved_query_uuid
+    }
+
+
 def get_cluster_config(user):
   return Cluster(user).get_app_config().get_config()
 
@@ -164,6 +164,13 @@ HAS_IAM_DETECTION = Config(
   type=coerce_bool
 )
 
+COPY_PARALLELISM = Config(
+  help=_('Number of keys copied concurrently when copying a directory within S3.'),
+  key='copy_parallelism',
+  default=10,
+  type=int
+)
+
 
 def get_default_get_environment_credentials():
   '''Allow to check if environment credentials are present or not'''
@@ -26,13 +26,15 @@ import re
 import sys
 import time
 
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+
 from boto.exception import BotoClientError, S3ResponseError
 from boto.s3.connection import Location
 from boto.s3.key import Key
 from boto.s3.prefix import Prefix
 
 from aws import s3
-from aws.conf import get_default_region, get_locations, PERMISSION_ACTION_S3, is_raz_s3
+from aws.conf import get_default_region, get_locations, is_raz_s3, COPY_PARALLELISM, PERMISSION_ACTION_S3
 from aws.s3 import normpath, s3file, translate_s3_error, S3A_ROOT
 from aws.s3.s3stat import S3Stat
 
@@ -48,6 +50,9 @@ else:
   from django.utils.translation import ugettext as _
 
 DEFAULT_READ_SIZE = 1024 * 1024  # 1MB
+DELETE_BATCH_SIZE = 1000  # Maximum number of keys of a S3 multi-object delete
+MULTIPART_COPY_THRESHOLD = 5 * 1024 * 1024 * 1024  # 5GB, maximum size of a single S3 copy
+MULTIPART_COPY_PART_SIZE = 512 * 1024 * 1024  # 512MB
 BUCKET_NAME_PATTERN = re.compile(
   "^((?:(?:[a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9_\-]*[a-zA-Z0-9])\.)*(?:[A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9_\-]*[A-Za-z0-9]))$")
 
@@ -368,19 +373,36 @@ class S3FileSystem(object):
           _, dir_key_name = s3.parse_uri(path)[:2]
           dir_keys = key.bucket.list(prefix=dir_key_name)
 
-        if not dir_keys:
+        if not self._delete_keys(key.bucket, dir_keys):
           # Avoid Raz bulk delete issue
           deleted_key = key.delete()
           if deleted_key.exists():
             raise S3FileSystemException('Could not delete key %s' % deleted_key)
-        else:
-          result = key.bucket.delete_keys(list(dir_keys))
-          if result.errors:
-            msg = "%d errors occurred while attempting to delete the following S3 paths:\n%s" % (
-              len(result.errors), '\n'.join(['%s: %s' % (error.key, error.message) for error in result.errors])
-            )
-            LOG.error(msg)
-            raise S3FileSystemException(msg)
+
+  def _delete_keys(self, bucket, keys):
+    """
+    Deletes the listed keys in batches of DELETE_BATCH_SIZE while listing them. Returns the number of keys deleted.
+    """
+    keys = iter(keys)
+    count = 0
+    errors = []
+
+    while True:
+      batch = list(itertools.islice(keys, DELETE_BATCH_SIZE))
+      if not batch:
+        break
+      result = bucket.delete_keys(batch)
+      count += len(batch)
+      errors.extend(result.errors)
+
+    if errors:
+      msg = "%d errors occurred while attempting to delete the following S3 paths:\n%s" % (
+        len(errors), '\n'.join(['%s: %s' % (error.key, error.message) for error in errors])
+      )
+      LOG.error(msg)
+      raise S3FileSystemException(msg)
+
+    return count
 
 
   @translate_s3_error
@@ -488,19 +510,70 @@ class S3FileSystem(object):
     # resulting in 'test1/'.
     if src_st.isDir:
       src_key = self._append_separator(src_key)
-      for key in src_bucket.list(prefix=src_key):
+      self._copy_keys(src_bucket.list(prefix=src_key), src_key, dst_bucket, dst_key, cut)
+    else:
+      key = self._get_key(src)
+      dst_name = posixpath.normpath(s3.join(dst_key, src_key[cut:]))
+      self._copy_key(key, dst_bucket, dst_name)
+
+  def _copy_keys(self, keys, src_key, dst_bucket, dst_key, cut):
+    """
+    Copies the listed keys with a pool of COPY_PARALLELISM threads, while the listing goes on.
+    Directory markers are recognized by their trailing separator in the listing.
+    """
+    parallelism = max(COPY_PARALLELISM.get(), 1)
+
+    count = 0
+    failures = []
+    pending = {}
+
+    def _wait(pending, return_when):
+      done, _ = wait(list(pending), return_when=return_when)
+      for copy in done:
+        key_name = pending.pop(copy)
+        try:
+          copy.result()
+        except Exception as e:
+          LOG.error('Failed to copy key %s: %s' % (key_name, e))
+          failures.append((key_name, e))
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+      for key in keys:
         if not key.name.startswith(src_key):
           raise S3FileSystemException(_("Invalid key to transform: %s") % key.name)
         dst_name = posixpath.normpath(s3.join(dst_key, key.name[cut:]))
 
-        if self.isdir(normpath(self.join(S3A_ROOT, key.bucket.name, key.name))):
+        if key.name.endswith('/'):
           dst_name = self._append_separator(dst_name)
 
-        key.copy(dst_bucket, dst_name)
-    else:
-      key = self._get_key(src)
-      dst_name = posixpath.normpath(s3.join(dst_key, src_key[cut:]))
+        pending[executor.submit(self._copy_key, key, dst_bucket, dst_name)] = key.name
+        count += 1
+
+        if len(pending) >= parallelism * 2:
+          _wait(pending, FIRST_COMPLETED)
+
+      if pending:
+        _wait(pending, ALL_COMPLETED)
+
+    LOG.debug('Copied %d keys with prefix %s' % (count - len(failures), src_key))
+
+    if failures:
+      raise S3FileSystemException(_('Failed to copy %d of %d keys, e.g. %s: %s') % (len(failures), count, failures[0][0], failures[0][1]))
+
+  def _copy_key(self, key, dst_bucket, dst_name):
+    if key.size is None or key.size <= MULTIPART_COPY_THRESHOLD:
       key.copy(dst_bucket, dst_name)
+      return
+
+    multipart = dst_bucket.initiate_multipart_upload(dst_name)
+    try:
+      for part_num, start in enumerate(range(0, key.size, MULTIPART_COPY_PART_SIZE), 1):
+        end = min(start + MULTIPART_COPY_PART_SIZE, key.size) - 1
+        multipart.copy_part_from_key(key.bucket.name, key.name, part_num, start=start, end=end)
+      multipart.complete_upload()
+    except Exception:
+      multipart.cancel_upload()
+      raise
 
   @translate_s3_error
   @auth_error_handler
@@ -137,6 +137,98 @@ class TestS3FileSystem():
         key.bucket.list.assert_called_with(prefix='data/')
         key.bucket.delete_keys.assert_called()
 
+  def test_rmtree_batches_deletes(self):
+    with patch('aws.s3.s3fs.S3FileSystem._get_key') as _get_key:
+      with patch('aws.s3.s3fs.S3FileSystem.isdir') as isdir:
+
+        key = Mock(
+          exists=Mock(return_value=True),
+          bucket=Mock(
+            list=Mock(return_value=('data/%d' % i for i in range(2500))),
+            delete_keys=Mock(
+              return_value=Mock(
+                errors=[]
+              )
+            )
+          )
+        )
+        _get_key.return_value = key
+        isdir.return_value = True
+
+        fs = S3FileSystem(s3_connection=Mock())
+
+        fs.rmtree(path='s3a://gethue/data')
+
+        key.delete.assert_not_called()
+        assert_equal([1000, 1000, 500], [len(call[0][0]) for call in key.bucket.delete_keys.call_args_list])
+
+  def test_rmtree_aggregates_errors(self):
+    with patch('aws.s3.s3fs.S3FileSystem._get_key') as _get_key:
+      with patch('aws.s3.s3fs.S3FileSystem.isdir') as isdir:
+
+        error = Mock(key='data/1', message='Access Denied')
+        key = Mock(
+          exists=Mock(return_value=True),
+          bucket=Mock(
+            list=Mock(return_value=['data/%d' % i for i in range(1500)]),
+            delete_keys=Mock(
+              side_effect=[Mock(errors=[error]), Mock(errors=[error])]
+            )
+          )
+        )
+        _get_key.return_value = key
+        isdir.return_value = True
+
+        fs = S3FileSystem(s3_connection=Mock())
+
+        assert_raises(S3FileSystemException, fs.rmtree, path='s3a://gethue/data')
+        assert_equal(2, key.bucket.delete_keys.call_count)
+
+  def _key(self, name, size=10):
+    key = Mock(size=size, bucket=Mock())
+    key.name = name
+    key.bucket.name = 'gethue'
+    return key
+
+  def test_copy_dir_concurrently(self):
+    fs = S3FileSystem(s3_connection=Mock())
+    keys = [self._key('src/'), self._key('src/a'), self._key('src/dir/'), self._key('src/dir/b')]
+    dst_bucket = Mock()
+
+    with patch('aws.s3.s3fs.S3FileSystem.isdir') as isdir:
+      fs._copy_keys(keys, 'src/', dst_bucket, 'dst', len('src/'))
+
+      isdir.assert_not_called()
+
+    copies = sorted((key.name, key.copy.call_args[0][1]) for key in keys)
+    assert_equal([('src/', 'dst/'), ('src/a', 'dst/a'), ('src/dir/', 'dst/dir/'), ('src/dir/b', 'dst/dir/b')], copies)
+
+  def test_copy_dir_aggregates_failures(self):
+    fs = S3FileSystem(s3_connection=Mock())
+    keys = [self._key('src/%d' % i) for i in range(50)]
+    keys[3].copy.side_effect = Exception('Slow down')
+    keys[7].copy.side_effect = Exception('Slow down')
+
+    assert_raises(S3FileSystemException, fs._copy_keys, keys, 'src/', Mock(), 'dst', len('src/'))
+    for key in keys:
+      key.copy.assert_called()
+
+  def test_copy_large_key_with_multipart(self):
+    fs = S3FileSystem(s3_connection=Mock())
+    key = self._key('src/big', size=6 * 1024 * 1024 * 1024)
+    dst_bucket = Mock()
+
+    fs._copy_key(key, dst_bucket, 'dst/big')
+
+    key.copy.assert_not_called()
+    dst_bucket.initiate_multipart_upload.assert_called_with('dst/big')
+    multipart = dst_bucket.initiate_multipart_upload.return_value
+    assert_equal(12, multipart.copy_part_from_key.call_count)
+    multipart.copy_part_from_key.assert_called_with(
+        'gethue', 'src/big', 12, start=11 * 512 * 1024 * 1024, end=6 * 1024 * 1024 * 1024 - 1
+    )
+    multipart.complete_upload.assert_called()
+
 
 class S3FSTest(S3TestBase):
 
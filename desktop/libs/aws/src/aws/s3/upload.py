@@ -50,7 +50,7 @@ DEFAULT_WRITE_SIZE = 1024 * 1024 * 128  # TODO: set in configuration (currently
 LOG = logging.getLogger()
 
 from desktop.lib.exceptions_renderable import PopupException
-from filebrowser.utils import generate_chunks, calculate_total_size
+from filebrowser.utils import generate_chunks, calculate_total_size, upload_parts
 
 class S3FineUploaderChunkedUpload(object):
   def __init__(self, request, *args, **kwargs):
@@ -91,18 +91,21 @@ class S3FineUploaderChunkedUpload(object):
 
   def upload_chunks(self):
     try:
-      for i, (chunk, total) in enumerate(generate_chunks(self.qquuid, self.qqtotalparts, default_write_size=DEFAULT_WRITE_SIZE), 1):
-        LOG.debug("S3FineUploaderChunkedUpload: uploading file %s, part %d, size %d, dest: %s" %
-                  (self.file_name, i, total, self.destination))
-        self._mp.upload_part_from_file(fp=chunk, part_num=i)
+      upload_parts(generate_chunks(self.qquuid, self.qqtotalparts, default_write_size=DEFAULT_WRITE_SIZE), self._upload_part,
+                   part_size=DEFAULT_WRITE_SIZE)
     except Exception as e:
       self._mp.cancel_upload()
       LOG.exception('Failed to upload file to S3 at %s: %s' % (self.filepath, e))
       raise PopupException("S3FineUploaderChunkedUpload: uploading file %s failed with %s" % (self.filepath, e))
-    finally:
-      # Finish the upload
-      LOG.info("S3FineUploaderChunkedUpload: has completed file upload to S3, total file size is: %d." % self.totalfilesize)
-      self._mp.complete_upload()
+
+    # Finish the upload only once every part is uploaded
+    self._mp.complete_upload()
+    LOG.info("S3FineUploaderChunkedUpload: has completed file upload to S3, total file size is: %d." % self.totalfilesize)
+
+  def _upload_part(self, part_num, chunk, offset):
+    LOG.debug("S3FineUploaderChunkedUpload: uploading file %s, part %d, offset %d, dest: %s" %
+              (self.file_name, part_num, offset, self.destination))
+    self._mp.upload_part_from_file(fp=chunk, part_num=part_num)
 
   def upload(self):
     self.check_access()
@@ -41,7 +41,7 @@ DEFAULT_WRITE_SIZE = 100 * 1024 * 1024 # As per Azure doc, maximum blob size is
 
 LOG = logging.getLogger()
 
-from filebrowser.utils import generate_chunks, calculate_total_size
+from filebrowser.utils import generate_chunks, calculate_total_size, upload_parts
 
 class ABFSFineUploaderChunkedUpload(object):
   def __init__(self, request, *args, **kwargs):
@@ -85,19 +85,23 @@ class ABFSFineUploaderChunkedUpload(object):
 
   def upload_chunks(self):
     try:
-      for i, (chunk, total) in enumerate(generate_chunks(self.qquuid, self.qqtotalparts, default_write_size=DEFAULT_WRITE_SIZE), 1):
-        LOG.debug("ABFSFineUploaderChunkedUpload: uploading file %s, part %d, size %d, dest: %s" %
-                  (self.file_name, i, total, self.destination))
-        self._fs._append(self.target_path, chunk)
+      upload_parts(generate_chunks(self.qquuid, self.qqtotalparts, default_write_size=DEFAULT_WRITE_SIZE), self._upload_part,
+                   part_size=DEFAULT_WRITE_SIZE)
     except Exception as e:
       self._fs.remove(self.target_path)
       LOG.exception('ABFSFineUploaderChunkedUpload: Failed to upload file to ABFS at %s: %s' % (self.target_path, e))
-      raise PopupException("ABFSFineUploaderChunkedUpload: S3FileUploadHandler uploading file %s part: %d failed" % (self.filepath, i))
-    finally:
-      #finish the upload
-      self._fs.flush(self.target_path, {'position': self.totalfilesize})
-      LOG.info("ABFSFineUploaderChunkedUpload: has completed file upload to ABFS, total file size is: %d." % self.totalfilesize)
-      LOG.debug("%s" % self._fs.stats(self.target_path))
+      raise PopupException("ABFSFineUploaderChunkedUpload: uploading file %s failed with %s" % (self.target_path, e))
+
+    # Finish the upload only once every part is appended
+    self._fs.flush(self.target_path, {'position': self.totalfilesize})
+    LOG.info("ABFSFineUploaderChunkedUpload: has completed file upload to ABFS, total file size is: %d." % self.totalfilesize)
+    LOG.debug("%s" % self._fs.stats(self.target_path))
+
+  def _upload_part(self, part_num, chunk, offset):
+    LOG.debug("ABFSFineUploaderChunkedUpload: uploading file %s, part %d, offset %d, dest: %s" %
+              (self.file_name, part_num, offset, self.destination))
+    # Parts are appended at their own position so that they can be sent in any order before the flush
+    self._fs._append(self.target_path, chunk, params={'position': offset})
 
   def upload(self):
     self.check_access()
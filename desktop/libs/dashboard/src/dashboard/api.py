@@ -17,6 +17,7 @@
 
 from builtins import filter
 import hashlib
+import itertools
 import json
 import logging
 import sys
@@ -33,12 +34,12 @@ from libsolr.api import SolrApi
 
 from notebook.connectors.base import get_api
 from notebook.dashboard_api import MockRequest
-from search.conf import SOLR_URL
+from search.conf import SOLR_URL, STREAMING_DOWNLOAD_LIMIT
 
 from dashboard.conf import get_engines, USE_GRIDSTER
 from dashboard.controller import can_edit_index
 from dashboard.dashboard_api import get_engine
-from dashboard.data_export import download as export_download
+from dashboard.data_export import download as export_download, download_documents as export_download_documents
 from dashboard.decorators import allow_viewer_only
 from dashboard.facet_builder import _guess_gap, _zoom_range_facet, _new_range_facet
 from dashboard.models import Collection2, augment_solr_response, pairwise2, augment_solr_exception,\
@@ -298,6 +299,19 @@ def download(request):
     file_format = 'csv' if 'csv' == request.POST.get('type') else 'xls' if 'xls' == request.POST.get('type') else 'json'
     facet = json.loads(request.POST.get('facet', '{}'))
 
+    if file_format != 'json' and not facet:
+      collection = json.loads(request.POST.get('collection', '{}'))
+      query = json.loads(request.POST.get('query', '{}'))
+      limit = STREAMING_DOWNLOAD_LIMIT.get() if STREAMING_DOWNLOAD_LIMIT.get() > 0 else None
+
+      engine = get_engine(request.user, collection, cluster=request.POST.get('cluster', '""'))
+      pages = engine.export_documents(collection, query, limit=limit)
+      if pages is not None:
+        first_page = next(pages, [])  # Query errors are raised before the download starts
+        return export_download_documents(
+            itertools.chain([first_page], pages), file_format, collection, user_agent=request.META.get('HTTP_USER_AGENT')
+        )
+
     json_response = search(request)
     response = json.loads(json_response.content)
 
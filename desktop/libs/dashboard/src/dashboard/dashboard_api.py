@@ -73,4 +73,6 @@ class DashboardApi(object):
 
   def fetch_result(self, collection, query, facet=None): pass
 
+  def export_documents(self, collection, query, limit=None): pass
+
   def get(self, collection, doc_id): pass
@@ -44,33 +44,60 @@ def download(results, format, collection, user_agent=None):
   return export_csvxls.make_response(generator, format, 'query_result', user_agent=user_agent)
 
 
+def download_documents(pages, format, collection, user_agent=None):
+  """
+  download_documents(pages, format) -> HttpResponse
+
+  Stream the pages of documents of a search to the specified format, one page in memory at a time.
+  """
+  if format not in DL_FORMATS:
+    LOG.error('Unknown download format "%s"' % format)
+    return
+
+  content_generator = SearchPagesAdapter(pages, collection)
+  generator = export_csvxls.create_generator(content_generator, format)
+  return export_csvxls.make_response(generator, format, 'query_result', user_agent=user_agent)
+
+
 def SearchDataAdapter(results, format, collection):
   """
   SearchDataAdapter(results, format, db) -> headers, 2D array of data.
   """
   if results and results['response'] and results['response']['docs']:
-    search_data = results['response']['docs']
-
-    if collection['template']['fieldsSelected']:
-      headers = collection['template']['fieldsSelected']
-    else:
-      headers = [field['name'] for field in collection['fields']]
-
-    rows = []
-
-    for data in search_data:
-      row = []
-      for column in headers:
-        if column not in data:
-          row.append("")
-        elif isinstance(data[column], basestring) or isinstance(data[column], (int, long, float, complex)):
-          row.append(data[column])
-        elif isinstance(data[column], list): # Multivalue field
-          row.append([smart_str(val, errors='replace') for val in data[column]])
-        else:
-          row.append(smart_str(data[column]))
-      rows.append(row)
+    headers = _get_headers(collection)
+    rows = [_get_row(data, headers) for data in results['response']['docs']]
   else:
     rows = [[]]
 
   yield headers, rows
+
+
+def SearchPagesAdapter(pages, collection):
+  """
+  SearchPagesAdapter(pages, collection) -> headers, 2D array of data for each page of documents.
+  """
+  headers = _get_headers(collection)
+
+  for docs in pages:
+    yield headers, [_get_row(data, headers) for data in docs]
+
+
+def _get_headers(collection):
+  if collection['template']['fieldsSelected']:
+    return collection['template']['fieldsSelected']
+  else:
+    return [field['name'] for field in collection['fields']]
+
+
+def _get_row(data, headers):
+  row = []
+  for column in headers:
+    if column not in data:
+      row.append("")
+    elif isinstance(data[column], basestring) or isinstance(data[column], (int, long, float, complex)):
+      row.append(data[column])
+    elif isinstance(data[column], list): # Multivalue field
+      row.append([smart_str(val, errors='replace') for val in data[column]])
+    else:
+      row.append(smart_str(data[column]))
+  return row
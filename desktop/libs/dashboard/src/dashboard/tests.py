@@ -29,9 +29,12 @@ from desktop.lib.rest import resource
 from desktop.models import Document2
 from useradmin.models import User
 
+from search.conf import QUERY_CACHE_TTL
+
 from dashboard.facet_builder import _round_number_range
 from dashboard.models import Collection2, augment_response
 from dashboard.controller import DashboardController
+from dashboard.data_export import SearchPagesAdapter
 
 
 QUERY = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
@@ -45,6 +48,23 @@ def test_ranges():
   assert_equal((8000000, 9000000), _round_number_range(9045352))
 
 
+def test_search_pages_adapter():
+  collection = {'template': {'fieldsSelected': ['id', 'tags']}, 'fields': []}
+  fetched = []
+
+  def pages():
+    for i in range(3):
+      fetched.append(i)
+      yield [{'id': '%d' % i, 'tags': ['a', 'b']}, {'id': '%d_1' % i, 'other': 1}]
+
+  adapter = SearchPagesAdapter(pages(), collection)
+
+  assert_equal((['id', 'tags'], [['0', ['a', 'b']], ['0_1', '']]), next(adapter))
+  assert_equal([0], fetched)
+  assert_equal(2, len(list(adapter)))
+  assert_equal([0, 1, 2], fetched)
+
+
 class MockResource(object):
   RESPONSE = None
 
@@ -98,6 +118,7 @@ class TestSearchBase(object):
 
     self.prev_resource = resource.Resource
     resource.Resource = MockResource
+    self.reset = QUERY_CACHE_TTL.set_for_testing(0)  # The mocked responses change between identical queries
 
     self.collection = Collection2(user=self.user, name='collection_1')
 
@@ -133,6 +154,7 @@ class TestSearchBase(object):
   def tearDown(self):
     # Remove monkey patching
     resource.Resource = self.prev_resource
+    self.reset()
 
 
 class TestWithMockedSolr(TestSearchBase):
@@ -510,7 +532,7 @@ class TestWithMockedSolr(TestSearchBase):
         'collection': json.dumps(self._get_collection_param(self.collection)),
         'query': json.dumps(QUERY)
     })
-    xls_response_content = bytes(xls_response.content)
+    xls_response_content = b"".join(xls_response.streaming_content)
     assert_not_equal(0, len(xls_response_content))
     assert_equal('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xls_response['Content-Type'])
     assert_equal('attachment; filename="query_result.xlsx"', xls_response['Content-Disposition'])
@@ -55,6 +55,19 @@ UPLOAD_CHUNK_SIZE = Config(
   type=int,
   default=1024 * 1024 * 128)
 
+COPY_PARALLELISM = Config(
+  key="copy_parallelism",
+  help="Number of files copied concurrently when copying a directory within the same filesystem.",
+  type=int,
+  default=10)
+
+COPY_MAX_BUFFER_SIZE = Config(
+  key="copy_max_buffer_size",
+  help="Maximum number of bytes of the file chunks held in memory by all the concurrent file copies. Copies wait for "
+       "memory to be freed beyond it and stop reading ahead.",
+  type=int,
+  default=1024 * 1024 * 512)
+
 
 def has_hdfs_enabled():
   if has_connectors():
@@ -31,15 +31,91 @@ from nose.plugins.skip import SkipTest
 from nose.tools import assert_false, assert_true, assert_equals, assert_raises, assert_not_equals
 
 from hadoop import pseudo_hdfs4
+from hadoop.conf import COPY_MAX_BUFFER_SIZE, COPY_PARALLELISM, UPLOAD_CHUNK_SIZE
 from hadoop.fs.exceptions import WebHdfsException
 from hadoop.fs.hadoopfs import Hdfs
+from hadoop.fs.webhdfs import COPY_BUFFER, WebHdfs
 from hadoop.pseudo_hdfs4 import is_live_cluster
 from functools import reduce
 
+if sys.version_info[0] > 2:
+  from unittest.mock import patch, Mock
+else:
+  from mock import patch, Mock
+
 
 LOG = logging.getLogger()
 
 
+class TestWebHdfsCopy(object):
+
+  def setUp(self):
+    self.fs = WebHdfs('http://localhost:9870/webhdfs/v1', 'hdfs://localhost:8020')
+    self.files = {
+      '/src/a.txt': b'0123456789',
+      '/src/b.txt': b'',
+      '/src/dir/c.txt': b'abc',
+    }
+    self.written = {}
+
+    self.fs._stats = Mock(side_effect=lambda path: Mock(isDir=path not in self.files, blockSize=1, replication=1, mode=0o100644))
+    self.fs.isdir = Mock(side_effect=lambda path: path in ('/src', '/src/dir'))
+    self.fs.exists = Mock(return_value=False)
+    self.fs.mkdir = Mock()
+    self.fs.listdir_stats = Mock(side_effect=lambda path: [
+      self._stat(name, False) for name in self.files if name.rsplit('/', 1)[0] == path
+    ] + ([self._stat('/src/dir', True)] if path == '/src' else []))
+    self.fs.read = Mock(side_effect=lambda path, offset, length: self.files[path][offset:offset + length])
+    self.fs.create = Mock(side_effect=lambda path, data=None, **kwargs: self.written.__setitem__(path, data))
+    self.fs.append = Mock(side_effect=lambda path, data: self.written.__setitem__(path, self.written[path] + data))
+
+
+  def _stat(self, path, is_dir):
+    stat = Mock(path=path, isDir=is_dir)
+    stat.name = path.rsplit('/', 1)[1]
+    return stat
+
+
+  def test_copy_remote_dir(self):
+    finish = [UPLOAD_CHUNK_SIZE.set_for_testing(4), COPY_PARALLELISM.set_for_testing(2)]
+    try:
+      self.fs.copy_remote_dir('/src', '/dst', owner='test')
+    finally:
+      for f in finish:
+        f()
+
+    assert_equals({'/dst/a.txt': b'0123456789', '/dst/b.txt': b'', '/dst/dir/c.txt': b'abc'}, self.written)
+
+
+  def test_copy_remote_dir_bounded_buffer(self):
+    buffer_sizes = []
+    read = self.fs.read.side_effect
+    self.fs.read.side_effect = lambda *args: buffer_sizes.append(COPY_BUFFER.size) or read(*args)
+
+    finish = [UPLOAD_CHUNK_SIZE.set_for_testing(4), COPY_PARALLELISM.set_for_testing(3), COPY_MAX_BUFFER_SIZE.set_for_testing(8)]
+    try:
+      self.fs.copy_remote_dir('/src', '/dst', owner='test')
+    finally:
+      for f in finish:
+        f()
+
+    assert_equals({'/dst/a.txt': b'0123456789', '/dst/b.txt': b'', '/dst/dir/c.txt': b'abc'}, self.written)
+    assert_true(max(buffer_sizes) <= 8, buffer_sizes)
+    assert_equals(0, COPY_BUFFER.size)
+
+
+  def test_copy_remote_dir_failure(self):
+    self.fs.append = Mock(side_effect=WebHdfsException('Write error'))
+
+    finish = UPLOAD_CHUNK_SIZE.set_for_testing(4)
+    try:
+      assert_raises(WebHdfsException, self.fs.copy_remote_dir, '/src', '/dst', owner='test')
+    finally:
+      finish()
+
+    assert_equals(set(['/dst/a.txt', '/dst/b.txt', '/dst/dir/c.txt']), set(self.written))
+
+
 class WebhdfsTests(unittest.TestCase):
   requires_hadoop = True
   integration = True
@@ -32,6 +32,8 @@ import threading
 import time
 import urllib.request, urllib.error
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from django.utils.encoding import smart_str
 
 import hadoop.conf
@@ -276,6 +278,35 @@ class WebHdfs(Hdfs):
     filestatus_list = json['FileStatuses']['FileStatus']
     return [WebHdfsStat(st, path) for st in filestatus_list]
 
+  def listdir_stats_batches(self, path):
+    """
+    listdir_stats_batches(path) -> iterator of [ WebHdfsStat ]
+
+    Get directory listing with stats, one batch of the NameNode (dfs.ls.limit entries) at a time.
+    Falls back to a single listing when LISTSTATUS_BATCH is not supported.
+    """
+    path = self.strip_normpath(path)
+    params = self._getparams()
+    params['op'] = 'LISTSTATUS_BATCH'
+    headers = self._getheaders()
+
+    while True:
+      try:
+        json = self._root.get(path, params, headers)
+      except WebHdfsException as e:
+        if 'startAfter' not in params and 'LISTSTATUS_BATCH' in str(e):
+          yield self.listdir_stats(path)
+          return
+        raise
+
+      listing = json['DirectoryListing']
+      filestatus_list = listing['partialListing']['FileStatuses']['FileStatus']
+      yield [WebHdfsStat(st, path) for st in filestatus_list]
+
+      if not listing.get('remainingEntries') or not filestatus_list:
+        break
+      params['startAfter'] = filestatus_list[-1]['pathSuffix']
+
   def listdir(self, path, glob=None):
     """
     listdir(path, glob=None) -> [ entry names ]
@@ -729,6 +760,9 @@ class WebHdfs(Hdfs):
     if self.isdir(dst):
       raise IOError(errno.INVAL, _("Copy dst '%s' is a directory") % dst)
 
+    if not skip_header:
+      return self._copyfile_pipelined(src, dst, sb)
+
     offset = 0
 
     while True:
@@ -759,13 +793,100 @@ class WebHdfs(Hdfs):
       offset += cnt
 
 
+  def _copyfile_pipelined(self, src, dst, sb):
+    """
+    Copies the file chunk by chunk, reading the next chunk while the current one is being written.
+    At most two chunks are in memory at the same time, the second one only while the chunks of all the copies fit in
+    COPY_MAX_BUFFER_SIZE.
+    """
+    chunk_size = self.get_upload_chuck_size()
+    offset = 0
+
+    with ThreadPoolExecutor(max_workers=1) as reader:
+      COPY_BUFFER.acquire(chunk_size)
+      try:
+        next_chunk = reader.submit(self.do_as_user, self.user, self.read, src, offset, chunk_size)
+
+        while True:
+          data = next_chunk.result()
+          cnt = len(data)
+
+          next_chunk = None
+          read_ahead = cnt >= chunk_size and COPY_BUFFER.acquire(chunk_size, blocking=False)
+          if read_ahead:
+            next_chunk = reader.submit(self.do_as_user, self.user, self.read, src, offset + cnt, chunk_size)
+
+          try:
+            if offset == 0:
+              self.create(dst,
+                          overwrite=True,
+                          blocksize=sb.blockSize,
+                          replication=sb.replication,
+                          permission=oct(stat.S_IMODE(sb.mode)),
+                          data=data)
+            else:
+              self.append(dst, data)
+          finally:
+            data = None
+            if read_ahead:
+              COPY_BUFFER.release(chunk_size)
+
+          if cnt < chunk_size:
+            break
+
+          offset += cnt
+
+          if next_chunk is None:
+            next_chunk = reader.submit(self.do_as_user, self.user, self.read, src, offset, chunk_size)
+      finally:
+        COPY_BUFFER.release(chunk_size)
+
+
   def copy_remote_dir(self, source, destination, dir_mode=None, owner=None):
+    """
+    Copies the content of a directory. The directory tree is created first, then the files are copied by a pool of
+    COPY_PARALLELISM threads. A failed file does not stop the copy of the other ones, the failures being reported
+    at the end in a single exception.
+    """
     if owner is None:
       owner = self.DEFAULT_USER
 
     if dir_mode is None:
       dir_mode = self.getDefaultDirPerms()
 
+    files = []
+    self._copy_remote_dir_tree(source, destination, dir_mode, owner, files)
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(hadoop.conf.COPY_PARALLELISM.get(), 1)) as executor:
+      copies = dict(
+        (executor.submit(self.do_as_user, owner, self.copyfile, source_file, destination_file), (source_file, destination_file))
+        for source_file, destination_file in files
+      )
+
+      for count, future in enumerate(as_completed(copies), 1):
+        source_file, destination_file = copies[future]
+        try:
+          future.result()
+          LOG.debug('Copied %s to %s (%d/%d)' % (source_file, destination_file, count, len(files)))
+        except Exception as e:
+          LOG.error('Failed to copy %s to %s (%d/%d): %s' % (source_file, destination_file, count, len(files), e))
+          failures.append((source_file, e))
+
+    if failures:
+      raise WebHdfsException(
+        _('Failed to copy %(failures)d of %(files)d files from %(source)s to %(destination)s, e.g. %(file)s: %(error)s') % {
+          'failures': len(failures),
+          'files': len(files),
+          'source': source,
+          'destination': destination,
+          'file': failures[0][0],
+          'error': failures[0][1]
+        }
+      )
+
+
+  def _copy_remote_dir_tree(self, source, destination, dir_mode, owner, files):
     if not self.exists(destination):
       self.do_as_user(owner, self.mkdir, destination, mode=dir_mode)
 
@@ -773,9 +894,9 @@ class WebHdfs(Hdfs):
       source_file = stat.path
       destination_file = posixpath.join(destination, stat.name)
       if stat.isDir:
-        self.copy_remote_dir(source_file, destination_file, dir_mode, owner)
+        self._copy_remote_dir_tree(source_file, destination_file, dir_mode, owner, files)
       else:
-        self.do_as_user(owner, self.copyfile, source_file, destination_file)
+        files.append((source_file, destination_file))
 
 
   def copy(self, src, dest, recursive=False, dir_mode=None, owner=None):
@@ -946,6 +1067,34 @@ class WebHdfs(Hdfs):
     return None
 
 
+class CopyBuffer(object):
+  """
+  Number of bytes of the file chunks held in memory by the copies of all the threads, bounded by COPY_MAX_BUFFER_SIZE.
+  A chunk larger than the bound is still accepted when no other chunk is held.
+  """
+
+  def __init__(self):
+    self.size = 0
+    self._condition = threading.Condition()
+
+  def acquire(self, size, blocking=True):
+    with self._condition:
+      while self.size and self.size + size > hadoop.conf.COPY_MAX_BUFFER_SIZE.get():
+        if not blocking:
+          return False
+        self._condition.wait()
+      self.size += size
+      return True
+
+  def release(self, size):
+    with self._condition:
+      self.size -= size
+      self._condition.notify_all()
+
+
+COPY_BUFFER = CopyBuffer()
+
+
 class File(object):
   """
   DEPRECATED!
@@ -19,13 +19,17 @@ from future import standard_library
 standard_library.install_aliases()
 from builtins import next
 import logging
+import re
 import sys
 import threading
 import time
 import urllib.parse
 import heapq
 
+from lxml import html
+
 from desktop.lib.rest.http_client import HttpClient
+from desktop.lib.rest.resource import Resource
 
 from hadoop import cluster
 
@@ -38,6 +42,9 @@ LOG = logging.getLogger()
 
 MAX_HEAP_SIZE = 20
 
+LOG_WINDOW_BYTES = 1024 * 1024  # Most bytes of a container log held in memory at once
+LOG_RANGE_HEADER = re.compile(r'Showing (\d+) bytes of (\d+) total\. Click here for (?:the )?full log\.?')
+
 _log_client_heap = []
 _log_client_lock = threading.Lock()
 
@@ -76,3 +83,78 @@ def get_log_client(log_link):
     return client
   finally:
     _log_client_lock.release()
+
+
+def get_log_range(log_link, name=None, username=None, offset=0, length=None):
+  """
+  Reads a byte range of a container log page of a NodeManager or of the JobHistory Server.
+
+  The range starts at the offset, or reads the end of the log when the offset is negative, and is capped by
+  length and LOG_WINDOW_BYTES. Returns the text of the range with its 'offset' and 'end' in bytes and the 'total'
+  size of the log: reading again from 'end' follows a running container.
+  """
+  offset = int(offset or 0)
+  window = min(int(length), LOG_WINDOW_BYTES) if length else LOG_WINDOW_BYTES
+
+  params = {}
+  if username:
+    params['doAs'] = username
+  if offset < 0:
+    params['start'] = max(offset, -window)
+  else:
+    params['start'] = offset
+    params['end'] = offset + window
+
+  root = Resource(get_log_client(log_link), lib_urlsplit(log_link)[2], urlencode=False)
+  response = root.get('/%s/' % name if name else '', params=params)
+  content = html.fromstring(response, parser=html.HTMLParser()).xpath('/html/body/table/tbody/tr/td[2]')[0]
+
+  header = None
+  for element in content.iterdescendants():
+    header = element.tag != 'pre' and LOG_RANGE_HEADER.search(element.text_content())
+    if header:
+      if not (element.tail or '').strip():
+        element.tail = None
+      element.drop_tree()
+      break
+  log = content.text_content()
+
+  if header:
+    size = int(header.group(1))
+    total = int(header.group(2))
+    start = max(total + params['start'], 0) if offset < 0 else min(offset, total)
+  else:
+    # The whole log from the start was returned
+    size = len(log.encode('utf-8'))
+    start = max(offset, 0)
+    total = start + size
+
+  return {
+    'log': log,
+    'offset': start,
+    'end': min(start + size, total),
+    'total': total
+  }
+
+
+def iter_log(log_link, name=None, username=None, offset=0, length=None):
+  """
+  Yields the successive ranges of a container log until its end or length bytes, one window at a time.
+  """
+  offset = int(offset or 0)
+  if offset < 0:
+    offset = max(get_log_range(log_link, name, username, 0, 1)['total'] + offset, 0)
+
+  remaining = int(length) if length else None
+
+  while remaining is None or remaining > 0:
+    log_range = get_log_range(log_link, name, username, offset, remaining)
+    if log_range['log']:
+      yield log_range['log']
+
+    read = log_range['end'] - log_range['offset']
+    if read <= 0 or log_range['end'] >= log_range['total']:
+      break
+    if remaining is not None:
+      remaining -= read
+    offset = log_range['end']
@@ -29,15 +29,11 @@ from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.rest.http_client import HttpClient
 from desktop.lib.rest.resource import Resource
 from hadoop import cluster
-from hadoop.yarn.clients import get_log_client
-
-from lxml import html
+from hadoop.yarn.clients import get_log_range
 
 if sys.version_info[0] > 2:
-  from urllib.parse import urlsplit as lib_urlsplit
   from django.utils.translation import gettext as _
 else:
-  from urlparse import urlsplit as lib_urlsplit
   from django.utils.translation import ugettext as _
 
 LOG = logging.getLogger()
@@ -140,33 +136,28 @@ class SparkHistoryServerApi(object):
   def download_attempt_logs(self, app_id, attempt_id):
     return self._root.get('applications/%(app_id)s/%(attempt_id)s/logs' % {'app_id': app_id, 'attempt_id': attempt_id}, headers=self.headers)
 
-  def download_executors_logs(self, request, job, name, offset):
+  def download_executors_logs(self, request, job, name, offset, length=None):
     log_links = self.get_executors_loglinks(job)
 
-    return self.retrieve_log_content(log_links, name, request.user.username, offset)
-
-  def download_executor_logs(self, user, executor, name, offset):
-    return self.retrieve_log_content(executor['logs'], name, user.username, offset)
+    return self.retrieve_log_content(log_links, name, request.user.username, offset, length)
 
-  def retrieve_log_content(self, log_links, log_name, username, offset):
-    params = {
-      'doAs': username
-    }
+  def download_executor_logs(self, user, executor, name, offset, length=None):
+    return self.retrieve_log_content(executor['logs'], name, user.username, offset, length)
 
-    if offset != 0:
-      params['start'] = offset
+  def retrieve_log_content(self, log_links, log_name, username, offset, length=None):
+    return self.retrieve_log_range(log_links, log_name, username, offset, length)['log']
 
+  def retrieve_log_range(self, log_links, log_name, username, offset, length=None):
+    """
+    Byte range of the stdout or stderr log of an executor, see hadoop.yarn.clients.get_log_range().
+    """
     if not log_name or not log_name == 'stderr':
       log_name = 'stdout'
 
-    log = ''
     if log_links and log_name in log_links:
-      log_link = log_links[log_name]
-
-      root = Resource(get_log_client(log_link), lib_urlsplit(log_link)[2], urlencode=False)
-      response = root.get('', params=params)
-      log = html.fromstring(response, parser=html.HTMLParser()).xpath('/html/body/table/tbody/tr/td[2]')[0].text_content()
-    return log
+      return get_log_range(log_links[log_name], username=username, offset=offset, length=length)
+    else:
+      return {'log': '', 'offset': 0, 'end': 0, 'total': 0}
 
   def get_executors_loglinks(self, job):
     executor = None
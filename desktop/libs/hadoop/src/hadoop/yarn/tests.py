@@ -17,6 +17,7 @@
 
 from builtins import object
 import logging
+import sys
 
 from nose.tools import assert_true, assert_equal, assert_not_equal
 
@@ -24,6 +25,10 @@ from hadoop.yarn import clients
 from hadoop.yarn import mapreduce_api
 from hadoop.yarn.mapreduce_api import MapreduceApi, get_mapreduce_api
 
+if sys.version_info[0] > 2:
+  from unittest.mock import patch
+else:
+  from mock import patch
 
 
 LOG = logging.getLogger()
@@ -53,6 +58,76 @@ def test_get_log_client():
     clients.MAX_HEAP_SIZE = old_max_heap_size
 
 
+class MockContainerLogPage(object):
+  """
+  Container log page of a NodeManager, which returns the [start, end) byte range of the log.
+  """
+
+  def __init__(self, log):
+    self.log = log
+    self.requests = []
+
+  def __call__(self, client, path, urlencode=True):
+    return self
+
+  def get(self, relpath, params):
+    self.requests.append(params)
+    length = len(self.log)
+    start = params.get('start', -4096)
+    start = max(length + start if start < 0 else start, 0)
+    end = params.get('end', length)
+    end = length if end < 0 else end
+
+    header = ''
+    if end - start < length:
+      header = '<p>Showing %d bytes of %d total. Click <a href="?start=0">here</a> for the full log.</p>' % (end - start, length)
+
+    return '<html><body><table><tbody><tr><td>nav</td><td>%s<pre>%s</pre></td></tr></tbody></table></body></html>' % (
+        header, self.log[start:end]
+    )
+
+
+def test_get_log_range():
+  page = MockContainerLogPage(''.join('line %d\n' % i for i in range(1000)))  # 8890 bytes
+
+  with patch('hadoop.yarn.clients.Resource', page):
+    with patch('hadoop.yarn.clients.get_log_client'):
+      log_range = clients.get_log_range('http://nm:8042/node/containerlogs/container_1/test', 'stdout', 'test', offset=0, length=7)
+
+      assert_equal({'log': 'line 0\n', 'offset': 0, 'end': 7, 'total': 8890}, log_range)
+      assert_equal({'doAs': 'test', 'start': 0, 'end': 7}, page.requests[-1])
+
+      # Tail then follow
+      log_range = clients.get_log_range('http://nm:8042/node/containerlogs/container_1/test', 'stdout', offset=-9)
+      assert_equal({'log': 'line 999\n', 'offset': 8881, 'end': 8890, 'total': 8890}, log_range)
+      assert_equal({'start': -9}, page.requests[-1])
+
+      page.log += 'line 1000\n'
+      log_range = clients.get_log_range('http://nm:8042/node/containerlogs/container_1/test', 'stdout', offset=log_range['end'])
+      assert_equal({'log': 'line 1000\n', 'offset': 8890, 'end': 8900, 'total': 8900}, log_range)
+
+      # Never more than a window
+      with patch('hadoop.yarn.clients.LOG_WINDOW_BYTES', 100):
+        log_range = clients.get_log_range('http://nm:8042/node/containerlogs/container_1/test', 'stdout', offset=-1000000)
+        assert_equal((8800, 8900), (log_range['offset'], log_range['end']))
+        assert_equal({'start': -100}, page.requests[-1])
+
+
+def test_iter_log():
+  log = ''.join('line %d\n' % i for i in range(1000))
+  page = MockContainerLogPage(log)
+
+  with patch('hadoop.yarn.clients.Resource', page):
+    with patch('hadoop.yarn.clients.get_log_client'):
+      with patch('hadoop.yarn.clients.LOG_WINDOW_BYTES', 1000):
+        assert_equal(log, ''.join(clients.iter_log('http://nm:8042/node/containerlogs/container_1/test', 'syslog')))
+        assert_equal(9, len(page.requests))
+
+        log_url = 'http://nm:8042/node/containerlogs/container_1/test'
+        assert_equal(log[-1500:], ''.join(clients.iter_log(log_url, 'syslog', offset=-1500)))
+        assert_equal(log[10:2010], ''.join(clients.iter_log(log_url, 'syslog', offset=10, length=2000)))
+
+
 class MapreduceAPIMock(MapreduceApi):
   EXPECTED_USERNAME = None
 
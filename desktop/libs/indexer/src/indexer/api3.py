@@ -20,7 +20,7 @@ standard_library.install_aliases()
 
 from builtins import zip
 from past.builtins import basestring
-import csv
+import itertools
 import json
 import logging
 import urllib.error
@@ -44,7 +44,6 @@ except ImportError:
 from desktop.lib.django_util import JsonResponse
 from desktop.lib.exceptions_renderable import PopupException
 from desktop.lib.i18n import smart_unicode
-from desktop.lib.python_util import check_encoding
 from desktop.models import Document2
 from filebrowser.forms import UploadLocalFileForm
 from kafka.kafka_api import get_topics, get_topic_data
@@ -61,9 +60,11 @@ from indexer.indexers.flink_sql import FlinkIndexer
 from indexer.indexers.morphline import MorphlineIndexer, _create_solr_collection
 from indexer.indexers.phoenix_sql import PhoenixIndexer
 from indexer.indexers.rdbms import run_sqoop, _get_api
+from indexer.indexers.solr_stream import file_batches, index_batches
 from indexer.indexers.sql import _create_database, _create_table, _create_table_from_local
 from indexer.models import _save_pipeline
-from indexer.solr_client import SolrClient, MAX_UPLOAD_SIZE
+from indexer.sampling import get_file_sample, get_local_file_sample
+from indexer.solr_client import SolrClient
 from indexer.indexers.flume import FlumeIndexer
 
 
@@ -160,10 +161,10 @@ def guess_format(request):
     if not request.fs.isfile(path):
       raise PopupException(_('Path %(path)s is not a file') % file_format)
 
-    stream = request.fs.open(path)
+    sample = get_file_sample(request.fs, path)
     format_ = indexer.guess_format({
       "file": {
-        "stream": stream,
+        "stream": sample.stream(),
         "name": path
       }
     })
@@ -265,33 +266,30 @@ def guess_field_types(request):
   if file_format['inputFormat'] == 'localfile':
     path = urllib_unquote(file_format['path'])
 
-    with open(path, 'r') as local_file:
+    csv_data = list(itertools.islice(get_local_file_sample(path).rows(), 5))
 
-      reader = csv.reader(local_file)
-      csv_data = list(reader)
-
-      if file_format['format']['hasHeader']:
-        sample = csv_data[1:5]
-        column_row = [re.sub('[^0-9a-zA-Z]+', '_', col) for col in csv_data[0]]
-      else:
-        sample = csv_data[:4]
-        column_row = ['field_' + str(count+1) for count, col in enumerate(sample[0])]
+    if file_format['format']['hasHeader']:
+      sample = csv_data[1:5]
+      column_row = [re.sub('[^0-9a-zA-Z]+', '_', col) for col in csv_data[0]]
+    else:
+      sample = csv_data[:4]
+      column_row = ['field_' + str(count+1) for count, col in enumerate(sample[0])]
 
-      field_type_guesses = []
-      for count, col in enumerate(column_row):
-        column_samples = [sample_row[count] for sample_row in sample if len(sample_row) > count]
-        field_type_guess = guess_field_type_from_samples(column_samples)
-        field_type_guesses.append(field_type_guess)
+    field_type_guesses = []
+    for count, col in enumerate(column_row):
+      column_samples = [sample_row[count] for sample_row in sample if len(sample_row) > count]
+      field_type_guess = guess_field_type_from_samples(column_samples)
+      field_type_guesses.append(field_type_guess)
 
-      columns = [
-        Field(column_row[count], field_type_guesses[count]).to_dict()
-        for count, col in enumerate(column_row)
-      ]
+    columns = [
+      Field(column_row[count], field_type_guesses[count]).to_dict()
+      for count, col in enumerate(column_row)
+    ]
 
-      format_ = {
-        'columns': columns,
-        'sample': sample
-      }
+    format_ = {
+      'columns': columns,
+      'sample': sample
+    }
 
   elif file_format['inputFormat'] == 'file':
     indexer = MorphlineIndexer(request.user, request.fs)
@@ -299,15 +297,14 @@ def guess_field_types(request):
 
     if path[-3:] == 'xls' or path[-4:] == 'xlsx':
       path = excel_to_csv_file_name_change(path)
-    stream = request.fs.open(path)
-    encoding = check_encoding(stream.read(10000))
+    sample = get_file_sample(request.fs, path)
+    encoding = sample.encoding
     LOG.debug('File %s encoding is %s' % (path, encoding))
-    stream.seek(0)
     _convert_format(file_format["format"], inverse=True)
 
     format_ = indexer.guess_field_types({
       "file": {
-          "stream": stream,
+          "stream": sample.stream(),
           "name": path
         },
       "format": file_format['format']
@@ -463,8 +460,7 @@ def importer_submit(request):
       if path[-3:] == 'xls' or path[-4:] == 'xlsx':
         path = excel_to_csv_file_name_change(path)
       source['path'] = request.fs.netnormpath(path)
-      stream = request.fs.open(path)
-      file_encoding = check_encoding(stream.read(10000))
+      file_encoding = get_file_sample(request.fs, path, size=10000).encoding
 
   if destination['ouputFormat'] in ('database', 'table') and request.fs is not None:
     destination['nonDefaultLocation'] = request.fs.netnormpath(destination['nonDefaultLocation']) \
@@ -612,12 +608,6 @@ def _small_indexing(user, fs, client, source, destination, index_name):
   kwargs = {}
   errors = []
 
-  if source['inputFormat'] not in ('manual', 'table', 'query_handle'):
-    path = source["path"]
-    stats = fs.stats(path)
-    if stats.size > MAX_UPLOAD_SIZE:
-      raise PopupException(_('File size is too large to handle!'))
-
   indexer = MorphlineIndexer(user, fs)
 
   fields = indexer.get_field_list(destination['columns'])
@@ -625,13 +615,16 @@ def _small_indexing(user, fs, client, source, destination, index_name):
 
   if source['inputFormat'] == 'file':
     kwargs['separator'] = source['format']['fieldSeparator']
-    path = source["path"]
-    data = fs.read(path, 0, MAX_UPLOAD_SIZE)
 
   if client.is_solr_six_or_more():
     kwargs['processor'] = 'tolerant'
     kwargs['map'] = 'NULL:'
 
+  def on_progress(progress):
+    LOG.info('Indexed %(rows)s rows in %(batches)s batches into %(index_name)s, %(failed_batches)s batches failed' % dict(
+      progress, index_name=index_name
+    ))
+
   try:
     if source['inputFormat'] == 'query':
       query_id = source['query']['id'] if source['query'].get('id') else source['query']
@@ -651,18 +644,29 @@ def _small_indexing(user, fs, client, source, destination, index_name):
           rows=rows,
           start_over=start_over
       )
-      rows = searcher.update_data_from_hive(
+      progress = searcher.update_data_from_hive(
           index_name,
           columns,
           fetch_handle=fetch_handle,
-          indexing_options=kwargs
+          indexing_options=kwargs,
+          on_progress=on_progress
       )
-      # TODO if rows == MAX_ROWS truncation warning
+      errors = [error['message'] for error in progress['errors']]
     elif source['inputFormat'] == 'manual':
       pass # No need to do anything
     else:
-      response = client.index(name=index_name, data=data, **kwargs)
-      errors = [error.get('message', '') for error in response['responseHeader'].get('errors', [])]
+      fh = fs.open(source['path'])
+      try:
+        progress = index_batches(
+            client,
+            index_name,
+            file_batches(fh, encapsulator=source['format'].get('quoteChar', '"')),
+            indexing_options=kwargs,
+            on_progress=on_progress
+        )
+      finally:
+        fh.close()
+      errors = [error['message'] for error in progress['errors']]
   except Exception as e:
     try:
       client.delete_index(index_name, keep_config=False)
@@ -120,7 +120,8 @@ def test_guess_format_excel_remote_file():
         }
         file_format = json.dumps(file_format)
         request = Mock(
-          POST={'fileFormat': file_format}
+          POST={'fileFormat': file_format},
+          fs=Mock(read=Mock(return_value=b'a,b\n1,2\n'))
         )
 
         response = guess_format(request)
@@ -151,6 +151,20 @@ ENABLE_DIRECT_UPLOAD = Config(
   default=False
 )
 
+INDEXING_BATCH_SIZE = Config(
+  key="indexing_batch_size",
+  help=_t("Size in bytes of the batches of rows sent to Solr when indexing a file or the result of a query."),
+  type=int,
+  default=10 * 1024 * 1024
+)
+
+INDEXING_PARALLELISM = Config(
+  key="indexing_parallelism",
+  help=_t("Number of batches sent to Solr at the same time when indexing a file or the result of a query."),
+  type=int,
+  default=4
+)
+
 # Unused
 BATCH_INDEXER_PATH = Config(
   key="batch_indexer_path",
@@ -19,13 +19,10 @@
 from builtins import object
 import json
 import logging
-import numbers
 import os
 import shutil
 import sys
 
-import tablib
-
 from desktop.lib.exceptions_renderable import PopupException
 from dashboard.models import Collection2
 from libsolr.api import SolrApi
@@ -33,6 +30,7 @@ from libzookeeper.models import ZookeeperClient
 from search.conf import SOLR_URL, SECURITY_ENABLED
 
 from indexer.conf import CORE_INSTANCE_DIR
+from indexer.indexers.solr_stream import index_batches, query_batches
 from indexer.utils import copy_configs, field_values_from_log, field_values_from_separated_file
 from indexer.solr_client import SolrClient
 
@@ -274,33 +272,22 @@ class CollectionManagerController(object):
     else:
       raise PopupException(_('Could not update index. Indexing strategy %s not supported.') % indexing_strategy)
 
-  def update_data_from_hive(self, collection_or_core_name, columns, fetch_handle, indexing_options=None):
-    MAX_ROWS = 10000
-    FETCH_BATCH = 1000
-
-    row_count = 0
-    has_more = True
-    if indexing_options is None:
-      indexing_options = {}
-
+  def update_data_from_hive(self, collection_or_core_name, columns, fetch_handle, indexing_options=None, on_progress=None):
+    """
+    Index all the rows of a query handle, in batches sent concurrently to Solr.
+    Returns the progress of the indexing with the number of rows indexed and the errors of each batch.
+    """
     client = SolrClient(self.user)
 
     try:
-      while row_count < MAX_ROWS and has_more:
-        result = fetch_handle(FETCH_BATCH, row_count == 0)
-        has_more = result['has_more']
-
-        if result['data']:
-          dataset = tablib.Dataset()
-          dataset.append(columns)
-          for i, row in enumerate(result['data']):
-            dataset.append([cell if cell else (0 if isinstance(cell, numbers.Number) else '') for cell in row])
-
-          if not client.index(name=collection_or_core_name, data=dataset.csv, **indexing_options):
-            raise PopupException(_('Could not index the data. Check error logs for more info.'))
-
-        row_count += len(dataset)
+      return index_batches(
+          client,
+          collection_or_core_name,
+          query_batches(fetch_handle, columns),
+          indexing_options=indexing_options,
+          on_progress=on_progress
+      )
+    except PopupException:
+      raise
     except Exception as e:
       raise PopupException(_('Could not update index: %s') % e)
-
-    return row_count
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming indexing of a file or of the result of a query into Solr.
+
+The source is read in CSV batches of about INDEXING_BATCH_SIZE bytes which are posted to Solr by INDEXING_PARALLELISM
+threads. The next batch is only read once a thread is free, so at most INDEXING_PARALLELISM + 1 batches are in memory
+whatever the number of rows. The batches are committed once at the end.
+"""
+
+import csv
+import io
+import logging
+import numbers
+import sys
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from desktop.lib.exceptions_renderable import PopupException
+
+from indexer.conf import INDEXING_BATCH_SIZE, INDEXING_PARALLELISM
+
+if sys.version_info[0] > 2:
+  from django.utils.translation import gettext as _
+else:
+  from django.utils.translation import ugettext as _
+
+
+LOG = logging.getLogger()
+
+FETCH_BATCH = 1000
+MAX_FAILED_BATCHES = 10
+MAX_ERRORS = 100
+
+
+def file_batches(fh, batch_size=None, encapsulator='"'):
+  """
+  Yields the (csv, row count) batches of a CSV file, each one starting with the header line of the file.
+
+  Batches are only cut at the end of a record, i.e. on a new line outside of a quoted value.
+  """
+  batch_size = batch_size or INDEXING_BATCH_SIZE.get()
+  encapsulator = encapsulator.encode('utf-8') if encapsulator else b''
+
+  header = None
+  data = b''
+  scanned = 0  # Offset in data of the first character not looked at yet
+  record_end = 0  # Offset in data of the end of the last complete record
+  rows = 0
+  in_quotes = False
+
+  while True:
+    chunk = fh.read(batch_size) or b''  # WebHdfs returns '' past the end of the file
+    data += chunk
+
+    while True:
+      newline = data.find(b'\n', scanned)
+      if newline < 0:
+        break
+      if encapsulator and data.count(encapsulator, scanned, newline) % 2:
+        in_quotes = not in_quotes
+      scanned = newline + 1
+      if not in_quotes:
+        if header is None:
+          header = data[:scanned]
+          data = data[scanned:]
+          scanned = 0
+        else:
+          if data[record_end:newline].strip():
+            rows += 1
+          record_end = scanned
+
+    if not chunk:
+      break
+
+    if record_end:
+      yield header + data[:record_end], rows
+      data = data[record_end:]
+      scanned -= record_end
+      record_end = rows = 0
+
+  if header is None:
+    header, data = data, b''
+  elif data.strip():
+    rows += 1
+    record_end = len(data)
+
+  if record_end:
+    yield header + data[:record_end], rows
+
+
+def query_batches(fetch_handle, columns, batch_size=None):
+  """
+  Fetches all the rows of a query handle with fetch_handle(rows, start_over) and yields them as (csv, row count) batches.
+  """
+  batch_size = batch_size or INDEXING_BATCH_SIZE.get()
+  start_over = True
+  has_more = True
+
+  output = None
+  rows = 0
+
+  while has_more:
+    result = fetch_handle(FETCH_BATCH, start_over)
+    start_over = False
+    has_more = result['has_more']
+
+    for row in result['data']:
+      if output is None:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(columns)
+      writer.writerow([cell if cell else (0 if isinstance(cell, numbers.Number) else '') for cell in row])
+      rows += 1
+
+    if output is not None and (output.tell() >= batch_size or not has_more):
+      yield output.getvalue(), rows
+      output = None
+      rows = 0
+
+
+def index_batches(client, name, batches, indexing_options=None, parallelism=None, on_progress=None):
+  """
+  Posts the (data, row count) batches to the collection `name` with `parallelism` concurrent requests.
+
+  The errors of each batch are reported instead of stopping the indexing, which is only aborted once more than
+  MAX_FAILED_BATCHES batches could not be indexed at all. A PopupException is raised when the indexing was aborted or
+  when none of the batches could be indexed. on_progress(progress) is called after each batch.
+  """
+  parallelism = max(parallelism or INDEXING_PARALLELISM.get(), 1)
+  indexing_options = indexing_options or {}
+
+  progress = {'batches': 0, 'rows': 0, 'failed_batches': 0, 'errors': []}
+  pending = {}
+
+  def _index(data):
+    return client.index(name=name, data=data, commit=False, **indexing_options)
+
+  def _collect(done):
+    for future in done:
+      batch, rows = pending.pop(future)
+      try:
+        response = future.result()
+        errors = [error.get('message', '') for error in response['responseHeader'].get('errors', [])]
+      except Exception as e:
+        LOG.warning('Failed to index batch %s of %s rows into %s: %s' % (batch, rows, name, e))
+        progress['failed_batches'] += 1
+        errors = [str(e)]
+      else:
+        progress['rows'] += rows
+      progress['batches'] += 1
+      errors = errors[:max(MAX_ERRORS - len(progress['errors']), 0)]
+      progress['errors'].extend({'batch': batch, 'message': error} for error in errors)
+
+      if on_progress is not None:
+        on_progress(progress)
+
+  with ThreadPoolExecutor(max_workers=parallelism) as executor:
+    try:
+      for batch, (data, rows) in enumerate(batches, 1):
+        pending[executor.submit(_index, data)] = (batch, rows)
+
+        while len(pending) >= parallelism and progress['failed_batches'] <= MAX_FAILED_BATCHES:
+          done, not_done = wait(list(pending), return_when=FIRST_COMPLETED)
+          _collect(done)
+        if progress['failed_batches'] > MAX_FAILED_BATCHES:
+          break
+    finally:
+      done, not_done = wait(list(pending))
+      _collect(done)
+
+  nothing_indexed = progress['batches'] and progress['failed_batches'] == progress['batches']
+  if progress['failed_batches'] > MAX_FAILED_BATCHES or nothing_indexed:
+    raise PopupException(_('Could not index the data: %(failed_batches)s batches failed.') % progress,
+                         detail='\n'.join(error['message'] for error in progress['errors']))
+
+  if progress['batches'] > progress['failed_batches']:
+    client.index(name=name, data='[]', content_type='json')  # Commit
+
+  return progress
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import threading
+import time
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from desktop.lib.exceptions_renderable import PopupException
+
+from indexer.indexers.solr_stream import file_batches, index_batches, query_batches, MAX_FAILED_BATCHES
+
+
+class MockSolrClient(object):
+
+  def __init__(self, fail=lambda data: False, delay=0):
+    self.fail = fail
+    self.delay = delay
+    self.indexed = []
+    self.commits = 0
+    self.in_flight = [0, 0]
+    self._lock = threading.Lock()
+
+  def index(self, name, data, content_type='csv', commit=True, **kwargs):
+    if commit:
+      self.commits += 1
+      return {'responseHeader': {'status': 0}}
+
+    with self._lock:
+      self.in_flight[0] += 1
+      self.in_flight[1] = max(self.in_flight)
+    try:
+      time.sleep(self.delay)
+      if self.fail(data):
+        raise Exception('Connection refused')
+      with self._lock:
+        self.indexed.append(data)
+      errors = [{'message': 'Bad row'}] if 'bad' in data else []
+      return {'responseHeader': {'status': 0, 'errors': errors}}
+    finally:
+      with self._lock:
+        self.in_flight[0] -= 1
+
+
+def test_file_batches():
+  content = b'id,text\n1,a\n2,"b\nc"\n3,"d,""e\n\nf"""\n4,g\n\n5,h'
+
+  for batch_size in (1, 3, 7, 100):
+    batches = list(file_batches(io.BytesIO(content), batch_size=batch_size))
+
+    assert_true(all(batch.startswith(b'id,text\n') for batch, rows in batches), batches)
+    assert_equal(content + b'\n', b'id,text\n' + b''.join(batch[len(b'id,text\n'):] for batch, rows in batches) + b'\n')
+    assert_equal(5, sum(rows for batch, rows in batches))
+
+  assert_equal([], list(file_batches(io.BytesIO(b'id,text\n'), batch_size=3)))
+  assert_equal(
+    [(b'id;text\r\n1;a\r\n', 1), (b'id;text\r\n2;b', 1)],
+    list(file_batches(io.BytesIO(b'id;text\r\n1;a\r\n2;b'), batch_size=6))
+  )
+
+
+def test_query_batches():
+  pages = [
+    {'data': [[1, 'a'], [2, None]], 'has_more': True},
+    {'data': [[0, 'b\nc']], 'has_more': True},
+    {'data': [], 'has_more': False},
+  ]
+  calls = []
+
+  def fetch_handle(rows, start_over):
+    calls.append(start_over)
+    return pages[len(calls) - 1]
+
+  batches = list(query_batches(fetch_handle, ['id', 'text'], batch_size=10))
+
+  assert_equal([True, False, False], calls)
+  assert_equal([('id,text\r\n1,a\r\n2,\r\n', 2), ('id,text\r\n0,"b\nc"\r\n', 1)], batches)
+
+
+def test_index_batches():
+  client = MockSolrClient(delay=0.01)
+  progress_calls = []
+  batches = [('id\n%s\n' % i, 1) for i in range(20)] + [('id\nbad\n', 1)]
+
+  progress = index_batches(client, 'logs', iter(batches), parallelism=3, on_progress=lambda progress: progress_calls.append(1))
+
+  assert_equal(21, progress['batches'])
+  assert_equal(21, progress['rows'])
+  assert_equal(0, progress['failed_batches'])
+  assert_equal([{'batch': 21, 'message': 'Bad row'}], progress['errors'])
+  assert_equal(21, len(progress_calls))
+  assert_equal(sorted(batch for batch, rows in batches), sorted(client.indexed))
+  assert_equal(1, client.commits)
+  assert_true(client.in_flight[1] <= 3, client.in_flight)
+
+
+def test_index_batches_back_pressure():
+  client = MockSolrClient(delay=0.01)
+  read = []
+
+  def batches():
+    for i in range(10):
+      read.append(i)
+      assert_true(len(read) - len(client.indexed) <= 3, (read, client.indexed))
+      yield 'id\n%s\n' % i, 1
+
+  index_batches(client, 'logs', batches(), parallelism=2)
+
+  assert_equal(10, len(client.indexed))
+
+
+def test_index_batches_failures():
+  client = MockSolrClient(fail=lambda data: data == 'id\n3\n')
+
+  progress = index_batches(client, 'logs', iter([('id\n%s\n' % i, 1) for i in range(5)]), parallelism=1)
+
+  assert_equal(5, progress['batches'])
+  assert_equal(4, progress['rows'])
+  assert_equal(1, progress['failed_batches'])
+  assert_equal([{'batch': 4, 'message': 'Connection refused'}], progress['errors'])
+  assert_equal(1, client.commits)
+
+  read = []
+
+  def batches():
+    for i in range(100):
+      read.append(i)
+      yield 'id\n%s\n' % i, 1
+
+  client = MockSolrClient(fail=lambda data: True)
+  assert_raises(PopupException, index_batches, client, 'logs', iter([('id\n1\n', 1)]), parallelism=1)
+  assert_equal(0, client.commits)
+
+  client = MockSolrClient(fail=lambda data: True)
+  assert_raises(PopupException, index_batches, client, 'logs', batches(), parallelism=1)
+  assert_equal(MAX_FAILED_BATCHES + 1, len(read))
+  assert_equal(0, client.commits)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bounded samples of the files previewed by the importer.
+
+A file is read only once and only up to IMPORT_PEEK_SIZE bytes, whatever its size: the encoding detection, the dialect
+sniffing and the field type guessing all run on the same sample.
+"""
+
+from builtins import object
+import codecs
+import csv
+import io
+import logging
+import zlib
+
+from desktop.lib.python_util import check_encoding
+
+from indexer.file_format import IMPORT_PEEK_SIZE
+
+
+LOG = logging.getLogger()
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class FileSample(object):
+  """
+  The first bytes of a file, decompressed if the file is gzipped and cut after its last complete line.
+  """
+
+  def __init__(self, data, size=IMPORT_PEEK_SIZE):
+    data = data or b''  # WebHdfs returns '' for an empty file
+    is_truncated = len(data) >= size
+
+    if data.startswith(GZIP_MAGIC):
+      decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+      try:
+        data = decompressor.decompress(data, size)
+        is_truncated = is_truncated or bool(decompressor.unconsumed_tail) or not decompressor.eof
+      except zlib.error as e:
+        LOG.warning('File looks gzipped but could not be decompressed: %s' % e)
+
+    if is_truncated and b'\n' in data:
+      data = data[:data.rindex(b'\n') + 1]
+
+    self.data = data
+    self.is_truncated = is_truncated
+    self.encoding = check_encoding(data)
+
+    try:
+      codecs.lookup(self.encoding)
+      self.text = data.decode(self.encoding, 'replace')
+    except LookupError:
+      self.text = data.decode('utf-8', 'replace')
+
+  def rows(self, delimiter=',', quotechar='"'):
+    return csv.reader(io.StringIO(self.text, newline=''), delimiter=delimiter, quotechar=quotechar)
+
+  def stream(self):
+    """
+    File-like object of the sample converted to UTF-8, for the file format guessing.
+    """
+    return io.BytesIO(self.text.encode('utf-8'))
+
+
+def get_file_sample(fs, path, size=IMPORT_PEEK_SIZE):
+  return FileSample(fs.read(path, 0, size), size=size)
+
+
+def get_local_file_sample(path, size=IMPORT_PEEK_SIZE):
+  with open(path, 'rb') as local_file:
+    return FileSample(local_file.read(size), size=size)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import os
+import sys
+import tempfile
+
+from nose.tools import assert_equal, assert_false, assert_true
+
+from indexer.sampling import FileSample, get_file_sample, get_local_file_sample
+
+if sys.version_info[0] > 2:
+  from unittest.mock import Mock
+else:
+  from mock import Mock
+
+
+def test_file_sample_truncated():
+  # Cut in the middle of the é of the last line
+  sample = FileSample(u'id,name\n1,José\n2,Jé'.encode('utf-8')[:-1], size=20)
+
+  assert_true(sample.is_truncated)
+  assert_equal('utf-8', sample.encoding)
+  assert_equal(u'id,name\n1,José\n', sample.text)
+  assert_equal([['id', 'name'], ['1', u'José']], list(sample.rows()))
+
+  sample = FileSample(b'id,name\n1,a', size=20)
+
+  assert_false(sample.is_truncated)
+  assert_equal('id,name\n1,a', sample.text)
+
+
+def test_file_sample_encoding():
+  sample = FileSample(u'id;name\n1;José\n'.encode('iso-8859-1'))
+
+  assert_equal('iso-8859-1', sample.encoding)
+  assert_equal([['id', 'name'], ['1', u'José']], list(sample.rows(delimiter=';')))
+  assert_equal(u'id;name\n1;José\n'.encode('utf-8'), sample.stream().read())
+
+
+def test_file_sample_gzip():
+  data = gzip.compress(b''.join(b'%d,row\n' % i for i in range(10000)))
+  sample = FileSample(data, size=100)
+
+  assert_true(sample.is_truncated)
+  assert_true(sample.text.startswith('0,row\n1,row\n'), sample.text)
+  assert_true(sample.text.endswith('row\n'), sample.text)
+  assert_true(len(sample.text) <= 100, sample.text)
+
+
+def test_get_file_sample():
+  fs = Mock(read=Mock(return_value=b'a,b\n1,2\n'))
+
+  sample = get_file_sample(fs, '/user/hue/data.csv', size=1000)
+
+  fs.read.assert_called_once_with('/user/hue/data.csv', 0, 1000)
+  assert_equal([['a', 'b'], ['1', '2']], list(sample.rows()))
+
+  fs = Mock(read=Mock(return_value=''))  # Empty file on WebHdfs
+  assert_equal('', get_file_sample(fs, '/user/hue/empty.csv').text)
+
+
+def test_get_local_file_sample():
+  with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as local_file:
+    local_file.write(b'id,value\n' + b''.join(b'%d,%d\n' % (i, i) for i in range(100000)))
+
+  try:
+    sample = get_local_file_sample(local_file.name, size=1000)
+
+    assert_true(sample.is_truncated)
+    assert_true(len(sample.data) <= 1000)
+    assert_equal(['id', 'value'], next(sample.rows()))
+  finally:
+    os.remove(local_file.name)
@@ -22,6 +22,7 @@ import json
 import os
 import re
 import sys
+import zlib
 sys.path.append(os.path.join(os.path.dirname(__file__), "../..", 'gen-py'))
 
 from RuntimeProfile.ttypes import *
@@ -35,6 +36,13 @@ from libanalyze import utils
 from libanalyze.rules import to_double
 
 
+FRAGMENT_REGEX = re.compile(r'(.*?Fragment) (F\d+)')
+FRAGMENT_INSTANCE_REGEX = re.compile(r'Instance\s(.*?)\s\(host=(.*?)\)')
+PLAN_NODE_REGEX = re.compile(r'(.*?)(\s+\(((dst_)?id)=(\d+)\))?$')
+NODE_NAME_REGEX = re.compile(r'(.*?)(\s+\(.*?\))?$')
+REGULAR_ID_REGEX = re.compile(r'^\d*$')
+
+
 class Node(object):
   """Simple Node"""
 
@@ -52,12 +60,45 @@ class Node(object):
     self.node_is_fragment_instance = None
     self.node_is_regular = None
     self.node_is_plan_node = None
+    self.node_is_averaged = None
+    self.node_host = None
+    self.node_counter_map = None
+    self.node_counter_count = 0
+    # Set on the root of the tree by index()
+    self.nodes = None
+    self.node_index = None
+    self.node_name_matches = None
+    self.node_fragment_instances = None
 
   def add_child(self, c):
     self.children.append(c)
 
+  def index(self):
+    """
+    Sets the fragment, fragment instance and plan node of all the nodes of the tree and indexes them by id in a
+    single traversal. The find_* methods of this node then use the index instead of walking the tree.
+    """
+    nodes = {}
+    node_index = []
+
+    def add_id(node):
+      nid = node.id()
+      if nid:
+        nodes.setdefault(nid, []).append(node)
+
+    self.foreach_lambda(add_id, pre_method=node_index.append)
+
+    self.nodes = nodes
+    self.node_index = node_index
+    self.node_name_matches = {}
+    self.node_fragment_instances = [x for x in node_index if x.is_fragment_instance()]
+
   def find_by_name(self, pattern):
     """Returns the first node whose name matches 'name'."""
+    if self.node_index is not None:
+      result = self.find_all_by_name(pattern)
+      return result[0] if result else None
+
     if self.val.name.find(pattern) >= 0:
       return self
 
@@ -67,6 +108,11 @@ class Node(object):
         return tmp
 
   def find_all_by_name(self, pattern):
+    if self.node_index is not None:
+      if pattern not in self.node_name_matches:
+        self.node_name_matches[pattern] = [x for x in self.node_index if x.val.name.find(pattern) >= 0]
+      return list(self.node_name_matches[pattern])
+
     result = []
     if self.val.name.find(pattern) >= 0:
       result.append(self)
@@ -85,33 +131,33 @@ class Node(object):
   def is_fragment(self):
     if self.node_is_fragment is not None:
       return self.node_is_fragment
-    self.node_is_fragment = re.search(r'(.*?Fragment) (F\d+)', self.val.name) is not None
+    self.node_is_fragment = FRAGMENT_REGEX.search(self.val.name) is not None
     return self.node_is_fragment
 
   def is_fragment_instance(self):
     if self.node_is_fragment_instance is not None:
       return self.node_is_fragment_instance
-    self.node_is_fragment_instance = re.search(r'Instance\s(.*?)\s\(host=(.*?)\)', self.val.name) is not None
+    self.node_is_fragment_instance = FRAGMENT_INSTANCE_REGEX.search(self.val.name) is not None
     return self.node_is_fragment_instance
 
   def is_regular(self):
     if self.node_is_regular is not None:
       return self.node_is_regular
     id = self.id()
-    matches = id and re.search(r'^\d*$', id)
-    self.node_is_regular = id and matches
+    matches = id and REGULAR_ID_REGEX.search(id)
+    self.node_is_regular = bool(id and matches)
     return self.node_is_regular
 
   def name(self):
     if self.node_name:
       return self.node_name
-    matches = re.search(r'(.*?)(\s+\(((dst_)?id)=(\d+)\))?$', self.val.name)
+    matches = PLAN_NODE_REGEX.search(self.val.name)
     if matches and matches.group(5):
       self.node_name = matches.group(1)
     elif self.is_fragment():
-      self.node_name = re.search(r'(.*?Fragment) (F\d+)', self.val.name).group(1)
+      self.node_name = FRAGMENT_REGEX.search(self.val.name).group(1)
     else:
-      matches = re.search(r'(.*?)(\s+\(.*?\))?$', self.val.name)
+      matches = NODE_NAME_REGEX.search(self.val.name)
       if matches.group(2):
         self.node_name = matches.group(1)
       else:
@@ -122,27 +168,27 @@ class Node(object):
   def id(self):
     if self.node_id:
       return self.node_id
-    matches = re.search(r'(.*?)(\s+\(((dst_)?id)=(\d+)\))?$', self.val.name)
+    matches = PLAN_NODE_REGEX.search(self.val.name)
     if matches and matches.group(5) and not matches.group(4):
       self.node_id = matches.group(5)
     elif self.is_fragment():
-      self.node_id = re.search(r'(.*?Fragment) (F\d+)', self.val.name).group(2)
+      self.node_id = FRAGMENT_REGEX.search(self.val.name).group(2)
     elif self.is_fragment_instance():
-      self.node_id = re.search(r'Instance\s(.*?)\s\(host=(.*?)\)', self.val.name).group(1)
+      self.node_id = FRAGMENT_INSTANCE_REGEX.search(self.val.name).group(1)
     elif self.fragment:
       self.node_id = self.fragment.id() + ' ' + str(self.pos)
     return self.node_id
 
   def is_plan_node(self):
     if self.node_is_plan_node is not None:
-      self.node_is_plan_node
-    matches = re.search('(.*?)(\s+\(((dst_)?id)=(\d+)\))?$', self.val.name)
-    self.node_is_plan_node = matches and not matches.group(4) and matches.group(5)
+      return self.node_is_plan_node
+    matches = PLAN_NODE_REGEX.search(self.val.name)
+    self.node_is_plan_node = bool(matches and not matches.group(4) and matches.group(5))
     return self.node_is_plan_node
 
   def find_by_id(self, pattern):
-    if self.nodes and self.nodes.get(pattern):
-      return self.nodes[pattern]
+    if self.nodes is not None:
+      return self.nodes.get(pattern, [])
     results = []
     if self.id() == pattern:
       results.append(self)
@@ -154,6 +200,9 @@ class Node(object):
     return results
 
   def find_all_fragments(self):
+    if self.node_fragment_instances is not None:
+      return list(self.node_fragment_instances)
+
     results = []
     if self.is_fragment_instance():
       results.append(self)
@@ -164,11 +213,13 @@ class Node(object):
 
     return results
 
-  def foreach_lambda(self, method, plan_node=None, fragment=None, fragment_instance=None, pos=0):
+  def foreach_lambda(self, method, plan_node=None, fragment=None, fragment_instance=None, pos=0, pre_method=None):
     self.fragment = fragment
     self.fragment_instance = fragment_instance
     self.pos = pos
     self.plan_node = plan_node
+    if pre_method:
+      pre_method(self)
     if self.is_fragment():
       fragment = self
     elif self.is_fragment_instance():
@@ -177,7 +228,7 @@ class Node(object):
       plan_node = self
 
     for idx, x in enumerate(self.children):
-      x.foreach_lambda(method, plan_node=plan_node, fragment=fragment, fragment_instance=fragment_instance, pos=idx)
+      x.foreach_lambda(method, plan_node=plan_node, fragment=fragment, fragment_instance=fragment_instance, pos=idx, pre_method=pre_method)
 
     method(self) # Post execution, because some results need child to have processed
 
@@ -185,21 +236,20 @@ class Node(object):
     node = self
     ctr_map = node.counter_map()
     counters = []
-    for k in ctr_map:
-      if pattern == k:
-        counters.append({'name': ctr_map[k].name, 'value': ctr_map[k].value,
-                  'unit': ctr_map[k].unit, 'node': node})
-
-    for k in node.child_counters_map():
-      v = node.child_counters_map()[k]
-      if pattern == k:
-        parent = None
-        if k in ctr_map:
-          parent = {'name': ctr_map[k].name, 'value': ctr_map[k].value,
-                  'unit': ctr_map[k].unit}
-        for cc in v:
-          counters.append({'name': ctr_map[cc].name, 'value': ctr_map[cc].value,
-                  'unit': ctr_map[cc].unit, 'parent': parent, 'node': node})
+    counter = ctr_map.get(pattern)
+    if counter is not None:
+      counters.append({'name': counter.name, 'value': counter.value,
+                'unit': counter.unit, 'node': node})
+
+    child_counters = node.child_counters_map().get(pattern)
+    if child_counters is not None:
+      parent = None
+      if counter is not None:
+        parent = {'name': counter.name, 'value': counter.value,
+                'unit': counter.unit}
+      for cc in child_counters:
+        counters.append({'name': ctr_map[cc].name, 'value': ctr_map[cc].value,
+                'unit': ctr_map[cc].unit, 'parent': parent, 'node': node})
     return counters
 
   def find_info_by_name(self, pattern):
@@ -212,7 +262,9 @@ class Node(object):
 
   # Only for fragments
   def is_averaged(self):
-    return re.search(r"Averaged", self.val.name) is not None
+    if self.node_is_averaged is None:
+      self.node_is_averaged = self.val.name.find("Averaged") >= 0
+    return self.node_is_averaged
 
   # Only for fragments
   def is_coordinator(self):
@@ -226,12 +278,7 @@ class Node(object):
       c = self.fragment.children[0]
     else:
       return None
-    m = re.search(r'Instance\s(.*?)\s\(host=(.*?)\)', c.val.name)
-    if m:
-        #frag.instance_id = m.group(1)
-        #frag.host = m.group(2)
-        #frag_node = c
-        return m.group(2)
+    return c.instance_host()
 
   def augmented_host(self):
     if self.is_fragment_instance():
@@ -249,12 +296,14 @@ class Node(object):
       c = self.fragment.children[0]
     else:
       return None
-    m = re.search(r'Instance\s(.*?)\s\(host=(.*?)\)', c.val.name)
-    if m:
-        #frag.instance_id = m.group(1)
-        #frag.host = m.group(2)
-        #frag_node = c
-        return m.group(2)
+    return c.instance_host()
+
+  # Only for fragment instances
+  def instance_host(self):
+    if self.node_host is None:
+      m = FRAGMENT_INSTANCE_REGEX.search(self.val.name)
+      self.node_host = m.group(2) if m else ''
+    return self.node_host or None
 
   def info_strings(self):
     return self.val.info_strings
@@ -266,11 +315,16 @@ class Node(object):
     return self.val.child_counters_map
 
   def counter_map(self):
-    ctr = {}
-    if self.val.counters:
-        for c in self.val.counters:
-            ctr[c.name] = c
-    return ctr
+    """Returns the counters by name. The map is shared between the calls and must not be modified."""
+    if self.node_counter_map is None:
+      self.node_counter_map = {}
+      self.node_counter_count = 0
+    counters = self.val.counters or []
+    # Counters are only ever appended after parsing, e.g. by TopDownAnalysis.pre_process()
+    for c in counters[self.node_counter_count:]:
+      self.node_counter_map[c.name] = c
+    self.node_counter_count = len(counters)
+    return self.node_counter_map
 
   def metric_map(self):
     ctr = {}
@@ -324,7 +378,7 @@ def decode_thrift(val):
 
 
 def decompress(val):
-  return val.decode("zlib")
+  return zlib.decompress(val)
 
 
 def summary(profile):
@@ -435,9 +489,9 @@ def heatmap_by_host(profile, counter_name):
 def parse(file_name):
   """Given a file_name, open the file and decode the first line of the file
   into the TRuntimeProfileTree structure."""
-  with open(file_name) as fid:
+  with open(file_name, 'rb') as fid:
     for line in fid:
-      val = base64.decodestring(line.strip())
+      val = base64.b64decode(line.strip())
       try:
           val = decompress(val.strip())
       except:
@@ -445,7 +499,7 @@ def parse(file_name):
       return decode_thrift(val)
 
 def parse_data(data):
-  val = base64.decodestring(data)
+  val = base64.b64decode(data)
   try:
       val = decompress(val.strip())
   except:
@@ -17,9 +17,10 @@
 from future import standard_library
 standard_library.install_aliases()
 from builtins import object
-import cProfile, logging, os, pstats, sys, time
+import copy, cProfile, logging, os, pstats, sys, time
 from libanalyze import analyze as a
 from libanalyze import rules
+from nose.plugins.attrib import attr
 from nose.tools import assert_true
 
 if sys.version_info[0] > 2:
@@ -37,6 +38,16 @@ def ordered(obj):
   else:
     return obj
 
+def add_fragment_instances(profile, count):
+  """Copies each fragment instance of the profile `count` times, like on a bigger cluster."""
+  for fragment in profile.find_all_by_name('Fragment F'):
+    instances = [x for x in fragment.children if x.is_fragment_instance()]
+    for instance in instances:
+      for i in range(count):
+        copied = copy.deepcopy(instance)
+        copied.val.name = copied.val.name.replace(' (host=', '-%d (host=' % i)
+        fragment.add_child(copied)
+
 class AnalyzeTest(object):
   def setUp(self):
     self.profile = a.analyze(
@@ -69,4 +80,17 @@ class AnalyzeTest(object):
     ps = pstats.Stats(pr, stream=s).sort_stats(sortby)
     ps.print_stats()
     LOG.info(s.getvalue())
-    assert_true(dts <= 1000)
\ No newline at end of file
+    assert_true(dts <= 1000)
+
+  @attr('notdefault')
+  def test_performance_large_profile(self):
+    add_fragment_instances(self.profile, 20)
+    assert_true(len(self.profile.find_all_fragments()) > 1000)
+
+    ts1 = time.time()
+    self.analyze.pre_process(self.profile)
+    result = self.analyze.run(self.profile)
+    dts = time.time() - ts1
+    LOG.info('Analyzed profile with %d fragment instances in %.3fs' % (len(self.profile.find_all_fragments()), dts))
+    assert_true(len(result[0]['result']) == 67)
+    assert_true(dts <= 5, dts)
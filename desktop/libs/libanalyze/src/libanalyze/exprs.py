@@ -41,6 +41,16 @@ def expr_sum(data):
 
 class Expr(object):
 
+    # Rule expressions are compiled only once
+    _compiled = {}
+
+    @classmethod
+    def compile(self, expr):
+        code = self._compiled.get(expr)
+        if code is None:
+            code = self._compiled[expr] = compile(expr, "<string>", "eval")
+        return code
+
     @classmethod
     def evaluate(self, expr, vars):
-        return eval(compile(expr, "<string>", "eval"), vars)
+        return eval(self.compile(expr), vars)
@@ -17,7 +17,6 @@
 from builtins import object
 import json
 from itertools import groupby
-from functools import reduce
 
 
 class Contributor(object):
@@ -53,6 +52,14 @@ class TCounter(object):
     self.unit = None
     self.__dict__.update(kwargs)
 
+def find_metric_by_name(nodes, metric_name):
+  """Returns the metrics named metric_name of all the nodes, in a single list."""
+  return [metric for node in nodes for metric in node.find_metric_by_name(metric_name)]
+
+def find_info_by_name(nodes, info_name):
+  """Returns the info strings named info_name of all the nodes, in a single list."""
+  return [info for node in nodes for info in node.find_info_by_name(info_name)]
+
 def query_node_by_id(profile, node_id, metric_name, averaged=False):
   """Given the query_id, searches for the corresponding query profile and
   selects the node instances given by node_id, selects the metric given by
@@ -62,7 +69,7 @@ def query_node_by_id(profile, node_id, metric_name, averaged=False):
     return result
 
   nodes = _filter_averaged(result, averaged)
-  metric = reduce(lambda x, y: x + y.find_metric_by_name(metric_name), nodes, [])
+  metric = find_metric_by_name(nodes, metric_name)
 
   return [L(x['value'], x['unit'], 0, x['node'].fragment.id(), x['node'].host(), 0, x['node'].id(), x['node'].name(), value=x['value'], unit=x['unit'], fragment_id=0, fid=x['node'].fragment.id(), host=x['node'].host(), node_id=x['node'].id(), name=x['node'].name(), node=x['node']) for x in metric]
 
@@ -75,14 +82,7 @@ def _filter_averaged(result, averaged=False):
   # Averaged results are not always present. If we're looking for averaged results, sort by averaged and get first result (hopefully getting averaged!).
   # If we're not looking for averaged results, remove them.
   if averaged:
-    def by_averaged(x, y):
-      if x.fragment.is_averaged():
-        return -1
-      elif y.fragment.is_averaged():
-        return 1
-      else:
-        return 0
-    return sorted(result, cmp=by_averaged)
+    return sorted(result, key=lambda x: not x.fragment.is_averaged())
   else:
     return [x for x in result if x.fragment.is_averaged() == averaged]
 
@@ -93,7 +93,7 @@ def query_node_by_metric(profile, node_name, metric_name):
 
   result = profile.find_all_by_name(node_name)
   nodes = [x for x in result if x.fragment.is_averaged() == False]
-  metric = reduce(lambda x, y: x + y.find_metric_by_name(metric_name), nodes, [])
+  metric = find_metric_by_name(nodes, metric_name)
   return [L(x['value'], 0, x['node'].fragment.id(), x['node'].host(), 0, x['node'].id(), x['node'].name(), value=x['value'], unit=x['unit'], fragment_id=0, fid=x['node'].fragment.id(), host=x['node'].host(), node_id=x['node'].id(), name=x['node'].name(), node=x['node']) for x in metric]
 
 def query_element_by_metric(profile, node_name, metric_name):
@@ -103,7 +103,7 @@ def query_element_by_metric(profile, node_name, metric_name):
 
   result = profile.find_all_by_name(node_name)
   nodes = [x for x in result if not x.fragment or x.fragment.is_averaged() == False]
-  metric = reduce(lambda x, y: x + y.find_metric_by_name(metric_name), nodes, [])
+  metric = find_metric_by_name(nodes, metric_name)
   return [L(x['value'], 0, x['node'].fragment.id() if x['node'].fragment else '', x['node'].host(), 0, x['node'].id(), x['node'].name(), value=x['value'], unit=x['unit'], fragment_id=0, fid=x['node'].fragment.id() if x['node'].fragment else '', host=x['node'].host(), node_id=x['node'].id(), name=x['node'].name(), node=x['node']) for x in metric]
 
 def query_element_by_info(profile, node_name, metric_name):
@@ -113,7 +113,7 @@ def query_element_by_info(profile, node_name, metric_name):
 
   result = profile.find_all_by_name(node_name)
   nodes = [x for x in result if not x.fragment or x.fragment.is_averaged() == False]
-  metric = reduce(lambda x, y: x + y.find_info_by_name(metric_name), nodes, [])
+  metric = find_info_by_name(nodes, metric_name)
   return [L(x['value'], 0, x['node'].fragment.id() if x['node'].fragment else '', x['node'].host(), 0, x['node'].id(), x['node'].name(), value=x['value'], fragment_id=0, fid=x['node'].fragment.id() if x['node'].fragment else '', host=x['node'].host(), node_id=x['node'].id(), name=x['node'].name(), node=x['node']) for x in metric]
 
 def query_avg_fragment_metric_by_node_nid(profile, node_nid, metric_name, default):
@@ -152,7 +152,7 @@ def host_by_metric(profile, metric_name, exprs=[max]):
   Calculates the aggregated value based on exprs."""
   fragments = profile.find_all_fragments()
   fragments = [x for x in fragments if x.is_averaged() == False]
-  metrics = reduce(lambda x,y: x + y.find_metric_by_name(metric_name), fragments, [])
+  metrics = find_metric_by_name(fragments, metric_name)
   results = L(unit=-1)
   for k, g in groupby(metrics, lambda x: x['node'].host()):
       grouped = list(g)
@@ -80,6 +80,13 @@ class SQLOperatorReason(object):
         self.result = None
         self.return_messages = []
         self.to_json = to_json
+        self.compile_exprs()
+
+    def compile_exprs(self):
+        """Compiles the expressions of the rule when the rules are loaded instead of at each evaluation"""
+        for expr in (self.rule.get("expr"), self.rule.get("condition"), self.kwargs.get('fix', {}).get('data')):
+            if expr:
+                exprs.Expr.compile(expr)
 
     def isStorageBound(self, node):
         """
@@ -439,7 +446,7 @@ class TopDownAnalysis(object):
         """
         execution_profile = profile.find_by_name('Execution Profile')
         #summary = _profile.find_by_name("Summary")
-        counter_map = profile.find_by_name('Summary').counter_map()
+        counter_map = dict(profile.find_by_name('Summary').counter_map())
         counter_map.update(profile.find_by_name("ImpalaServer").counter_map())
         #counter_map = summary.counter_map()
 
@@ -470,7 +477,7 @@ class TopDownAnalysis(object):
         nodes = execution_profile.find_all_non_fragment_nodes()
         nodes = [x for x in nodes if x.fragment and x.fragment.is_averaged() == False]
         nodes = [x for x in nodes if x.name() != 'DataStreamSender']
-        metrics = reduce(lambda x,y: x + y.find_metric_by_name('LocalTime'), nodes, [])
+        metrics = models.find_metric_by_name(nodes, 'LocalTime')
         metrics = sorted(metrics, key=lambda x: (x['node'].id(), x['node'].name()))
         for k, g in groupby(metrics, lambda x: (x['node'].id(), x['node'].name())):
             grouped = list(g)
@@ -674,7 +681,7 @@ class TopDownAnalysis(object):
               else:
                   local_time = counter_map["ProbeTime"].value +\
                       counter_map["BuildTime"].value
-            if counter_map.get('SpilledPartitions', 0) > 0:
+            if counter_map.get('SpilledPartitions', models.TCounter(value=0)).value > 0:
               has_spilled = True
 
             # Add two virtual metrics for local_time and child_time
@@ -687,16 +694,7 @@ class TopDownAnalysis(object):
             node.val.counters.append(models.TCounter(name='LocalTime', value=local_time, unit=5))
             node.val.counters.append(models.TCounter(name='ChildTime', value=child_time, unit=5))
 
-        nodes = {}
-        def create_map(node, nodes=nodes):
-          nid = node.id()
-          if nid:
-            if not nodes.get(nid):
-              nodes[nid] = []
-            nodes[nid].append(node)
-        profile.foreach_lambda(create_map)
-        profile.nodes = nodes
-
+        profile.index()
         profile.foreach_lambda(add_host)
 
     def run(self, profile):
@@ -53,6 +53,8 @@ else:
 
 LOG = logging.getLogger()
 
+EXPORT_PAGE_SIZE = 1000
+
 
 try:
   from search.conf import EMPTY_QUERY, SECURITY_ENABLED, SOLR_URL, DOWNLOAD_LIMIT
@@ -99,14 +101,16 @@ class SolrApi(object):
 
     solr_query['collection'] = collection['name']
 
+    max_rows = min(DOWNLOAD_LIMIT.get(), 15000) if DOWNLOAD_LIMIT.get() > 0 else 15000
+
     if query.get('download'):
-      solr_query['rows'] = min(DOWNLOAD_LIMIT.get(), 15000)
+      solr_query['rows'] = max_rows
       solr_query['start'] = 0
     else:
       solr_query['rows'] = int(collection['template']['rows'] or 10)
       solr_query['start'] = int(query['start'])
 
-    solr_query['rows'] = min(solr_query['rows'], min(DOWNLOAD_LIMIT.get(), 15000))
+    solr_query['rows'] = min(solr_query['rows'], max_rows)
     solr_query['start'] = min(solr_query['start'], 10000)
 
     params = self._get_params() + (
@@ -273,17 +277,11 @@ class SolrApi(object):
     #if query.get('timezone'):
     #  params += (('TZ', query.get('timezone')),)
 
-    if collection['template']['fieldsSelected']:
-      fields = []
-      for field in collection['template']['fieldsSelected']:
-        attribute_field = [attribute for attribute in collection['template']['fieldsAttributes'] if field == attribute['name']]
-        if attribute_field:
-          if attribute_field[0]['sort']['direction']:
-            fields.append('%s %s' % (field, attribute_field[0]['sort']['direction']))
-      if fields:
-        params += (
-          ('sort', ','.join(fields)),
-        )
+    sort = self._get_sort(collection)
+    if sort:
+      params += (
+        ('sort', sort),
+      )
 
     if json_facets:
       response = self._root.post(
@@ -297,6 +295,45 @@ class SolrApi(object):
     return self._get_json(response)
 
 
+  def export_documents(self, collection, query, limit=None, page_size=EXPORT_PAGE_SIZE):
+    """
+    Yields the lists of documents matching the query of a dashboard, page by page.
+
+    The pages are fetched with a cursorMark, which requires the unique key of the collection as the last sort field,
+    so that the cost of a page does not grow with its offset. At most `limit` documents are returned if set.
+    """
+    id_field = collection.get('idField') or 'id'
+    sort = self._get_sort(collection)
+    if not re.search(r'(^|,)%s ' % re.escape(id_field), sort):
+      sort = '%s,%s asc' % (sort, id_field) if sort else '%s asc' % id_field
+
+    params = self._get_params() + (
+        ('q', self._get_q(query)),
+        ('wt', 'json'),
+        ('fl', urllib_unquote(utf_quoter(','.join(Collection2.get_field_list(collection))))),
+        ('sort', sort),
+    ) + self._get_fq(collection, query)
+
+    cursor_mark = '*'
+    count = 0
+
+    while limit is None or count < limit:
+      rows = page_size if limit is None else min(page_size, limit - count)
+      response = self._get_json(
+        self._root.get('%(name)s/select' % collection, params + (('rows', rows), ('cursorMark', cursor_mark)))
+      )
+
+      docs = response['response']['docs']
+      if docs:
+        count += len(docs)
+        yield docs
+
+      next_cursor_mark = response.get('nextCursorMark')
+      if not docs or next_cursor_mark is None or next_cursor_mark == cursor_mark:
+        break
+      cursor_mark = next_cursor_mark
+
+
   def _n_facet_dimension(self, widget, _f, facets, dim, timeFilter, collection, can_range=None):
     facet = facets[0]
     f_name = 'dim_%02d:%s' % (dim, facet['field'])
@@ -834,7 +871,7 @@ class SolrApi(object):
       raise PopupException(e, title=_('Error while accessing Solr'))
 
 
-  def update(self, collection_or_core_name, data, content_type='csv', version=None, **kwargs):
+  def update(self, collection_or_core_name, data, content_type='csv', version=None, commit=True, **kwargs):
     if content_type == 'csv':
       content_type = 'application/csv'
     elif content_type == 'json':
@@ -846,7 +883,7 @@ class SolrApi(object):
     params = self._get_params() + (
         ('wt', 'json'),
         ('overwrite', 'true'),
-        ('commit', 'true'),
+        ('commit', 'true' if commit else 'false'),
     )
     if version is not None:
       params += (
@@ -919,6 +956,18 @@ class SolrApi(object):
       return (('doAs', self._user),)
     return (('user.name', SERVER_USER.get()), ('doAs', self._user),)
 
+  def _get_sort(self, collection):
+    fields = []
+
+    if collection['template']['fieldsSelected']:
+      for field in collection['template']['fieldsSelected']:
+        attribute_field = [attribute for attribute in collection['template']['fieldsAttributes'] if field == attribute['name']]
+        if attribute_field:
+          if attribute_field[0]['sort']['direction']:
+            fields.append('%s %s' % (field, attribute_field[0]['sort']['direction']))
+
+    return ','.join(fields)
+
   def _get_q(self, query):
     q_template = '(%s)' if len(query['qs']) >= 2 else '%s'
     return 'OR'.join([q_template % (q['q'] or EMPTY_QUERY.get()) for q in query['qs']]).encode('utf-8')
@@ -18,6 +18,7 @@
 from builtins import object
 import logging
 import json
+import sys
 
 from nose.plugins.skip import SkipTest
 from nose.tools import assert_equal, assert_true
@@ -32,6 +33,11 @@ from useradmin.models import User
 
 from libsolr.api import SolrApi
 
+if sys.version_info[0] > 2:
+  from unittest.mock import Mock
+else:
+  from mock import Mock
+
 
 LOG = logging.getLogger()
 
@@ -87,3 +93,58 @@ class TestLibSolrWithSolr(object):
     query = {'qs': [{'q': ''}], 'fqs': [], 'start': 0}
 
     SolrApi(SOLR_URL.get(), self.user).query(collection['collection'], query)
+
+
+class TestSolrApiExport(object):
+
+  def setUp(self):
+    self.collection = {
+      'name': 'logs',
+      'idField': 'id',
+      'timeFilter': {},
+      'template': {
+        'fieldsSelected': ['id', 'code'],
+        'fieldsAttributes': [{'name': 'code', 'sort': {'direction': 'desc'}}],
+        'isGridLayout': True,
+        'leafletmap': {}
+      }
+    }
+    self.query = {'qs': [{'q': 'error'}], 'fqs': []}
+
+  def _get_api(self, docs):
+    api = SolrApi('http://localhost:8983/solr/', 'test')
+    api._root = Mock()
+
+    def get(path, params):
+      params = dict(params)
+      start = 0 if params['cursorMark'] == '*' else int(params['cursorMark'])
+      end = start + params['rows']
+      return {'response': {'docs': docs[start:end]}, 'nextCursorMark': str(min(end, len(docs)))}
+
+    api._root.get.side_effect = get
+    return api
+
+  def test_export_documents(self):
+    docs = [{'id': str(i), 'code': 200} for i in range(25)]
+    api = self._get_api(docs)
+
+    pages = list(api.export_documents(self.collection, self.query, page_size=10))
+
+    assert_equal([10, 10, 5], [len(page) for page in pages])
+    assert_equal(docs, [doc for page in pages for doc in page])
+
+    path, params = api._root.get.call_args_list[0][0]
+    params = dict(params)
+    assert_equal('logs/select', path)
+    assert_equal('code desc,id asc', params['sort'])
+    assert_equal('*', params['cursorMark'])
+    assert_equal(b'error', params['q'])
+
+  def test_export_documents_limit(self):
+    docs = [{'id': str(i), 'code': 200} for i in range(25)]
+    api = self._get_api(docs)
+
+    pages = list(api.export_documents(self.collection, self.query, limit=12, page_size=10))
+
+    assert_equal([10, 2], [len(page) for page in pages])
+    assert_equal(2, api._root.get.call_count)
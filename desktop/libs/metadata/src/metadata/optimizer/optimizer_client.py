@@ -168,9 +168,10 @@ class OptimizerClient(object):
           content_generator = OptimizerQueryDataAdapter(data)
           queries_csv = export_csvxls.create_generator(content_generator, 'csv')
 
-          for row in queries_csv:
-            f_queries.write(row)
-            LOG.debug(row[:1000])
+          for chunk in queries_csv:
+            chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            f_queries.write(chunk)
+            LOG.debug(chunk[:1000])
         else:
           # Table, column stats
           f_queries.write(json.dumps(data))
@@ -24,6 +24,7 @@ import sqlparse
 import sys
 
 from django.urls import reverse
+from django.db import transaction
 from django.db.models import Q
 from django.views.decorators.http import require_GET, require_POST
 import opentracing.tracer
@@ -33,7 +34,7 @@ from desktop.conf import TASK_SERVER, ENABLE_CONNECTORS
 from desktop.lib.i18n import smart_str
 from desktop.lib.django_util import JsonResponse
 from desktop.lib.exceptions_renderable import PopupException
-from desktop.models import Document2, Document, __paginate, _get_gist_document, FilesystemException
+from desktop.models import Document2, Document, Document2HistorySummary, __paginate, _get_gist_document, FilesystemException
 from indexer.file_format import HiveFormat
 from indexer.fields import Field
 from metadata.conf import OPTIMIZER
@@ -41,6 +42,7 @@ from metadata.conf import OPTIMIZER
 from notebook.conf import EXAMPLES
 from notebook.connectors.base import Notebook, QueryExpired, SessionExpired, QueryError, _get_snippet_name, patch_snippet_for_connector
 from notebook.connectors.hiveserver2 import HS2Api
+from notebook.execution_state import EXECUTION_STATE
 from notebook.decorators import api_error_handler, check_document_access_permission, check_document_modify_permission
 from notebook.models import escape_rows, make_notebook, upgrade_session_properties, get_api, _get_dialect_example
 
@@ -196,6 +198,7 @@ def _execute_notebook(request, notebook, snippet):
           # If we get Atomic block exception, something underneath interpreter.execute() crashed and is not handled.
           history.update_data(notebook)
           history.save()
+          _update_history_summary(history, notebook)
 
           response['history_id'] = history.id
           response['history_uuid'] = history.uuid
@@ -264,6 +267,7 @@ def check_status(request):
 
 def _check_status(request, notebook=None, snippet=None, operation_id=None):
   response = {'status': -1}
+  nb_doc = None
 
   if operation_id or not snippet:  # To unify with _get_snippet
     nb_doc = Document2.objects.get_by_uuid(user=request.user, uuid=operation_id or notebook['uuid'])
@@ -293,20 +297,32 @@ def _check_status(request, notebook=None, snippet=None, operation_id=None):
       has_result_set = None
 
     if notebook.get('dialect') or notebook['type'].startswith('query') or notebook.get('isManaged'):
-      nb_doc = Document2.objects.get_by_uuid(user=request.user, uuid=operation_id or notebook['uuid'])
-      if nb_doc.can_write(request.user):
-        nb = Notebook(document=nb_doc).get_data()
-        if status != nb['snippets'][0]['status'] or has_result_set != nb['snippets'][0].get('has_result_set'):
-          nb['snippets'][0]['status'] = status
-          if has_result_set is not None:
-            nb['snippets'][0]['has_result_set'] = has_result_set
-            nb['snippets'][0]['result']['handle']['has_result_set'] = has_result_set
-          nb_doc.update_data(nb)
-          nb_doc.save()
+      uuid = operation_id or notebook['uuid']
+      # Running queries are only saved once in a while, see EXECUTION_STATE_FLUSH_INTERVAL
+      if EXECUTION_STATE.update(uuid, snippet.get('id'), status, has_result_set, snippet.get('status'), snippet.get('has_result_set')):
+        nb_doc = nb_doc or Document2.objects.get_by_uuid(user=request.user, uuid=uuid)
+        _save_status(request.user, nb_doc, snippet.get('id'), status, has_result_set)
 
   return response
 
 
+def _save_status(user, nb_doc, snippet_id, status, has_result_set):
+  if nb_doc.can_write(user):
+    nb = Notebook(document=nb_doc).get_data()
+    snippet = nb['snippets'][0]
+    if status != snippet['status'] or has_result_set != snippet.get('has_result_set'):
+      snippet['status'] = status
+      if has_result_set is not None:
+        snippet['has_result_set'] = has_result_set
+        snippet['result']['handle']['has_result_set'] = has_result_set
+      nb_doc.update_data(nb)
+      nb_doc.save()
+      if nb_doc.is_history:
+        _update_history_summary(nb_doc, nb)
+
+  EXECUTION_STATE.saved(nb_doc.uuid, snippet_id, status, has_result_set)
+
+
 @require_POST
 @check_document_access_permission
 @api_error_handler
@@ -578,10 +594,64 @@ def _historify(notebook, user):
   history_doc.update_data(notebook)
   history_doc.search = _get_statement(notebook)
   history_doc.save()
+  _update_history_summary(history_doc, notebook)
 
   return history_doc
 
 
+def _update_history_summary(history_doc, notebook, summary_model=Document2HistorySummary):
+  """
+  Copies the columns listed by the query history from the notebook of the history document. Incomplete notebooks get an
+  empty summary so that they are not summarized again.
+  """
+  defaults = {}
+
+  if notebook.get('snippets'):
+    snippet = notebook['snippets'][0]
+    statement = notebook.get('description') if history_doc.is_managed else _get_statement(notebook)
+    connector = snippet.get('connector') or {}
+
+    defaults = {
+      'statement': statement[:1001] if statement else '',
+      'dialect': (notebook.get('dialect') or connector.get('dialect') or snippet.get('type') or '')[:32],
+      'connector': str(connector.get('id') or snippet.get('type') or '')[:64],
+      'status': (snippet.get('status') or '')[:32],
+      'last_executed': int(snippet.get('lastExecuted') or -1),
+      'parent_saved_query_uuid': notebook.get('parentSavedQueryUuid') or '',
+    }
+  elif 'snippets' not in notebook:
+    LOG.error('Incomplete History Notebook: %s' % notebook)
+
+  summary_model.objects.update_or_create(document=history_doc, defaults=defaults)
+
+
+def add_missing_history_summaries(batch_size=1000, document_model=Document2, summary_model=Document2HistorySummary):
+  """
+  Summarizes the history documents created before the summaries, batch_size documents at a time. Only the summarized
+  documents are listed by get_history. Returns the number of documents summarized.
+
+  The models can be swapped for the historical ones of a data migration.
+  """
+  count = 0
+
+  while True:
+    docs = list(document_model.objects.filter(is_history=True, history_summary__isnull=True).order_by('-id')[:batch_size])
+    if not docs:
+      return count
+
+    with transaction.atomic():
+      for doc in docs:
+        try:
+          notebook = Notebook(document=doc).get_data()
+        except ValueError as e:
+          LOG.error('Could not read History Notebook %s: %s' % (doc.id, e))
+          notebook = {}
+        _update_history_summary(doc, notebook, summary_model=summary_model)
+
+    count += len(docs)
+    LOG.info('Summarized %d history documents' % count)
+
+
 def _get_statement(notebook):
   if notebook['snippets'] and len(notebook['snippets']) > 0:
     snippet = notebook['snippets'][0]
@@ -616,34 +686,26 @@ def get_history(request):
     docs = Document2.objects.get_history(doc_type='query-%s' % doc_type, connector_id=connector_id, user=request.user)
 
   if doc_text:
-    docs = docs.filter(Q(name__icontains=doc_text) | Q(description__icontains=doc_text) | Q(search__icontains=doc_text))
+    docs = docs.filter(
+      Q(name__icontains=doc_text) | Q(description__icontains=doc_text) | Q(search__icontains=doc_text) |
+      Q(history_summary__statement__icontains=doc_text)
+    )
 
   # Paginate
-  docs = docs.order_by('-last_modified')
+  docs = docs.filter(history_summary__isnull=False).select_related('history_summary')
+  docs = docs.order_by('-history_summary__last_executed', '-last_modified')
   response['count'] = docs.count()
   docs = __paginate(page, limit, queryset=docs)['documents']
 
-  history = []
-  for doc in docs:
-    notebook = Notebook(document=doc).get_data()
-    if 'snippets' in notebook:
-      statement = notebook['description'] if is_notification_manager else _get_statement(notebook)
-      history.append({
-        'name': doc.name,
-        'id': doc.id,
-        'uuid': doc.uuid,
-        'type': doc.type,
-        'data': {
-            'statement': statement[:1001] if statement else '',
-            'lastExecuted': notebook['snippets'][0].get('lastExecuted', -1),
-            'status': notebook['snippets'][0].get('status', ''),
-            'parentSavedQueryUuid': notebook.get('parentSavedQueryUuid', '')
-        } if notebook['snippets'] else {},
-        'absoluteUrl': doc.get_absolute_url(),
-      })
-    else:
-      LOG.error('Incomplete History Notebook: %s' % notebook)
-  response['history'] = sorted(history, key=lambda row: row['data']['lastExecuted'], reverse=True)
+  response['history'] = [{
+      'name': doc.name,
+      'id': doc.id,
+      'uuid': doc.uuid,
+      'type': doc.type,
+      'data': doc.history_summary.to_dict(),
+      'absoluteUrl': doc.get_absolute_url(),
+    } for doc in docs
+  ]
   response['message'] = _('History fetched')
   response['status'] = 0
 
@@ -17,6 +17,7 @@
 # limitations under the License.
 
 from builtins import object
+import importlib
 import json
 import sys
 
@@ -25,6 +26,7 @@ from nose.plugins.attrib import attr
 from nose.plugins.skip import SkipTest
 from nose.tools import assert_equal, assert_true, assert_false
 
+from django.apps import apps as django_apps
 from django.test.client import Client
 from django.urls import reverse
 from azure.conf import is_adls_enabled
@@ -34,14 +36,14 @@ from desktop.conf import APP_BLACKLIST, ENABLE_CONNECTORS, ENABLE_PROMETHEUS
 from desktop.lib.django_test_util import make_logged_in_client
 from desktop.lib.test_utils import grant_access, add_permission
 from desktop.metrics import num_of_queries
-from desktop.models import Directory, Document, Document2
+from desktop.models import Directory, Document, Document2, Document2HistorySummary
 from hadoop import cluster as originalCluster
 from useradmin.models import User
 
 import notebook.conf
 import notebook.connectors.hiveserver2
 
-from notebook.api import _historify
+from notebook.api import _historify, add_missing_history_summaries
 from notebook.connectors.base import Notebook, QueryError, Api, QueryExpired
 from notebook.decorators import api_error_handler
 from notebook.conf import get_ordered_interpreters, INTERPRETERS_SHOWN_ON_WHEEL, INTERPRETERS
@@ -287,6 +289,53 @@ class TestApi(object):
     # TODO: test that query history for shared query only returns docs accessible by current user
 
 
+  def test_get_history_from_summaries(self):
+    history_doc = _historify(self.notebook, self.user)
+    assert_equal('running', history_doc.history_summary.status)
+    assert_equal(1462554843817, history_doc.history_summary.last_executed)
+
+    # History from before the summaries
+    notebook = dict(self.notebook, snippets=[dict(self.notebook['snippets'][0], lastExecuted=1462554843818, status='available')])
+    old_doc = Document2.objects.create(name='Old History', type='query-hive', data=json.dumps(notebook), owner=self.user, is_history=True)
+    incomplete_doc = Document2.objects.create(name='Incomplete History', type='query-hive', data='{}', owner=self.user, is_history=True)
+    assert_false(Document2HistorySummary.objects.filter(document=old_doc).exists())
+
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive'})
+    assert_equal([history_doc.uuid], [doc['uuid'] for doc in json.loads(response.content)['history']])
+
+    assert_equal(2, add_missing_history_summaries(batch_size=1))
+    assert_equal('', Document2HistorySummary.objects.get(document=incomplete_doc).statement)
+    assert_equal(0, add_missing_history_summaries())
+
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive'})
+    data = json.loads(response.content)
+
+    assert_equal(0, data['status'], data)
+    assert_equal(3, data['count'], data)
+    assert_equal([old_doc.uuid, history_doc.uuid, incomplete_doc.uuid], [doc['uuid'] for doc in data['history']])
+    assert_equal('available', data['history'][0]['data']['status'])
+
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive', 'doc_text': 'Old History'})
+    assert_equal([old_doc.uuid], [doc['uuid'] for doc in json.loads(response.content)['history']])
+
+    Document2.objects.filter(id=old_doc.id).update(description='Nightly report', search='report web_logs')
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive', 'doc_text': 'nightly'})
+    assert_equal([old_doc.uuid], [doc['uuid'] for doc in json.loads(response.content)['history']])
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive', 'doc_text': 'report web'})
+    assert_equal([old_doc.uuid], [doc['uuid'] for doc in json.loads(response.content)['history']])
+
+
+  def test_history_summaries_migration(self):
+    migration = importlib.import_module('desktop.migrations.0014_document2historysummary')
+    old_doc = Document2.objects.create(name='Old History', type='query-hive', data=self.notebook_json, owner=self.user, is_history=True)
+
+    migration.add_missing_history_summaries(django_apps, None)
+
+    assert_equal(1462554843817, Document2HistorySummary.objects.get(document=old_doc).last_executed)
+    response = self.client.get(reverse('notebook:get_history'), {'doc_type': 'hive'})
+    assert_equal([old_doc.uuid], [doc['uuid'] for doc in json.loads(response.content)['history']])
+
+
   def test_clear_history(self):
     assert_equal(0, Document2.objects.filter(name__contains=self.notebook['name'], is_history=True).count())
     _historify(self.notebook, self.user)
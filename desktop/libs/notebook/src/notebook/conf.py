@@ -285,6 +285,22 @@ ENABLE_QUERY_ANALYSIS = Config(
   default=False
 )
 
+STATUS_WATCHER_INTERVAL = Config(
+  key="status_watcher_interval",
+  help=_t("With websockets, seconds between two checks of the status of the queries watched by the editors. The status "
+          "and progress are pushed to all the editors watching a query. Set to 0 to disable."),
+  type=int,
+  default=1
+)
+
+EXECUTION_STATE_FLUSH_INTERVAL = Config(
+  key="execution_state_flush_interval",
+  help=_t("Minimum seconds between two saves of the status of a running query into its document. The final status "
+          "is always saved right away. Set to 0 to save every change."),
+  type=int,
+  default=30
+)
+
 
 EXAMPLES = ConfigSection(
   key='examples',
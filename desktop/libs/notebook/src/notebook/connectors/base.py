@@ -584,7 +584,9 @@ class Api(object):
     max_rows = conf.DOWNLOAD_ROW_LIMIT.get()
     max_bytes = conf.DOWNLOAD_BYTES_LIMIT.get()
 
-    content_generator = data_export.DataAdapter(result_wrapper, max_rows=max_rows, max_bytes=max_bytes)
+    content_generator = data_export.DataAdapter(
+        result_wrapper, max_rows=max_rows, max_bytes=max_bytes, prefetch_batches=conf.DOWNLOAD_PREFETCH_BATCHES.get()
+    )
     return export_csvxls.create_generator(content_generator, file_format)
 
   def get_log(self, notebook, snippet, startFrom=None, size=None):
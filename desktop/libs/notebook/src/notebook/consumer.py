@@ -26,13 +26,21 @@ LOG = logging.getLogger()
 
 if has_channels():
   from asgiref.sync import async_to_sync
+  from channels.db import database_sync_to_async
   from channels.generic.websocket import AsyncWebsocketConsumer
   from channels.layers import get_channel_layer
 
+  from desktop.models import Document2
+
+  from notebook.conf import STATUS_WATCHER_INTERVAL
+  from notebook.status_watcher import STATUS_WATCHER, get_status_group
+
 
   class EditorConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
+      self.watched_operations = set()
+
       await self.accept()
 
       LOG.info('User %(user)s connected to WS Editor.' % self.scope)
@@ -46,6 +54,57 @@ if has_channels():
       )
 
 
+    async def disconnect(self, code):
+      for operation_id in list(self.watched_operations):
+        await self._unwatch_status(operation_id)
+
+    async def receive(self, text_data=None, bytes_data=None):
+      message = json.loads(text_data)
+      operation_id = message.get('data', {}).get('operationId')
+
+      if not operation_id:
+        return
+      elif message.get('type') == 'watch_status':
+        await self._watch_status(operation_id)
+      elif message.get('type') == 'unwatch_status':
+        await self._unwatch_status(operation_id)
+
+    async def _watch_status(self, operation_id):
+      if STATUS_WATCHER_INTERVAL.get() <= 0 or operation_id in self.watched_operations:
+        return
+
+      try:
+        await database_sync_to_async(Document2.objects.get_by_uuid)(user=self.scope['user'], uuid=operation_id)
+      except Exception as e:
+        LOG.warning('User %s cannot watch the status of the operation %s: %s' % (self.scope['user'], operation_id, e))
+        return
+
+      self.watched_operations.add(operation_id)
+      await self.channel_layer.group_add(get_status_group(operation_id), self.channel_name)
+      last_message = await database_sync_to_async(STATUS_WATCHER.watch)(self.scope['user'], operation_id, self.channel_name)
+
+      await self.send(
+        text_data=json.dumps({
+          'type': 'query_status_watched',
+          'data': {'operationId': operation_id}
+        })
+      )
+      if last_message:
+        await self.task_status({'data': last_message})
+
+    async def _unwatch_status(self, operation_id):
+      self.watched_operations.discard(operation_id)
+      await self.channel_layer.group_discard(get_status_group(operation_id), self.channel_name)
+      STATUS_WATCHER.unwatch(operation_id, self.channel_name)
+
+    async def task_status(self, event):
+      await self.send(
+        text_data=json.dumps({
+          'type': 'query_status',
+          'data': event["data"]
+        })
+      )
+
     async def task_progress(self, event):
       await self.send(
         text_data=json.dumps({
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Transient execution state of the snippets, kept in the cache between two checks of their status.
+
+Saving a status change rewrites the whole notebook document. The changes of a running query are only saved into its
+document once every EXECUTION_STATE_FLUSH_INTERVAL seconds, the final status as soon as it is known.
+"""
+
+from builtins import object
+import logging
+import time
+
+from django.core.cache import caches
+
+from notebook.conf import EXECUTION_STATE_FLUSH_INTERVAL
+
+
+LOG = logging.getLogger()
+
+FINAL_STATUSES = ('available', 'success', 'failed', 'expired', 'canceled', 'closed')
+STATE_TTL = 60 * 60 * 24
+
+
+class ExecutionStateStore(object):
+
+  def __init__(self, cache=None, flush_interval=None):
+    self.cache = cache if cache is not None else caches['default']
+    self.flush_interval = flush_interval
+
+  def update(self, notebook_uuid, snippet_id, status, has_result_set, saved_status=None, saved_has_result_set=None):
+    """
+    Records the current status of the snippet. Returns True if it needs to be saved into the document: when it is
+    different from the saved one and is final or was not saved since flush_interval seconds.
+
+    saved_status and saved_has_result_set are the ones of the document, when the state of the snippet is not known yet.
+    """
+    key = _state_key(notebook_uuid, snippet_id)
+    state = self.cache.get(key)
+    if state is None:
+      state = {'saved': [saved_status, saved_has_result_set], 'saved_at': 0}
+
+    flush_interval = self.flush_interval if self.flush_interval is not None else EXECUTION_STATE_FLUSH_INTERVAL.get()
+    changed = status != state['saved'][0] or (has_result_set is not None and has_result_set != state['saved'][1])
+    needs_save = changed and (status in FINAL_STATUSES or time.time() - state['saved_at'] >= flush_interval)
+
+    state['status'] = status
+    state['has_result_set'] = has_result_set
+    self.cache.set(key, state, STATE_TTL)
+
+    return needs_save
+
+  def saved(self, notebook_uuid, snippet_id, status, has_result_set):
+    """
+    Records that this status was saved into the document. The state of a finished snippet is not kept.
+    """
+    key = _state_key(notebook_uuid, snippet_id)
+
+    if status in FINAL_STATUSES:
+      self.cache.delete(key)
+    else:
+      state = {'status': status, 'has_result_set': has_result_set, 'saved': [status, has_result_set], 'saved_at': time.time()}
+      self.cache.set(key, state, STATE_TTL)
+
+  def get(self, notebook_uuid, snippet_id):
+    return self.cache.get(_state_key(notebook_uuid, snippet_id))
+
+
+def _state_key(notebook_uuid, snippet_id):
+  return 'notebook_execution_state_%s_%s' % (notebook_uuid, snippet_id)
+
+
+EXECUTION_STATE = ExecutionStateStore()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import sys
+
+from django.core.cache.backends.locmem import LocMemCache
+from nose.tools import assert_equal, assert_true, assert_false
+
+from notebook.execution_state import ExecutionStateStore
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch
+else:
+  from mock import patch
+
+
+LOG = logging.getLogger()
+
+
+class TestExecutionStateStore():
+
+  def setUp(self):
+    self.cache = LocMemCache('test_execution_state', {})
+    self.cache.clear()
+    self.store = ExecutionStateStore(cache=self.cache, flush_interval=30)
+
+
+  def test_save_running_status_once_per_interval(self):
+    with patch('notebook.execution_state.time.time') as time:
+      time.return_value = 1000
+
+      # Unchanged
+      assert_false(self.store.update('uuid', 'snippet', 'running', None, 'running', None))
+
+      # First change
+      assert_true(self.store.update('uuid', 'snippet', 'starting', None, 'running', None))
+      self.store.saved('uuid', 'snippet', 'starting', None)
+
+      time.return_value = 1010
+      assert_false(self.store.update('uuid', 'snippet', 'running', None))
+      assert_equal('running', self.store.get('uuid', 'snippet')['status'])
+
+      time.return_value = 1030
+      assert_true(self.store.update('uuid', 'snippet', 'running', None))
+
+
+  def test_save_final_status_right_away(self):
+    with patch('notebook.execution_state.time.time') as time:
+      time.return_value = 1000
+      self.store.saved('uuid', 'snippet', 'running', None)
+
+      assert_false(self.store.update('uuid', 'snippet', 'running', True))
+      assert_false(self.store.update('uuid', 'snippet', 'running', None))
+      assert_true(self.store.update('uuid', 'snippet', 'available', True))
+
+      self.store.saved('uuid', 'snippet', 'available', True)
+      assert_equal(None, self.store.get('uuid', 'snippet'))
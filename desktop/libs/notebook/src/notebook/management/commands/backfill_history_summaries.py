@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+
+from notebook.api import add_missing_history_summaries
+
+if sys.version_info[0] > 2:
+  from django.utils.translation import gettext_lazy as _t
+else:
+  from django.utils.translation import ugettext_lazy as _t
+
+
+LOG = logging.getLogger()
+
+
+class Command(BaseCommand):
+  """
+  Summarizes the query history documents created before the history summaries, so that they are listed again.
+  """
+  help = _t('Summarizes the query history documents created before the history summaries.')
+
+  def add_arguments(self, parser):
+    parser.add_argument('--batch-size', help=_t('Number of documents summarized per transaction.'), action='store', type=int,
+                        default=1000)
+
+  def handle(self, *args, **options):
+    count = add_missing_history_summaries(batch_size=options['batch_size'])
+    LOG.info('%d history documents summarized' % count)
+    self.stdout.write('%d history documents summarized\n' % count)
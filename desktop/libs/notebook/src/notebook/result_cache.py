@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of query results stored by the task server.
+
+Rows are kept as zlib compressed CSV chunks of CHUNK_ROWS rows, so that fetching a page only loads and decodes
+the chunk it needs. The cache is bounded by a global and a per user byte budget, the least recently used results
+being evicted first. Evicted results are still readable from the result storage.
+"""
+
+import csv
+import logging
+import sys
+import time
+import zlib
+
+from itertools import islice
+
+from django.core.cache import caches
+
+from desktop.conf import TASK_SERVER
+from desktop.settings import CACHES_CELERY_QUERY_RESULT_KEY
+
+if sys.version_info[0] > 2:
+  from io import StringIO as string_io
+else:
+  from StringIO import StringIO as string_io
+
+
+LOG = logging.getLogger()
+
+CHUNK_ROWS = 1000
+RESULT_TTL = 60 * 5
+ENTRIES_KEY = 'result_cache_entries'
+
+
+class CachedResultExpired(Exception):
+  """The cached result expired or was evicted while its rows were being read."""
+
+
+class ResultCache(object):
+
+  def __init__(self, cache=None, max_bytes=None, max_user_bytes=None, ttl=RESULT_TTL):
+    self.cache = cache if cache is not None else caches[CACHES_CELERY_QUERY_RESULT_KEY]
+    self.max_bytes = max_bytes if max_bytes is not None else TASK_SERVER.RESULT_CACHE_MAX_BYTES.get()
+    self.max_user_bytes = max_user_bytes if max_user_bytes is not None else TASK_SERVER.RESULT_CACHE_MAX_BYTES_PER_USER.get()
+    self.ttl = ttl
+
+  def set(self, result_key, user, headers, rows):
+    """
+    Caches the rows chunk by chunk, without holding more than one chunk in memory.
+    Returns False if the result is too large for the budgets of the user.
+    """
+    size = 0
+    chunk_count = 0
+
+    rows = iter(rows)
+    while True:
+      chunk = list(islice(rows, CHUNK_ROWS))
+      if not chunk:
+        break
+
+      data = _encode_chunk(chunk)
+      size += len(data)
+      if size > min(self.max_bytes, self.max_user_bytes):
+        LOG.info('Results %s are larger than the result cache budget, reading them from the result storage.' % result_key)
+        self._delete_chunks(result_key, chunk_count)
+        return False
+
+      self.cache.set(_chunk_key(result_key, chunk_count), data, self.ttl)
+      chunk_count += 1
+
+    self.cache.set(_meta_key(result_key), {'headers': headers, 'chunks': chunk_count, 'size': size}, self.ttl)
+    self._track(result_key, user, size)
+
+    return True
+
+  def get(self, result_key, skip=0):
+    """
+    Returns the headers and an iterator over the rows positioned after the first `skip` rows, or None if the result is not cached.
+    The iterator raises CachedResultExpired when the next rows are not cached anymore.
+    """
+    meta = self.cache.get(_meta_key(result_key))
+    if meta is None:
+      return None
+
+    self._touch(result_key)
+
+    return meta['headers'], self._rows(result_key, meta['chunks'], skip)
+
+  def delete(self, result_key):
+    meta = self.cache.get(_meta_key(result_key))
+    if meta is not None:
+      self._delete_chunks(result_key, meta['chunks'])
+    self.cache.delete(_meta_key(result_key))
+
+    entries = self.cache.get(ENTRIES_KEY, [])
+    self.cache.set(ENTRIES_KEY, [entry for entry in entries if entry[0] != result_key], self.ttl)
+
+  def _rows(self, result_key, chunk_count, skip):
+    for chunk_id in range(skip // CHUNK_ROWS, chunk_count):
+      data = self.cache.get(_chunk_key(result_key, chunk_id))
+      if data is None:
+        raise CachedResultExpired('Cached results %s expired while being read.' % result_key)
+
+      chunk = _decode_chunk(data)
+      if chunk_id == skip // CHUNK_ROWS:
+        chunk = chunk[skip % CHUNK_ROWS:]
+
+      for row in chunk:
+        yield row
+
+  def _delete_chunks(self, result_key, chunk_count):
+    self.cache.delete_many([_chunk_key(result_key, chunk_id) for chunk_id in range(chunk_count)])
+
+  def _track(self, result_key, user, size):
+    # The bookkeeping is best effort: concurrent updates can lose an entry, which then just expires with its TTL.
+    # The entries are ordered from the least to the most recently used, reads moving them to the end.
+    now = time.time()
+    entries = [entry for entry in self.cache.get(ENTRIES_KEY, []) if entry[0] != result_key and entry[3] > now]
+    entries.append([result_key, user, size, now + self.ttl])
+
+    total_bytes = sum(entry[2] for entry in entries)
+    user_bytes = sum(entry[2] for entry in entries if entry[1] == user)
+
+    evicted = []
+    for entry in entries:
+      if total_bytes <= self.max_bytes and user_bytes <= self.max_user_bytes:
+        break
+      if entry[0] == result_key:
+        continue
+      if total_bytes > self.max_bytes or entry[1] == user:
+        evicted.append(entry)
+        total_bytes -= entry[2]
+        if entry[1] == user:
+          user_bytes -= entry[2]
+
+    for entry in evicted:
+      LOG.info('Evicting cached results %s.' % entry[0])
+      meta = self.cache.get(_meta_key(entry[0]))
+      if meta is not None:
+        self._delete_chunks(entry[0], meta['chunks'])
+      self.cache.delete(_meta_key(entry[0]))
+
+    evicted_keys = set(entry[0] for entry in evicted)
+    self.cache.set(ENTRIES_KEY, [entry for entry in entries if entry[0] not in evicted_keys], self.ttl)
+
+  def _touch(self, result_key):
+    entries = self.cache.get(ENTRIES_KEY, [])
+    touched = [entry for entry in entries if entry[0] == result_key]
+    if touched and entries[-1][0] != result_key:
+      self.cache.set(ENTRIES_KEY, [entry for entry in entries if entry[0] != result_key] + touched, self.ttl)
+
+
+def _meta_key(result_key):
+  return result_key + '_meta'
+
+def _chunk_key(result_key, chunk_id):
+  return '%s_chunk_%d' % (result_key, chunk_id)
+
+def _encode_chunk(rows):
+  output = string_io()
+  csv.writer(output).writerows(rows)
+  return zlib.compress(output.getvalue().encode('utf-8'))
+
+def _decode_chunk(data):
+  return list(csv.reader(string_io(zlib.decompress(data).decode('utf-8'))))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import sys
+
+from django.core.cache.backends.locmem import LocMemCache
+from nose.tools import assert_equal, assert_true, assert_false, assert_raises
+
+from notebook.result_cache import CachedResultExpired, ResultCache, ENTRIES_KEY
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch
+else:
+  from mock import patch
+
+
+LOG = logging.getLogger()
+
+
+class TestResultCache():
+
+  def setUp(self):
+    self.cache = LocMemCache('test_result_cache', {})
+    self.cache.clear()
+    self.rows = [[str(i), 'multi\nline', u'€'] for i in range(10)]
+
+
+  def test_get_pages(self):
+    with patch('notebook.result_cache.CHUNK_ROWS', 3):
+      result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=1024 * 1024)
+
+      assert_true(result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows))
+
+      for skip in (0, 2, 3, 4, 9, 10):
+        headers, rows = result_cache.get('1_result', skip=skip)
+        assert_equal(['a', 'b', 'c'], headers)
+        assert_equal(self.rows[skip:], list(rows))
+
+      assert_equal(None, result_cache.get('2_result'))
+
+
+  def test_evict_least_recently_used(self):
+    result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=1024 * 1024)
+    result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows)
+    size = self.cache.get(ENTRIES_KEY)[0][2]
+
+    result_cache = ResultCache(cache=self.cache, max_bytes=size * 2, max_user_bytes=size * 2)
+    result_cache.set('2_result', 'test', ['a', 'b', 'c'], self.rows)
+    result_cache.get('1_result')
+    result_cache.set('3_result', 'test', ['a', 'b', 'c'], self.rows)
+
+    assert_equal(['1_result', '3_result'], [entry[0] for entry in self.cache.get(ENTRIES_KEY)])
+    assert_equal(None, result_cache.get('2_result'))
+
+
+  def test_expired_results_leave_the_budget(self):
+    result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=1024 * 1024)
+    result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows)
+    size = self.cache.get(ENTRIES_KEY)[0][2]
+
+    result_cache = ResultCache(cache=self.cache, max_bytes=size * 2, max_user_bytes=size * 2)
+    with patch('notebook.result_cache.time.time', return_value=10 ** 10):
+      result_cache.set('2_result', 'test', ['a', 'b', 'c'], self.rows)
+
+    assert_equal(['2_result'], [entry[0] for entry in self.cache.get(ENTRIES_KEY)])
+
+
+  def test_expire_while_reading(self):
+    with patch('notebook.result_cache.CHUNK_ROWS', 3):
+      result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=1024 * 1024)
+      result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows)
+
+      headers, rows = result_cache.get('1_result', skip=2)
+      assert_equal(self.rows[2], next(rows))
+      self.cache.delete('1_result_chunk_1')
+
+      assert_raises(CachedResultExpired, list, rows)
+
+
+  def test_evict_per_user(self):
+    result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=1024 * 1024)
+    result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows)
+    size = self.cache.get(ENTRIES_KEY)[0][2]
+
+    result_cache = ResultCache(cache=self.cache, max_bytes=1024 * 1024, max_user_bytes=size)
+    result_cache.set('2_result', 'other', ['a', 'b', 'c'], self.rows)
+    result_cache.set('3_result', 'test', ['a', 'b', 'c'], self.rows)
+
+    assert_equal(['2_result', '3_result'], [entry[0] for entry in self.cache.get(ENTRIES_KEY)])
+
+
+  def test_too_large(self):
+    result_cache = ResultCache(cache=self.cache, max_bytes=10, max_user_bytes=10)
+
+    assert_false(result_cache.set('1_result', 'test', ['a', 'b', 'c'], self.rows))
+    assert_equal(None, result_cache.get('1_result'))
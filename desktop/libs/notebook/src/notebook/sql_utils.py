@@ -17,26 +17,70 @@
 
 from future import standard_library
 standard_library.install_aliases()
+import bisect
 import hashlib
 import os
 import re
 import sys
+import threading
+
+from collections import OrderedDict
 
 from desktop.lib.i18n import smart_str
 
-if sys.version_info[0] > 2:
-  from io import StringIO as string_io
-else:
-  from StringIO import StringIO as string_io
+
+LINE_BREAK_CHARS = u'\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'  # Same as str.splitlines()
+LINE_BREAK_REGEX = re.compile(u'\r\n|[%s]' % LINE_BREAK_CHARS)
+NON_WHITESPACE_REGEX = re.compile(r'\S', re.UNICODE)
+
+_STATEMENT_TOKENS = [
+  u'--[^%s]*' % LINE_BREAK_CHARS,  # Line comment
+  r'/\*.*?(?:\*/|\Z)',  # Block comment
+  r"'[^'\\]*(?:\\.?[^'\\]*)*(?:'|\Z)",
+  r'"[^"\\]*(?:\\.?[^"\\]*)*(?:"|\Z)',
+  r'`[^`]*(?:`|\Z)',
+  r'\\[\'"]',  # Escaped quote outside of a string
+  r';',
+]
+STATEMENT_TOKEN_REGEX = re.compile('|'.join(_STATEMENT_TOKENS), re.DOTALL)
+DOLLAR_QUOTED_STATEMENT_TOKEN_REGEX = re.compile(
+  '|'.join([r'\$(?P<tag>(?:[A-Za-z_]\w*)?)\$.*?(?:\$(?P=tag)\$|\Z)'] + _STATEMENT_TOKENS), re.DOTALL
+)
+DOLLAR_QUOTED_DIALECTS = ('postgresql', 'redshift')
+
+STATEMENTS_CACHE_SIZE = 100
+_STATEMENTS_CACHE = OrderedDict()
+_STATEMENTS_CACHE_LOCK = threading.Lock()
 
 
-# Note: Might be replaceable by sqlparse.split
 def get_statements(hql_query, dialect=None):
+  """
+  Returns the statements of the query with their positions. The split is cached by hash of the query, as the same
+  editor content is sent again with each execute, check status and fetch result of its statements.
+  """
+  key = (compute_statement_hash(hql_query), dialect)
+
+  with _STATEMENTS_CACHE_LOCK:
+    statements = _STATEMENTS_CACHE.pop(key, None)
+    if statements is not None:
+      _STATEMENTS_CACHE[key] = statements
+
+  if statements is None:
+    statements = _get_statements(hql_query, dialect)
+    with _STATEMENTS_CACHE_LOCK:
+      _STATEMENTS_CACHE[key] = statements
+      while len(_STATEMENTS_CACHE) > STATEMENTS_CACHE_SIZE:
+        _STATEMENTS_CACHE.popitem(last=False)
+
+  return [
+    dict(statement, start=dict(statement['start']), end=dict(statement['end'])) for statement in statements
+  ]
+
+def _get_statements(hql_query, dialect=None):
   hql_query = strip_trailing_semicolon(hql_query)
-  hql_query_sio = string_io(hql_query)
 
   statements = []
-  for (start_row, start_col), (end_row, end_col), statement in split_statements(hql_query_sio.read(), dialect):
+  for (start_row, start_col), (end_row, end_col), statement in split_statements(hql_query, dialect):
     statements.append({
       'start': {
         'row': start_row,
@@ -95,66 +139,54 @@ def split_statements(hql, dialect=None):
   """
   Split statements at semicolons ignoring the ones inside quotes and comments.
   The comment symbols that come inside quotes should be ignored.
-  """
-  statements = []
-  current = ''
-  prev = ''
-  between_quotes = None
-  is_comment = None
-  start_row = 0
-  start_col = 0
-  end_row = 0
-  end_col = len(hql) - 1
 
+  Returns a list of ((start_row, start_col), (end_row, end_col), statement). The query is tokenized in a single pass
+  so that the split is linear in the size of the query.
+  """
   if hql.find(';') in (-1, len(hql) - 1) or dialect == 'hplsql':
-    return [((start_row, start_col), (end_row, end_col), hql)]
-
-  lines = hql.splitlines()
-
-  for row, line in enumerate(lines):
-    end_col = 0
-    end_row = row
-
-    if start_row == row and line.strip() == '':  # ignore leading whitespace rows
-      start_row += 1
-    elif current.strip() == '':  # reset start_row
-      start_row = row
-      start_col = 0
-
-    for col, c in enumerate(line):
-      current += c
-
-      if c in ('"', "'") and prev != '\\' and is_comment is None:
-        if between_quotes == c:
-          between_quotes = None
-        elif between_quotes is None:
-          between_quotes = c
-      elif c == '-' and prev == '-' and between_quotes is None and is_comment is None:
-        is_comment = True
-      elif c == ';':
-        if between_quotes is None and is_comment is None:
-          current = current.strip()
-          # Strip off the trailing semicolon
-          current = current[:-1]
-          if len(current) > 1:
-            statements.append(((start_row, start_col), (row, col + 1), current))
-            start_col = col + 1
-          current = ''
-      # This character holds no significance if it was escaped within a string
-      if prev == '\\' and between_quotes is not None:
-        c = ''
-      prev = c
-      end_col = col
-
-    is_comment = None
-    prev = os.linesep
-
-    if current != '':
-      current += os.linesep
-
-  if current and current != ';':
-    current = current.strip()
-    statements.append(((start_row, start_col), (end_row, end_col+1), current))
+    return [((0, 0), (0, len(hql) - 1), hql)]
+
+  token_regex = DOLLAR_QUOTED_STATEMENT_TOKEN_REGEX if dialect in DOLLAR_QUOTED_DIALECTS else STATEMENT_TOKEN_REGEX
+  semicolons = [match.start() for match in token_regex.finditer(hql) if match.group() == ';']
+
+  # Offsets of the lines, as numbered by hql.splitlines()
+  line_starts = [0]
+  last_line_end = len(hql)
+  for match in LINE_BREAK_REGEX.finditer(hql):
+    if match.end() < len(hql):
+      line_starts.append(match.end())
+    else:
+      last_line_end = match.start()
+
+  def get_position(offset):
+    row = bisect.bisect_right(line_starts, offset) - 1
+    return row, offset - line_starts[row]
+
+  statements = []
+  start_position = (0, 0)
+  start = 0
+
+  for end in semicolons + [len(hql)]:
+    first_char = NON_WHITESPACE_REGEX.search(hql, start, end)
+    first_char = first_char.start() if first_char else end
+
+    # A statement starting on a new line starts at the beginning of this line
+    row = bisect.bisect_right(line_starts, first_char) - 1
+    if line_starts[row] >= start:
+      start_position = (row, 0)
+
+    statement = LINE_BREAK_REGEX.sub(os.linesep, hql[start:end])
+    if end < len(hql):
+      statement = statement.lstrip()
+      if len(statement) > 1:
+        row, col = get_position(end)
+        statements.append((start_position, (row, col + 1), statement))
+        start_position = (row, col + 1)
+    elif hql[start:].strip(LINE_BREAK_CHARS):
+      last_line = len(line_starts) - 1
+      statements.append((start_position, (last_line, max(last_line_end - line_starts[last_line], 1)), statement.strip()))
+
+    start = end + 1
 
   return statements
 
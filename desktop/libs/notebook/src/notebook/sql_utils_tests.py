@@ -16,10 +16,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+
 from beeswax.design import hql_query
-from notebook.sql_utils import strip_trailing_semicolon, split_statements
+from notebook.sql_utils import strip_trailing_semicolon, split_statements, get_statements
 
-from nose.tools import assert_equal, assert_not_equal
+from nose.tools import assert_equal, assert_not_equal, assert_true
 
 
 def test_split_statements():
@@ -37,6 +39,60 @@ def test_split_statements():
   )
 
 
+def test_split_statements_comments_and_quotes():
+  assert_equal(
+    [
+      ((0, 0), (0, 9), 'SELECT 1'),
+      ((1, 0), (2, 11), 'SELECT `a;b` /* ;\n */ FROM t'),
+      ((2, 11), (2, 21), 'SELECT 2'),
+      ((3, 0), (4, 8), '-- Comment;\nSELECT 3')
+    ],
+    split_statements("SELECT 1;\nSELECT `a;b` /* ;\n */ FROM t; SELECT 2;\n-- Comment;\nSELECT 3")
+  )
+  assert_equal(
+    ["SELECT 'It''s;' FROM t", "SELECT 'a\\';' FROM t"],
+    [statement for _, _, statement in split_statements("SELECT 'It''s;' FROM t;\nSELECT 'a\\';' FROM t")]
+  )
+
+  statement = "CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;\nSELECT f()"
+  assert_equal(
+    ["CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql", 'SELECT f()'],
+    [statement for _, _, statement in split_statements(statement, 'postgresql')]
+  )
+  assert_equal(4, len(split_statements(statement)))
+
+
+def test_split_statements_large_script():
+  script = 'SELECT\n' + '  col_with_a_long_name,\n' * 100000 + '  x\nFROM t;\n' + "SELECT 'a;b' FROM t; -- Comment;\n" * 10000
+
+  start = time.time()
+  statements = split_statements(script)
+
+  assert_true(time.time() - start < 2, time.time() - start)
+  assert_equal(10002, len(statements))
+  assert_equal(((0, 0), (100002, 7)), statements[0][:2])
+  assert_equal(((100003, 20), (100004, 20)), statements[2][:2])
+
+
+def test_get_statements_cache():
+  statements = get_statements('SELECT 1;\nSELECT 2;\n')
+  assert_equal(
+    [
+      {'start': {'row': 0, 'column': 0}, 'end': {'row': 0, 'column': 9}, 'statement': 'SELECT 1'},
+      {'start': {'row': 1, 'column': 0}, 'end': {'row': 1, 'column': 8}, 'statement': 'SELECT 2'}
+    ],
+    statements
+  )
+
+  statements[0]['statement'] = 'DROP TABLE t'
+  statements[0]['start']['row'] = 10
+
+  assert_equal(
+    {'start': {'row': 0, 'column': 0}, 'end': {'row': 0, 'column': 9}, 'statement': 'SELECT 1'},
+    get_statements('SELECT 1;\nSELECT 2;\n')[0]
+  )
+
+
 def teststrip_trailing_semicolon():
   # Note that there are two queries (both an execute and an explain) scattered
   # in this file that use semicolons all the way through.
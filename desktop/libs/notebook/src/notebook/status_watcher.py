@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Watcher of the status of the queries opened in the editors connected through websockets.
+
+The editors subscribe their websocket channel to the operations they are running instead of polling the check_status
+API. A background thread checks the status of each watched operation once every STATUS_WATCHER_INTERVAL seconds,
+however many editors are watching it, and pushes the changes of status and progress to the channel group of the
+operation. An operation is not watched anymore once its query is finished or nobody watches it.
+
+The results are not pushed: fetching them moves the result cursor of the operation, which is shared with the
+editors. The editors fetch the first page themselves when they receive the 'available' status.
+"""
+
+from builtins import object
+import json
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+from desktop.auth.backend import rewrite_user
+from desktop.lib import fsmanager
+from desktop.lib.i18n import smart_str
+from useradmin.models import User
+
+from notebook.conf import STATUS_WATCHER_INTERVAL
+from notebook.connectors.base import QueryExpired, SessionExpired
+from notebook.models import MockRequest
+
+
+LOG = logging.getLogger()
+
+FINISHED_STATUSES = ('available', 'success', 'failed', 'expired', 'canceled', 'closed')
+
+
+def get_status_group(operation_id):
+  return 'editor-status-%s' % operation_id
+
+
+class _Operation(object):
+
+  def __init__(self, user_id):
+    self.user_id = user_id
+    self.user = None
+    self.channels = set()
+    self.last_message = None
+
+
+class StatusWatcher(object):
+
+  def __init__(self):
+    self._operations = {}  # operation_id -> _Operation
+    self._lock = threading.Lock()
+    self._thread = None
+
+  def watch(self, user, operation_id, channel_name):
+    """
+    Adds the channel to the watchers of the operation, the user needs to be allowed to read it.
+    Returns the last status pushed for the operation if any.
+    """
+    with self._lock:
+      operation = self._operations.get(operation_id)
+      if operation is None:
+        operation = self._operations[operation_id] = _Operation(user.id)
+      operation.channels.add(channel_name)
+      last_message = operation.last_message
+
+    self._start_thread()
+
+    return last_message
+
+  def unwatch(self, operation_id, channel_name):
+    with self._lock:
+      operation = self._operations.get(operation_id)
+      if operation is not None:
+        operation.channels.discard(channel_name)
+        if not operation.channels:
+          del self._operations[operation_id]
+
+  def __len__(self):
+    return len(self._operations)
+
+  def check_all(self):
+    """
+    Checks the status of all the watched operations and pushes the new ones.
+    """
+    with self._lock:
+      operations = list(self._operations.items())
+
+    for operation_id, operation in operations:
+      message = self._check(operation_id, operation)
+
+      if message != operation.last_message:
+        operation.last_message = message
+        _send_to_group(get_status_group(operation_id), message)
+
+      if message['status'] in FINISHED_STATUSES:
+        with self._lock:
+          if self._operations.get(operation_id) is operation:
+            del self._operations[operation_id]
+
+  def _check(self, operation_id, operation):
+    from notebook.api import _check_status, _get_notebook  # Circular import
+
+    message = {'operationId': operation_id}
+
+    try:
+      if operation.user is None:
+        operation.user = rewrite_user(User.objects.get(id=operation.user_id))
+      request = MockRequest(operation.user, fs=fsmanager.get_filesystem('default'))
+
+      query_status = _check_status(request, operation_id=operation_id)['query_status']
+      message.update(query_status)
+
+      if message['status'] in ('available', 'success'):
+        message['progress'] = 100
+      else:
+        message['progress'] = self._get_progress(request, _get_notebook(request.user, {}, operation_id))
+    except (QueryExpired, SessionExpired):
+      message['status'] = 'expired'
+    except Exception as e:
+      LOG.warning('Failed to check the status of the operation %s: %s' % (operation_id, e))
+      message['status'] = 'failed'
+      message['message'] = smart_str(getattr(e, 'message', None) or e)
+
+    return message
+
+  def _get_progress(self, request, notebook):
+    """
+    Progress computed from the logs of the query when they are returned in full. Otherwise reading them would consume
+    the logs fetched by the editors.
+    """
+    from notebook.models import get_api
+
+    snippet = notebook['snippets'][0]
+    api = get_api(request, snippet)
+
+    if api.get_log_is_full_log(notebook, snippet):
+      logs = smart_str(api.get_log(notebook, snippet))
+      return min(api.progress(notebook, snippet, logs=logs), 99)
+
+  def _start_thread(self):
+    with self._lock:
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._check_periodically, name='StatusWatcher')
+        self._thread.daemon = True
+        self._thread.start()
+
+  def _check_periodically(self):
+    while True:
+      interval = STATUS_WATCHER_INTERVAL.get()
+      with self._lock:
+        if not self._operations or interval <= 0:
+          self._thread = None
+          return
+
+      time.sleep(interval)
+      try:
+        self.check_all()
+      except Exception as e:
+        LOG.warning('Failed to check the status of the watched queries: %s' % e)
+      finally:
+        close_old_connections()
+
+
+def _send_to_group(group, message):
+  from asgiref.sync import async_to_sync
+  from channels.layers import get_channel_layer
+
+  message = json.loads(json.dumps(message, default=smart_str))  # e.g. decimals or dates of the result rows
+  async_to_sync(get_channel_layer().group_send)(group, {'type': 'task_status', 'data': message})
+
+
+STATUS_WATCHER = StatusWatcher()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# Licensed to Cloudera, Inc. under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  Cloudera, Inc. licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import sys
+
+from nose.tools import assert_equal, assert_false
+
+from notebook.connectors.base import QueryExpired
+from notebook.status_watcher import StatusWatcher, get_status_group
+
+if sys.version_info[0] > 2:
+  from unittest.mock import patch, Mock
+else:
+  from mock import patch, Mock
+
+
+LOG = logging.getLogger()
+
+
+class TestStatusWatcher():
+
+  def setUp(self):
+    self.watcher = StatusWatcher()
+    self.user = Mock(id=1)
+
+    self.patches = [
+      patch('notebook.status_watcher.StatusWatcher._start_thread'),
+      patch('notebook.status_watcher.User'),
+      patch('notebook.status_watcher.rewrite_user', side_effect=lambda user: user),
+      patch('notebook.status_watcher.fsmanager'),
+    ]
+    for _patch in self.patches:
+      _patch.start()
+
+  def tearDown(self):
+    for _patch in self.patches:
+      _patch.stop()
+
+
+  def test_check_once_per_operation(self):
+    self.watcher.watch(self.user, 'a', 'channel-1')
+    self.watcher.watch(self.user, 'a', 'channel-2')
+    self.watcher.watch(self.user, 'b', 'channel-1')
+
+    with patch('notebook.api._check_status') as _check_status:
+      with patch('notebook.status_watcher._send_to_group') as _send_to_group:
+        _check_status.return_value = {'query_status': {'status': 'running'}}
+        with patch('notebook.status_watcher.StatusWatcher._get_progress', return_value=10):
+          self.watcher.check_all()
+
+          assert_equal(2, _check_status.call_count)
+          assert_equal(
+            sorted([(get_status_group('a'), 'a'), (get_status_group('b'), 'b')]),
+            sorted([(call[0][0], call[0][1]['operationId']) for call in _send_to_group.call_args_list])
+          )
+          assert_equal({'operationId': 'a', 'status': 'running', 'progress': 10}, _send_to_group.call_args_list[0][0][1])
+
+          # Same status: nothing pushed
+          self.watcher.check_all()
+          assert_equal(2, _send_to_group.call_count)
+
+          # Late watchers get the last status
+          assert_equal('running', self.watcher.watch(self.user, 'a', 'channel-3')['status'])
+
+
+  def test_push_status_and_stop_watching_finished_queries(self):
+    self.watcher.watch(self.user, 'a', 'channel-1')
+    self.watcher.watch(self.user, 'b', 'channel-1')
+
+    with patch('notebook.api._check_status') as _check_status:
+      with patch('notebook.api._fetch_result_data') as _fetch_result_data:
+        with patch('notebook.status_watcher._send_to_group') as _send_to_group:
+          _check_status.side_effect = [{'query_status': {'status': 'available', 'has_result_set': True}}, QueryExpired()]
+
+          self.watcher.check_all()
+
+          messages = dict((call[0][1]['operationId'], call[0][1]) for call in _send_to_group.call_args_list)
+          assert_equal({'operationId': 'a', 'status': 'available', 'has_result_set': True, 'progress': 100}, messages['a'])
+          # The editors fetch the results, the shared result cursor is not moved
+          assert_false(_fetch_result_data.called)
+          assert_equal('expired', messages['b']['status'])
+          assert_equal(0, len(self.watcher))
+
+
+  def test_unwatch(self):
+    self.watcher.watch(self.user, 'a', 'channel-1')
+    self.watcher.watch(self.user, 'a', 'channel-2')
+
+    self.watcher.unwatch('a', 'channel-1')
+    assert_equal(1, len(self.watcher))
+
+    self.watcher.unwatch('a', 'channel-2')
+    assert_equal(0, len(self.watcher))
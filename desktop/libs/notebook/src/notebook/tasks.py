@@ -29,6 +29,8 @@ import logging
 import sys
 import time
 
+from itertools import islice
+
 from celery.utils.log import get_task_logger
 from celery import states
 from django.core.cache import caches
@@ -36,18 +38,20 @@ from django.core.files.storage import get_storage_class
 from django.db import transaction
 from django.http import FileResponse, HttpRequest
 
+from beeswax.conf import DOWNLOAD_PREFETCH_BATCHES
 from beeswax.data_export import DataAdapter
 from desktop.auth.backend import rewrite_user
 from desktop.celery import app
 from desktop.conf import ENABLE_HUE_5, TASK_SERVER
 from desktop.lib import export_csvxls, fsmanager
 from desktop.models import Document2
-from desktop.settings import CACHES_CELERY_KEY, CACHES_CELERY_QUERY_RESULT_KEY
+from desktop.settings import CACHES_CELERY_KEY
 from useradmin.models import User
 
 from notebook.api import _get_statement
 from notebook.connectors.base import get_api, QueryExpired, ExecutionWrapper, QueryError
 from notebook.models import make_notebook, MockedDjangoRequest, Notebook
+from notebook.result_cache import CachedResultExpired, ResultCache
 from notebook.sql_utils import get_current_statement
 
 if sys.version_info[0] > 2:
@@ -72,6 +76,7 @@ STATE_MAP = {
   states.REJECTED: 'rejected',
   states.IGNORED: 'ignored'
 }
+RESULT_INDEX_ROW_INTERVAL = 1000  # Record the byte offset of one result row out of every N
 storage_info = json.loads(TASK_SERVER.RESULT_STORAGE.get())
 storage = get_storage_class(storage_info.get('backend'))(**storage_info.get('properties', {}))
 
@@ -126,21 +131,31 @@ def download_to_file(notebook, snippet, file_format='csv', max_rows=-1, **kwargs
     content_generator = DataAdapter(
         result_wrapper,
         max_rows=max_rows,
-        store_data_type_in_header=True
+        store_data_type_in_header=True,
+        prefetch_batches=DOWNLOAD_PREFETCH_BATCHES.get()
     )
     response = export_csvxls.create_generator(content_generator, file_format)
 
+    result_index = ResultIndexBuilder()
+
     with storage.open(result_key, 'wb') as f:
       for chunk in response:
-        f.write(chunk.encode('utf-8'))
+        chunk = chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+        f.write(chunk)
+        if file_format == 'csv':
+          result_index.update(chunk)
+
+    if file_format == 'csv':
+      _write_result_index(task_id, result_index.get_offsets())
 
-    if TASK_SERVER.RESULT_CACHE.get():
+    if TASK_SERVER.RESULT_CACHE.get() and file_format == 'csv':
       with storage.open(result_key, 'rb') as store:
         with codecs.getreader('utf-8')(store) as text_file:
           delimiter = ',' if sys.version_info[0] > 2 else ','.encode('utf-8')
           csv_reader = csv.reader(text_file, delimiter=delimiter)
-          caches[CACHES_CELERY_QUERY_RESULT_KEY].set(result_key, [row for row in csv_reader], 60 * 5)
-          LOG.info('Caching results %s.' % result_key)
+          headers = next(csv_reader, [])
+          if ResultCache().set(result_key, request.user.username, headers, csv_reader):
+            LOG.info('Caching results %s.' % result_key)
 
     meta['row_counter'] = content_generator.row_counter
     meta['truncated'] = content_generator.is_truncated
@@ -374,17 +389,15 @@ def fetch_result(notebook, snippet, rows, start_over, **kwargs):
 
   if info.get('handle', {}).get('has_result_set', False):
     csv.field_size_limit(sys.maxsize)
-    count = 0
-    headers, csv_reader = _get_data(task_id)
+    headers, csv_reader = _get_data(task_id, skip=skip)
 
     for col in headers:
       split = col.split('|')
       split_type = split[1] if len(split) > 1 else 'STRING_TYPE'
       cols.append({'name': split[0], 'type': split_type, 'comment': None})
+    count = skip
     for row in csv_reader:
       count += 1
-      if count <= skip:  # TODO: seek(skip) or [skip:]
-        continue
       data.append(row)
       if count >= target:
         break
@@ -396,24 +409,144 @@ def fetch_result(notebook, snippet, rows, start_over, **kwargs):
   return results
 
 
-def _get_data(task_id):
+def _get_data(task_id, skip=0):
+  """
+  Returns the headers and an iterator over the result rows, positioned after the first `skip` rows.
+  """
   result_key = _result_key(task_id)
 
   if TASK_SERVER.RESULT_CACHE.get():
-    csv_reader = caches[CACHES_CELERY_QUERY_RESULT_KEY].get(result_key)  # TODO check if expired
-    if csv_reader is None:
-      raise QueryError('Cached results %s not found.' % result_key)
-    headers = csv_reader[0] if csv_reader else []  # TODO check size
-    csv_reader = csv_reader[1:] if csv_reader else []
-  else:
-    f = storage.open(result_key, 'rb')
-    delimiter = ',' if sys.version_info[0] > 2 else ','.encode('utf-8')
-    csv_reader = csv.reader(f, delimiter=delimiter)
-    headers = next(csv_reader, [])
+    cached = ResultCache().get(result_key, skip=skip)
+    if cached is not None:
+      headers, rows = cached
+      return headers, _rows_with_storage_fallback(task_id, rows, skip)
+    LOG.debug('Cached results %s not found, reading them from the result storage.' % result_key)
+
+  return _get_stored_data(task_id, skip)
+
+
+def _rows_with_storage_fallback(task_id, rows, skip):
+  """
+  Yields the cached rows, then the next ones from the result storage if the cached result expires while being read.
+  """
+  try:
+    for row in rows:
+      yield row
+      skip += 1
+  except CachedResultExpired as e:
+    LOG.info('%s Reading the next rows from the result storage.' % e)
+    for row in _get_stored_data(task_id, skip)[1]:
+      yield row
+
+
+def _get_stored_data(task_id, skip=0):
+  result_key = _result_key(task_id)
+
+  f = storage.open(result_key, 'rb')
+  lines = OffsetLineReader(f)
+  delimiter = ',' if sys.version_info[0] > 2 else ','.encode('utf-8')
+  csv_reader = csv.reader(lines, delimiter=delimiter)
+  headers = next(csv_reader, [])
+
+  if skip:
+    offsets = _get_result_index(task_id)
+    position = min(skip // RESULT_INDEX_ROW_INTERVAL, len(offsets)) if offsets else 0
+    if position:
+      f.seek(offsets[position - 1])
+      lines.offset = offsets[position - 1]
+      skip -= position * RESULT_INDEX_ROW_INTERVAL
+    for _ in islice(csv_reader, skip):
+      pass
 
   return headers, csv_reader
 
 
+class OffsetLineReader(object):
+  """
+  Iterates over the decoded lines of a binary file while keeping the byte offset of the next line to read.
+
+  As csv.reader pulls one line at a time, the offset read before each record is where that record starts.
+  """
+
+  def __init__(self, f, encoding='utf-8'):
+    self.f = f
+    self.encoding = encoding
+    self.offset = 0
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    line = self.f.readline()
+    if not line:
+      raise StopIteration
+    self.offset += len(line)
+    return line.decode(self.encoding) if sys.version_info[0] > 2 else line
+
+  next = __next__
+
+
+class ResultIndexBuilder(object):
+  """
+  Records the byte offsets of the rows RESULT_INDEX_ROW_INTERVAL, 2 * RESULT_INDEX_ROW_INTERVAL... of a CSV result
+  while its chunks are written, instead of reading the result again once written.
+
+  A row ends at a newline outside of a quoted field. As the csv writer doubles the quotes inside the fields, a newline
+  is outside of the quoted fields when an even number of quotes precede it in the row. Neither of these two bytes can
+  be part of a multibyte UTF-8 character.
+  """
+
+  def __init__(self):
+    self.offsets = []
+    self.rows = 0  # Rows ended so far, including the headers
+    self.size = 0
+    self._quotes = 0  # Quotes seen in the current row
+
+  def update(self, chunk):
+    start = 0
+
+    while True:
+      end = chunk.find(b'\n', start)
+      if end == -1:
+        self._quotes += chunk.count(b'"', start)
+        break
+
+      self._quotes += chunk.count(b'"', start, end)
+      if self._quotes % 2 == 0:
+        self._quotes = 0
+        self.rows += 1
+        if self.rows > 1 and (self.rows - 1) % RESULT_INDEX_ROW_INTERVAL == 0:
+          self.offsets.append(self.size + end + 1)
+      start = end + 1
+
+    self.size += len(chunk)
+
+  def get_offsets(self):
+    # The last row of the result is followed by a newline but by no other row
+    return [offset for offset in self.offsets if offset < self.size]
+
+
+def _write_result_index(task_id, offsets):
+  """
+  Stores next to the result the byte offsets of its indexed rows, see ResultIndexBuilder, so that fetching a page can
+  seek to the closest indexed row instead of reading the result from the start.
+  """
+  with storage.open(_result_index_key(task_id), 'wb') as f:
+    f.write(json.dumps({'interval': RESULT_INDEX_ROW_INTERVAL, 'offsets': offsets}).encode('utf-8'))
+
+
+def _get_result_index(task_id):
+  index_key = _result_index_key(task_id)
+
+  if not storage.exists(index_key):
+    return []
+
+  with storage.open(index_key, 'rb') as f:
+    index = json.loads(f.read().decode('utf-8'))
+
+  return index['offsets'] if index.get('interval') == RESULT_INDEX_ROW_INTERVAL else []
+
+
 def fetch_result_size(*args, **kwargs):
   notebook = args[0]
   result = download_to_file.AsyncResult(notebook['uuid'])
@@ -487,7 +620,10 @@ def _cleanup(notebook, snippet):
   task_id = _get_query_key(notebook, snippet)
 
   storage.delete(_result_key(task_id))  # TODO: abstract storage + caches
+  storage.delete(_result_index_key(task_id))
   storage.delete(_log_key(notebook, snippet))
+  if TASK_SERVER.RESULT_CACHE.get():
+    ResultCache().delete(_result_key(task_id))
   caches[CACHES_CELERY_KEY].delete(_fetch_progress_key(notebook, snippet))
 
 def _get_query_key(notebook, snippet):
@@ -512,6 +648,9 @@ def _log_key(notebook, snippet):
 def _result_key(task_id):
   return task_id + '_result'
 
+def _result_index_key(task_id):
+  return task_id + '_result_index'
+
 def _fetch_progress_key(notebook, snippet):
   return _get_query_key(notebook, snippet) + '_fetch_progress'
 
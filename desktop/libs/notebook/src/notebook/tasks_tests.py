@@ -17,16 +17,21 @@
 # limitations under the License.
 
 import logging
+import shutil
 import sys
+import tempfile
 
 from celery import states
+from django.core.files.storage import FileSystemStorage
 from nose.tools import assert_equal, assert_not_equal, assert_true, assert_false
 
 from desktop.lib.django_test_util import make_logged_in_client
 from useradmin.models import User
 
 from notebook.connectors.sql_alchemy import SqlAlchemyApi
-from notebook.tasks import run_sync_query, download_to_file, close_statement, get_log
+from notebook.result_cache import CachedResultExpired
+from notebook.tasks import run_sync_query, download_to_file, close_statement, get_log, _get_data, _write_result_index, \
+    ResultIndexBuilder
 
 if sys.version_info[0] > 2:
   from unittest.mock import patch, Mock, MagicMock
@@ -50,7 +55,7 @@ class TestRunAsyncQueryTask():
       with patch('notebook.tasks.get_api') as get_api:
         with patch('notebook.tasks.DataAdapter') as DataAdapter:
           with patch('notebook.tasks.export_csvxls.create_generator') as create_generator:
-            with patch('notebook.tasks.caches') as caches:
+            with patch('notebook.tasks.ResultCache') as ResultCache:
 
               content_generator = MagicMock(row_counter=2)
               content_generator.__iter__.return_value = [('col1', [[1]]), ('col2', [[2]])]
@@ -147,3 +152,75 @@ class TestRunSyncQueryTask():
             task = run_sync_query(query, self.user)
 
             assert_equal(task, {'history_uuid': '1', 'uuid': '1'})
+
+
+
+class TestResultIndex():
+
+  def setUp(self):
+    self.location = tempfile.mkdtemp()
+    self.storage = FileSystemStorage(location=self.location)
+
+    content = 'id|INT_TYPE,name|STRING_TYPE\r\n' + ''.join(
+      '%d,"multi\nline"\r\n' % i if i % 3 else '%d,single\r\n' % i for i in range(25)
+    )
+    self.content = content.encode('utf-8')
+    with self.storage.open('1_result', 'wb') as f:
+      f.write(self.content)
+
+  def tearDown(self):
+    shutil.rmtree(self.location)
+
+
+  def test_get_data_seeks_to_skipped_rows(self):
+    with patch('notebook.tasks.storage', self.storage):
+      with patch('notebook.tasks.RESULT_INDEX_ROW_INTERVAL', 4):
+        with patch('notebook.tasks.TASK_SERVER.RESULT_CACHE.get', return_value=False):
+          result_index = ResultIndexBuilder()
+          for i in range(0, len(self.content), 7):
+            result_index.update(self.content[i:i + 7])
+          _write_result_index('1', result_index.get_offsets())
+
+          for skip in (0, 3, 4, 5, 8, 24):
+            headers, csv_reader = _get_data('1', skip=skip)
+
+            assert_equal(['id|INT_TYPE', 'name|STRING_TYPE'], headers)
+            assert_equal(str(skip), next(csv_reader)[0])
+
+          headers, csv_reader = _get_data('1', skip=25)
+          assert_equal(None, next(csv_reader, None))
+
+
+  def test_result_index_builder(self):
+    with patch('notebook.tasks.RESULT_INDEX_ROW_INTERVAL', 4):
+      result_index = ResultIndexBuilder()
+      # Chunks cut inside a quoted field and between the \r and \n of a row
+      for chunk in (b'id,name\r\n0,a\r\n1,"multi\n', b'line"\r\n2,"say ""hi""\n"\r', b'\n3,b\r\n4,c\r\n5,d\r\n'):
+        result_index.update(chunk)
+
+      assert_equal(6, result_index.rows - 1)
+      assert_equal([len(b'id,name\r\n0,a\r\n1,"multi\nline"\r\n2,"say ""hi""\n"\r\n3,b\r\n')], result_index.get_offsets())
+
+
+  def test_get_data_without_index(self):
+    with patch('notebook.tasks.storage', self.storage):
+      with patch('notebook.tasks.TASK_SERVER.RESULT_CACHE.get', return_value=False):
+        headers, csv_reader = _get_data('1', skip=7)
+
+        assert_equal(['7', 'multi\nline'], next(csv_reader))
+
+
+  def test_get_data_falls_back_to_storage_when_cache_expires(self):
+    def cached_rows():
+      yield ['5', 'multi\nline']
+      raise CachedResultExpired('Cached results 1_result expired while being read.')
+
+    with patch('notebook.tasks.storage', self.storage):
+      with patch('notebook.tasks.TASK_SERVER.RESULT_CACHE.get', return_value=True):
+        with patch('notebook.tasks.ResultCache') as ResultCache:
+          ResultCache.return_value.get.return_value = (['id|INT_TYPE', 'name|STRING_TYPE'], cached_rows())
+
+          headers, csv_reader = _get_data('1', skip=5)
+
+          assert_equal(['id|INT_TYPE', 'name|STRING_TYPE'], headers)
+          assert_equal([['5', 'multi\nline'], ['6', 'single'], ['7', 'multi\nline']], [next(csv_reader) for _ in range(3)])
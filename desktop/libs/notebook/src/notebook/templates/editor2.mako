@@ -1278,10 +1278,26 @@ There is no bridge to KO for components using this integration. Example using in
         window.WS_CHANNEL = data['data'];
       } else if (data['type'] === 'query_result') {
         huePubSub.publish('editor.ws.query.fetch_result', data['data']);
+      } else if (data['type'] === 'query_status') {
+        huePubSub.publish('editor.ws.query.status', data['data']);
+      } else if (data['type'] === 'query_status_watched') {
+        huePubSub.publish('editor.ws.query.status_watched', data['data']);
       }
       console.log(data);
     };
 
+    var sendToEditorWs = function(type, data) {
+      if (editorWs.readyState === WebSocket.OPEN) {
+        editorWs.send(JSON.stringify({ type: type, data: data }));
+      }
+    };
+    huePubSub.subscribe('editor.ws.query.watch_status', function(data) {
+      sendToEditorWs('watch_status', data);
+    });
+    huePubSub.subscribe('editor.ws.query.unwatch_status', function(data) {
+      sendToEditorWs('unwatch_status', data);
+    });
+
     editorWs.onclose = function(e) {
       console.error('Chat socket closed unexpectedly');
     };